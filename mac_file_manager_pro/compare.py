@@ -0,0 +1,216 @@
+"""
+Recursive comparison of two directory trees, and sync plans built from it
+"""
+
+import os
+import shutil
+import stat
+from collections import deque, namedtuple
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+
+from mac_file_manager_pro.treesearch import DEFAULT_IGNORED_DIRS, default_worker_count
+
+# Comparison statuses
+ONLY_LEFT = "Only left"
+ONLY_RIGHT = "Only right"
+LEFT_NEWER = "Left newer"
+RIGHT_NEWER = "Right newer"
+DIFFERENT = "Different"
+
+# Modification times closer than this count as equal (FAT and SMB round to 2s)
+MTIME_TOLERANCE = 2.0
+
+# Content verification reads both files in blocks of this size
+COMPARE_BLOCK = 1024 * 1024
+
+# Sync directions
+SYNC_LEFT_TO_RIGHT = "Left → Right"
+SYNC_RIGHT_TO_LEFT = "Right → Left"
+SYNC_BOTH_WAYS = "Both ways (newer wins)"
+SYNC_DIRECTIONS = (SYNC_LEFT_TO_RIGHT, SYNC_RIGHT_TO_LEFT, SYNC_BOTH_WAYS)
+
+# A side's view of an entry: None when missing
+Side = namedtuple('Side', 'is_dir size mtime')
+
+Difference = namedtuple('Difference', 'relpath status left right')
+
+SyncAction = namedtuple('SyncAction', 'source target is_dir size')
+
+
+def list_side(path, ignored=DEFAULT_IGNORED_DIRS, include_hidden=False):
+    """List one side of a directory pair as {name: Side}; a missing directory lists as empty
+
+    Symlinks are compared as their targets but never descended into.
+    """
+    entries = {}
+    try:
+        it = os.scandir(path)
+    except OSError:
+        return entries
+    with it:
+        for dir_entry in it:
+            name = dir_entry.name
+            if not include_hidden and name.startswith('.'):
+                continue
+            try:
+                st = dir_entry.stat()
+                is_dir = stat.S_ISDIR(st.st_mode)
+                if is_dir and (name in ignored or dir_entry.is_symlink()):
+                    continue
+            except OSError:
+                continue
+            if is_dir:
+                entries[name] = Side(True, 0, st.st_mtime)
+            elif stat.S_ISREG(st.st_mode):
+                entries[name] = Side(False, st.st_size, st.st_mtime)
+    return entries
+
+
+def same_contents(left_path, right_path):
+    """Compare two files block by block, stopping at the first difference"""
+    try:
+        with open(left_path, 'rb') as left, open(right_path, 'rb') as right:
+            while True:
+                left_block = left.read(COMPARE_BLOCK)
+                if left_block != right.read(COMPARE_BLOCK):
+                    return False
+                if not left_block:
+                    return True
+    except OSError:
+        return False
+
+
+def compare_pair(left_root, right_root, relpath, verify=False):
+    """Compare one directory of the two trees
+
+    Returns (differences, subdirectory relpaths present on both sides).
+    A directory present on one side only is reported once, not descended.
+    """
+    left_entries = list_side(os.path.join(left_root, relpath))
+    right_entries = list_side(os.path.join(right_root, relpath))
+    differences = []
+    shared_dirs = []
+    for name in sorted(left_entries.keys() | right_entries.keys()):
+        left = left_entries.get(name)
+        right = right_entries.get(name)
+        child = os.path.join(relpath, name) if relpath else name
+        if right is None:
+            differences.append(Difference(child, ONLY_LEFT, left, None))
+        elif left is None:
+            differences.append(Difference(child, ONLY_RIGHT, None, right))
+        elif left.is_dir and right.is_dir:
+            shared_dirs.append(child)
+        elif left.is_dir != right.is_dir:
+            differences.append(Difference(child, DIFFERENT, left, right))
+        elif abs(left.mtime - right.mtime) > MTIME_TOLERANCE:
+            status = LEFT_NEWER if left.mtime > right.mtime else RIGHT_NEWER
+            differences.append(Difference(child, status, left, right))
+        elif left.size != right.size:
+            differences.append(Difference(child, DIFFERENT, left, right))
+        elif verify and not same_contents(os.path.join(left_root, child), os.path.join(right_root, child)):
+            differences.append(Difference(child, DIFFERENT, left, right))
+    return differences, shared_dirs
+
+
+def compare_trees(left_root, right_root, verify=False, cancel_event=None, workers=None):
+    """Compare two directory trees, yielding lists of Difference objects
+
+    Directory pairs are compared breadth-first on a thread pool, each task
+    listing both sides, so the two trees are walked concurrently and
+    differences stream out per directory. Entries match by name; files
+    differ by mtime (beyond MTIME_TOLERANCE) or size, and with ``verify``
+    files that look the same are also compared byte by byte.
+    """
+    workers = workers or default_worker_count()
+    pending = deque([''])
+    running = set()
+
+    with ThreadPoolExecutor(max_workers=workers, thread_name_prefix="compare") as pool:
+        try:
+            while pending or running:
+                if cancel_event is not None and cancel_event.is_set():
+                    return
+                while pending and len(running) < workers * 2:
+                    running.add(pool.submit(compare_pair, left_root, right_root, pending.popleft(), verify))
+
+                done, running = wait(running, timeout=0.1, return_when=FIRST_COMPLETED)
+                for future in done:
+                    differences, shared_dirs = future.result()
+                    pending.extend(shared_dirs)
+                    if differences:
+                        yield differences
+        finally:
+            for future in running:
+                future.cancel()
+
+
+def plan_sync(differences, left_root, right_root, direction):
+    """Turn differences into copy actions for a sync direction
+
+    Nothing is ever deleted. One-way syncs copy entries missing on the
+    target side and overwrite target files that are older; a two-way sync
+    copies missing entries both ways and lets the newer file win. A target
+    file newer than the source is never overwritten. Files that differ
+    without either being newer are conflicts: a one-way sync overwrites
+    them and a two-way sync leaves them. A file facing a folder is always
+    left alone, since replacing it would need a delete.
+    """
+    actions = []
+    for difference in differences:
+        left_path = os.path.join(left_root, difference.relpath)
+        right_path = os.path.join(right_root, difference.relpath)
+        status = difference.status
+        to_right = to_left = False
+        if direction == SYNC_LEFT_TO_RIGHT:
+            to_right = status in (ONLY_LEFT, LEFT_NEWER, DIFFERENT)
+        elif direction == SYNC_RIGHT_TO_LEFT:
+            to_left = status in (ONLY_RIGHT, RIGHT_NEWER, DIFFERENT)
+        else:
+            to_right = status in (ONLY_LEFT, LEFT_NEWER)
+            to_left = status in (ONLY_RIGHT, RIGHT_NEWER)
+
+        if status == DIFFERENT and difference.left.is_dir != difference.right.is_dir:
+            # Replacing a folder with a file or the other way round needs a delete
+            continue
+        if to_right:
+            side = difference.left
+            actions.append(SyncAction(left_path, right_path, side.is_dir, side.size))
+        elif to_left:
+            side = difference.right
+            actions.append(SyncAction(right_path, left_path, side.is_dir, side.size))
+    return actions
+
+
+def copy_entry(action):
+    """Copy one file or folder into place, keeping metadata
+
+    Files are written to a temporary name next to the target and renamed
+    over it, so an interrupted copy never leaves a truncated target.
+    """
+    os.makedirs(os.path.dirname(action.target), exist_ok=True)
+    if action.is_dir:
+        shutil.copytree(action.source, action.target, symlinks=True, dirs_exist_ok=True)
+        return
+    tmp_target = os.path.join(os.path.dirname(action.target), f".{os.path.basename(action.target)}.sync-tmp")
+    try:
+        shutil.copy2(action.source, tmp_target)
+        os.replace(tmp_target, action.target)
+    except BaseException:
+        try:
+            os.remove(tmp_target)
+        except OSError:
+            pass
+        raise
+
+
+def execute_plan(actions, cancel_event=None):
+    """Run sync actions in order, yielding (action, error message or None) after each"""
+    for action in actions:
+        if cancel_event is not None and cancel_event.is_set():
+            return
+        try:
+            copy_entry(action)
+        except OSError as e:
+            yield action, str(e)
+        else:
+            yield action, None
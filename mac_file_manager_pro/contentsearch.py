@@ -0,0 +1,325 @@
+"""
+Content search (grep) over text files using a pool of worker processes
+"""
+
+import mmap
+import multiprocessing
+import os
+import re
+from collections import namedtuple
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+
+from mac_file_manager_pro.search import MATCH_REGEX, MATCH_SUBSTRING
+from mac_file_manager_pro.treesearch import DEFAULT_IGNORED_DIRS
+
+# Extensions previewed as text; searched without further checks beyond the sniff
+TEXT_EXTENSIONS = frozenset({
+    '.txt', '.md', '.py', '.js', '.html', '.css', '.json', '.xml', '.csv', '.log',
+    '.ini', '.cfg', '.conf',
+})
+
+# Media, archive and document formats; never opened
+BINARY_EXTENSIONS = frozenset({
+    '.mp4', '.avi', '.mov', '.mkv', '.wmv', '.flv', '.webm', '.m4v', '.3gp',
+    '.mp3', '.wav', '.flac', '.aac', '.ogg', '.m4a', '.wma', '.aiff',
+    '.gif', '.jpg', '.jpeg', '.png', '.bmp', '.tiff', '.webp', '.heic',
+    '.zip', '.tar', '.gz', '.tgz', '.rar', '.7z', '.dmg', '.iso',
+    '.pdf', '.doc', '.docx', '.xls', '.xlsx', '.ppt', '.pptx',
+    '.so', '.dylib', '.o', '.a', '.pyc', '.class', '.jar', '.exe', '.sqlite3', '.db',
+})
+
+# Content modes offered by the content search dialog
+CONTENT_MODES = (MATCH_SUBSTRING, MATCH_REGEX)
+
+# Bytes read from the start of a file to decide whether it is text
+SNIFF_BYTES = 8192
+
+# Files larger than this are split into ranges searched in parallel
+SPLIT_BYTES = 64 * 1024 * 1024
+
+# Small files are grouped into tasks of up to this many bytes or files
+TASK_BYTES = 8 * 1024 * 1024
+TASK_FILES = 64
+
+# Newlines are counted over slices of this size, bounding the copies
+COUNT_CHUNK = 1024 * 1024
+
+# Matched lines longer than this are cut around the match
+MAX_LINE_CHARS = 400
+
+ContentMatch = namedtuple('ContentMatch', 'path line_number offset line')
+
+
+def default_process_count():
+    """Get the search pool size: one process per core"""
+    return os.cpu_count() or 4
+
+
+def compile_content_pattern(query, mode=MATCH_SUBSTRING):
+    """Compile a content query into a case-insensitive bytes regex, or None for an empty query
+
+    Raises ValueError for a malformed regular expression.
+    """
+    if not query:
+        return None
+    source = query.encode('utf-8')
+    if mode != MATCH_REGEX:
+        source = re.escape(source)
+    try:
+        return re.compile(source, re.IGNORECASE | re.MULTILINE)
+    except re.error as e:
+        raise ValueError(f"Invalid regular expression: {e}") from e
+
+
+def looks_binary(head):
+    """Check whether the first bytes of a file look binary (NUL bytes, like grep)"""
+    return b'\0' in head
+
+
+def is_candidate(name):
+    """Check whether a file name is worth searching; unknown extensions are sniffed"""
+    return os.path.splitext(name)[1].lower() not in BINARY_EXTENSIONS
+
+
+def line_text(data, line_start, match_start):
+    """Decode the line starting at line_start, cut to MAX_LINE_CHARS around a match"""
+    line_end = data.find(b'\n', match_start)
+    if line_end == -1:
+        line_end = len(data)
+    if line_end - line_start > MAX_LINE_CHARS:
+        line_start = max(line_start, match_start - MAX_LINE_CHARS // 4)
+        line_end = min(line_end, line_start + MAX_LINE_CHARS)
+    return data[line_start:line_end].decode('utf-8', 'replace').rstrip('\r')
+
+
+def count_newlines(data, start, end):
+    """Count newlines in data[start:end], copying at most COUNT_CHUNK bytes at a time"""
+    count = 0
+    for chunk_start in range(start, end, COUNT_CHUNK):
+        count += data[chunk_start:min(end, chunk_start + COUNT_CHUNK)].count(b'\n')
+    return count
+
+
+def grep_span(data, pattern, start, end, limit):
+    """Search the lines of data between two line boundaries
+
+    Returns (newlines in the span, [(line index within the span, byte offset,
+    line text)]) with one result per matching line.
+    """
+    matches = []
+    line_index = 0
+    line_start = start
+    pos = start
+    while len(matches) < limit:
+        match = pattern.search(data, pos, end)
+        if match is None:
+            break
+        match_start = match.start()
+        line_index += count_newlines(data, line_start, match_start)
+        line_start = data.rfind(b'\n', start, match_start) + 1 or start
+        matches.append((line_index, line_start, line_text(data, line_start, match_start)))
+        # Continue on the line after the match
+        next_line = data.find(b'\n', max(match.end() - 1, match_start), end)
+        if next_line == -1:
+            break
+        pos = next_line + 1
+    return count_newlines(data, start, end), matches
+
+
+def grep_files(paths, pattern, limit):
+    """Search whole files, skipping binary and unreadable ones; returns ContentMatch objects"""
+    results = []
+    for path in paths:
+        try:
+            with open(path, 'rb') as f:
+                if looks_binary(f.read(SNIFF_BYTES)):
+                    continue
+                size = os.fstat(f.fileno()).st_size
+                if size == 0:
+                    continue
+                with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as data:
+                    newlines, matches = grep_span(data, pattern, 0, size, limit - len(results))
+        except (OSError, ValueError):
+            continue
+        results.extend(ContentMatch(path, line + 1, offset, text) for line, offset, text in matches)
+        if len(results) >= limit:
+            break
+    return results
+
+
+def grep_range(path, pattern, start, end, limit):
+    """Search the lines of a file that start within [start, end)
+
+    Returns (newlines in the searched lines, [(line index within them, byte
+    offset, line text)]); the caller adds the newline counts of the
+    preceding ranges to get line numbers.
+    """
+    try:
+        with open(path, 'rb') as f:
+            size = os.fstat(f.fileno()).st_size
+            with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as data:
+                end = min(end, size)
+                # Lines belong to the range holding their first byte
+                if start > 0 and data[start - 1] != ord('\n'):
+                    newline = data.find(b'\n', start)
+                    start = size if newline == -1 else newline + 1
+                newline = data.find(b'\n', end - 1) if end > 0 else -1
+                stop = size if newline == -1 else newline + 1
+                if start >= stop:
+                    return 0, []
+                return grep_span(data, pattern, start, stop, limit)
+    except (OSError, ValueError):
+        return 0, []
+
+
+def iter_text_files(root, recursive=True, cancel_event=None, ignored=DEFAULT_IGNORED_DIRS,
+                    include_hidden=False):
+    """Yield (path, size) for the candidate files under a folder
+
+    Hidden entries and ignored directories are skipped, and symlinked
+    directories are not followed.
+    """
+    pending = [root]
+    while pending:
+        if cancel_event is not None and cancel_event.is_set():
+            return
+        try:
+            with os.scandir(pending.pop()) as it:
+                for dir_entry in it:
+                    name = dir_entry.name
+                    if not include_hidden and name.startswith('.'):
+                        continue
+                    try:
+                        if dir_entry.is_dir(follow_symlinks=False):
+                            if recursive and name not in ignored:
+                                pending.append(dir_entry.path)
+                            continue
+                        if not is_candidate(name) or not dir_entry.is_file():
+                            continue
+                        size = dir_entry.stat().st_size
+                    except OSError:
+                        continue
+                    if size:
+                        yield dir_entry.path, size
+        except OSError:
+            continue
+
+
+def plan_tasks(files):
+    """Group files into search tasks
+
+    Yields ('files', [paths]) for batches of small files, and ('range', path,
+    start, end, index, count) for each slice of a large file. Large files are
+    sniffed here, since range workers never see the start of the file, and
+    dropped when they look binary or cannot be read.
+    """
+    batch = []
+    batch_bytes = 0
+    for path, size in files:
+        if size > SPLIT_BYTES:
+            try:
+                with open(path, 'rb') as f:
+                    if looks_binary(f.read(SNIFF_BYTES)):
+                        continue
+            except OSError:
+                continue
+            count = -(-size // SPLIT_BYTES)
+            for index in range(count):
+                yield ('range', path, index * SPLIT_BYTES, min(size, (index + 1) * SPLIT_BYTES), index, count)
+            continue
+        batch.append(path)
+        batch_bytes += size
+        if len(batch) >= TASK_FILES or batch_bytes >= TASK_BYTES:
+            yield ('files', batch)
+            batch = []
+            batch_bytes = 0
+    if batch:
+        yield ('files', batch)
+
+
+class SplitFile:
+    """Results of a large file's ranges, released in order once line numbers are known"""
+
+    def __init__(self, path, count):
+        self.path = path
+        self.done = [None] * count
+        self.next = 0
+        self.lines_before = 0
+
+    def add(self, index, newlines, matches):
+        """Record a finished range and get the matches now ready as ContentMatch objects"""
+        self.done[index] = (newlines, matches)
+        ready = []
+        while self.next < len(self.done) and self.done[self.next] is not None:
+            newlines, matches = self.done[self.next]
+            ready.extend(ContentMatch(self.path, self.lines_before + line + 1, offset, text)
+                         for line, offset, text in matches)
+            self.lines_before += newlines
+            self.done[self.next] = ()
+            self.next += 1
+        return ready
+
+
+def search_contents(root, pattern, recursive=True, max_results=None, cancel_event=None,
+                    processes=None):
+    """Search file contents under a folder, yielding lists of ContentMatch objects
+
+    The calling thread walks the folder and hands batches of small files,
+    and fixed-size slices of large ones, to a process pool, so matching
+    runs on every core while the walk keeps the disks busy. Workers mmap
+    each file and skip it when its first bytes contain a NUL. A bounded
+    number of tasks is in flight; results are yielded as tasks complete, in
+    file order within a split file. The search stops once ``max_results``
+    matches were yielded or ``cancel_event`` is set.
+    """
+    processes = processes or default_process_count()
+    limit = max_results or float('inf')
+    tasks = plan_tasks(iter_text_files(root, recursive, cancel_event))
+    running = {}
+    split_files = {}
+    found = 0
+
+    # Spawn rather than fork: the caller is one thread of a multithreaded GUI
+    pool = ProcessPoolExecutor(max_workers=processes, mp_context=multiprocessing.get_context('spawn'))
+    try:
+        exhausted = False
+        while not exhausted or running:
+            if cancel_event is not None and cancel_event.is_set():
+                return
+            while not exhausted and len(running) < processes * 2:
+                task = next(tasks, None)
+                if task is None:
+                    exhausted = True
+                    break
+                task_limit = int(min(limit - found, 1 << 30))
+                if task[0] == 'files':
+                    future = pool.submit(grep_files, task[1], pattern, task_limit)
+                else:
+                    path, start, end, index, count = task[1:]
+                    split_files.setdefault(path, SplitFile(path, count))
+                    future = pool.submit(grep_range, path, pattern, start, end, task_limit)
+                running[future] = task
+            if not running:
+                break
+
+            done, _ = wait(running, timeout=0.1, return_when=FIRST_COMPLETED)
+            for future in done:
+                task = running.pop(future)
+                if task[0] == 'files':
+                    matches = future.result()
+                else:
+                    path, index = task[1], task[4]
+                    split_file = split_files[path]
+                    newlines, range_matches = future.result()
+                    matches = split_file.add(index, newlines, range_matches)
+                    if split_file.next == len(split_file.done):
+                        del split_files[path]
+                if not matches:
+                    continue
+                if found + len(matches) >= limit:
+                    yield matches[:int(limit - found)]
+                    return
+                found += len(matches)
+                yield matches
+    finally:
+        pool.shutdown(wait=False, cancel_futures=True)
@@ -0,0 +1,218 @@
+"""
+Directory scanning engine shared by the file manager panes
+"""
+
+import os
+import re
+import stat
+import threading
+from collections import OrderedDict
+
+_split_digits = re.compile(r'(\d+)').split
+
+
+def natural_key(name):
+    """Get a case-insensitive natural sort key, so "file2" sorts before "file10"
+
+    Digit runs compare as numbers. The exact name breaks ties between names
+    that only differ in case or leading zeros.
+    """
+    parts = _split_digits(name.casefold())
+    parts[1::2] = map(int, parts[1::2])
+    return tuple(parts), name
+
+
+class FileEntry:
+    """Snapshot of a single directory entry captured during a scan
+
+    The natural sort key is computed on construction, which happens on the
+    scan thread, so sorting by name later does not re-derive it.
+    """
+
+    __slots__ = ('name', 'path', 'is_dir', 'size', 'mtime', 'mode', 'ino', 'name_key')
+
+    def __init__(self, name, path, is_dir, size, mtime, mode, ino=0):
+        self.name = name
+        self.path = path
+        self.is_dir = is_dir
+        self.size = size
+        self.mtime = mtime
+        self.mode = mode
+        self.ino = ino
+        self.name_key = natural_key(name)
+
+    def __repr__(self):
+        kind = 'dir' if self.is_dir else 'file'
+        return f"FileEntry({self.name!r}, {kind}, size={self.size})"
+
+
+def is_hidden(name, st):
+    """Check whether an entry is hidden (dot file or macOS hidden flag)"""
+    if name.startswith('.'):
+        return True
+    flags = getattr(st, 'st_flags', 0)
+    return bool(flags & getattr(stat, 'UF_HIDDEN', 0))
+
+
+def entry_from_dir_entry(dir_entry, include_hidden=False):
+    """Build a FileEntry from an os.DirEntry, or None if it should be skipped"""
+    try:
+        # Follows symlinks, like QDir does; broken links raise and are skipped
+        st = dir_entry.stat()
+    except OSError:
+        return None
+
+    if not include_hidden and is_hidden(dir_entry.name, st):
+        return None
+
+    mode = st.st_mode
+    if stat.S_ISDIR(mode):
+        return FileEntry(dir_entry.name, dir_entry.path, True, 0, st.st_mtime, mode, st.st_ino)
+    if stat.S_ISREG(mode):
+        return FileEntry(dir_entry.name, dir_entry.path, False, st.st_size, st.st_mtime, mode, st.st_ino)
+    # Sockets, FIFOs and devices are not listed
+    return None
+
+
+def sort_entries(entries):
+    """Sort entries by natural name order, ignoring case (like Finder)"""
+    entries.sort(key=lambda entry: entry.name_key)
+    return entries
+
+
+def iter_scan_batches(path, batch_size=256, cancel_event=None, include_hidden=False):
+    """Enumerate a directory once, yielding (folders, files) batches as they are read
+
+    Entries are yielded in directory order. Setting ``cancel_event`` stops the
+    enumeration at the next entry.
+    """
+    folders = []
+    files = []
+
+    with os.scandir(path) as it:
+        for dir_entry in it:
+            if cancel_event is not None and cancel_event.is_set():
+                return
+            entry = entry_from_dir_entry(dir_entry, include_hidden)
+            if entry is None:
+                continue
+            if entry.is_dir:
+                folders.append(entry)
+            else:
+                files.append(entry)
+            if len(folders) + len(files) >= batch_size:
+                yield folders, files
+                folders = []
+                files = []
+
+    if folders or files:
+        yield folders, files
+
+
+def scan_directory(path, include_hidden=False):
+    """Enumerate a directory once and return (folders, files) sorted by name"""
+    folders = []
+    files = []
+
+    for batch_folders, batch_files in iter_scan_batches(path, batch_size=4096,
+                                                        include_hidden=include_hidden):
+        folders.extend(batch_folders)
+        files.extend(batch_files)
+
+    return sort_entries(folders), sort_entries(files)
+
+
+def directory_signature(path):
+    """Get a (mtime_ns, inode) pair that changes when a directory's entries change"""
+    st = os.stat(path)
+    return st.st_mtime_ns, st.st_ino
+
+
+class CachedListing:
+    """Scanned contents of a directory together with the signature it was read at
+
+    ``snapshots`` optionally holds the (folders, files) DirectoryListing pair
+    a pane built from the entries, so showing the directory again can copy
+    the built columns instead of rebuilding them entry by entry.
+    """
+
+    __slots__ = ('path', 'folders', 'files', 'signature', 'snapshots')
+
+    def __init__(self, path, folders, files, signature):
+        self.path = path
+        self.folders = folders
+        self.files = files
+        self.signature = signature
+        self.snapshots = None
+
+    def __len__(self):
+        return len(self.folders) + len(self.files)
+
+
+class ListingCache:
+    """In-process LRU cache of directory listings, bounded by total entry count
+
+    Listings are stored with the directory's (mtime_ns, inode) signature taken
+    before the scan started, so callers can serve a cached listing immediately
+    and revalidate it against ``directory_signature`` afterwards.
+    """
+
+    def __init__(self, max_entries=250000):
+        self.max_entries = max_entries
+        self.total_entries = 0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self._listings = OrderedDict()
+        self._lock = threading.Lock()
+
+    def __len__(self):
+        return len(self._listings)
+
+    def __contains__(self, path):
+        return path in self._listings
+
+    def get(self, path):
+        """Get the cached listing for a path, marking it most recently used"""
+        with self._lock:
+            listing = self._listings.get(path)
+            if listing is None:
+                self.misses += 1
+                return None
+            self._listings.move_to_end(path)
+            self.hits += 1
+            return listing
+
+    def put(self, path, folders, files, signature):
+        """Store a listing, evicting least recently used ones over the budget"""
+        listing = CachedListing(path, folders, files, signature)
+        with self._lock:
+            old = self._listings.pop(path, None)
+            if old is not None:
+                self.total_entries -= len(old)
+            if len(listing) > self.max_entries:
+                return listing
+            self._listings[path] = listing
+            self.total_entries += len(listing)
+            while self.total_entries > self.max_entries:
+                _, evicted = self._listings.popitem(last=False)
+                self.total_entries -= len(evicted)
+                self.evictions += 1
+        return listing
+
+    def invalidate(self, path):
+        """Drop the cached listing for a path"""
+        with self._lock:
+            old = self._listings.pop(path, None)
+            if old is not None:
+                self.total_entries -= len(old)
+
+    def is_current(self, path):
+        """Check whether the cached listing for a path still matches the directory"""
+        listing = self._listings.get(path)
+        if listing is None:
+            return False
+        try:
+            return directory_signature(path) == listing.signature
+        except OSError:
+            return False
@@ -0,0 +1,331 @@
+"""
+Staged duplicate-file finder: size buckets, then partial hashes, then full hashes
+"""
+
+import hashlib
+import mmap
+import multiprocessing
+import os
+import sqlite3
+import stat
+from collections import defaultdict, namedtuple
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+
+from mac_file_manager_pro.treesearch import DEFAULT_IGNORED_DIRS
+
+# xxHash is optional; when present its 128-bit hash replaces BLAKE2b for speed
+try:
+    import xxhash
+    HASH_NAME = "xxh3_128"
+except ImportError:
+    xxhash = None
+    HASH_NAME = "blake2b"
+
+# Bytes hashed from each end of a file in the partial stage
+EDGE_BYTES = 64 * 1024
+
+# Full hashes are fed in slices of this size
+HASH_CHUNK = 8 * 1024 * 1024
+
+# Files handed to a worker process per task in each stage
+PARTIAL_TASK_FILES = 256
+FULL_TASK_BYTES = 512 * 1024 * 1024
+
+# Stages reported to the progress callback
+STAGE_SCAN = "Scanning"
+STAGE_PARTIAL = "Comparing file edges"
+STAGE_FULL = "Comparing full contents"
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS file_hashes (
+    path TEXT PRIMARY KEY,
+    size INTEGER NOT NULL,
+    mtime_ns INTEGER NOT NULL,
+    algorithm TEXT NOT NULL,
+    partial BLOB,
+    full BLOB
+);
+"""
+
+DuplicateGroup = namedtuple('DuplicateGroup', 'size paths')
+
+FileRecord = namedtuple('FileRecord', 'path size mtime_ns')
+
+
+def new_hash():
+    """Create a hash object of the configured algorithm"""
+    if xxhash is not None:
+        return xxhash.xxh3_128()
+    return hashlib.blake2b(digest_size=20)
+
+
+def hash_edges(path, size):
+    """Hash a file's size and first and last EDGE_BYTES
+
+    For files no larger than two edges this covers the whole file, so the
+    result doubles as the full hash.
+    """
+    digest = new_hash()
+    digest.update(size.to_bytes(8, 'little'))
+    with open(path, 'rb') as f:
+        with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as data:
+            if size <= 2 * EDGE_BYTES:
+                digest.update(data)
+            else:
+                digest.update(data[:EDGE_BYTES])
+                digest.update(data[size - EDGE_BYTES:size])
+    return digest.digest()
+
+
+def hash_full(path, size):
+    """Hash a file's whole contents"""
+    digest = new_hash()
+    digest.update(size.to_bytes(8, 'little'))
+    with open(path, 'rb') as f:
+        with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as data:
+            view = memoryview(data)
+            try:
+                for start in range(0, size, HASH_CHUNK):
+                    digest.update(view[start:start + HASH_CHUNK])
+            finally:
+                view.release()
+    return digest.digest()
+
+
+def hash_files(stage, files):
+    """Hash (path, size) pairs in a worker process; unreadable files get None"""
+    hasher = hash_edges if stage == STAGE_PARTIAL else hash_full
+    results = []
+    for path, size in files:
+        try:
+            results.append(hasher(path, size))
+        except (OSError, ValueError):
+            results.append(None)
+    return results
+
+
+class HashCache:
+    """Partial and full file hashes keyed by (path, size, mtime)
+
+    Records made with another hash algorithm are ignored. A HashCache wraps
+    one SQLite connection, so use one instance per thread.
+    """
+
+    def __init__(self, db_path):
+        self._conn = sqlite3.connect(db_path, timeout=30)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.executescript(SCHEMA)
+        self._conn.commit()
+
+    def close(self):
+        """Close the database connection"""
+        self._conn.close()
+
+    def get(self, record, stage):
+        """Get a cached hash for a file record, or None"""
+        column = 'partial' if stage == STAGE_PARTIAL else 'full'
+        row = self._conn.execute(
+            f"SELECT {column} FROM file_hashes WHERE path = ? AND size = ? AND mtime_ns = ? AND algorithm = ?",
+            (record.path, record.size, record.mtime_ns, HASH_NAME)
+        ).fetchone()
+        return row[0] if row else None
+
+    def put(self, items, stage):
+        """Save (file record, hash) pairs for a stage"""
+        if not items:
+            return
+        column = 'partial' if stage == STAGE_PARTIAL else 'full'
+        conn = self._conn
+        for record, digest in items:
+            updated = conn.execute(
+                f"UPDATE file_hashes SET {column} = ? "
+                "WHERE path = ? AND size = ? AND mtime_ns = ? AND algorithm = ?",
+                (digest, record.path, record.size, record.mtime_ns, HASH_NAME)
+            ).rowcount
+            if not updated:
+                conn.execute(
+                    f"INSERT OR REPLACE INTO file_hashes(path, size, mtime_ns, algorithm, {column}) "
+                    "VALUES (?, ?, ?, ?, ?)",
+                    (record.path, record.size, record.mtime_ns, HASH_NAME, digest)
+                )
+        conn.commit()
+
+
+def iter_files(roots, min_size=1, cancel_event=None, ignored=DEFAULT_IGNORED_DIRS, include_hidden=False):
+    """Yield a FileRecord per regular file under the roots
+
+    Symlinks are not followed, and a file reachable twice (overlapping
+    roots, hard links) is yielded once, since its copies share the same
+    storage.
+    """
+    seen = set()
+    pending = list(roots)
+    while pending:
+        if cancel_event is not None and cancel_event.is_set():
+            return
+        try:
+            with os.scandir(pending.pop()) as it:
+                for dir_entry in it:
+                    name = dir_entry.name
+                    if not include_hidden and name.startswith('.'):
+                        continue
+                    try:
+                        st = dir_entry.stat(follow_symlinks=False)
+                    except OSError:
+                        continue
+                    if stat.S_ISDIR(st.st_mode):
+                        if name not in ignored and (st.st_dev, st.st_ino) not in seen:
+                            seen.add((st.st_dev, st.st_ino))
+                            pending.append(dir_entry.path)
+                    elif stat.S_ISREG(st.st_mode) and st.st_size >= min_size:
+                        if (st.st_dev, st.st_ino) in seen:
+                            continue
+                        seen.add((st.st_dev, st.st_ino))
+                        yield FileRecord(dir_entry.path, st.st_size, st.st_mtime_ns)
+        except OSError:
+            continue
+
+
+def group_by_hash(records, hashes):
+    """Group records by (size, hash), keeping only groups of two or more
+
+    Records without a hash (unreadable files) are dropped.
+    """
+    groups = defaultdict(list)
+    for record, digest in zip(records, hashes):
+        if digest is not None:
+            groups[(record.size, digest)].append(record)
+    return [group for group in groups.values() if len(group) > 1]
+
+
+class _Stage:
+    """Hashes one stage's files through the cache and a process pool"""
+
+    def __init__(self, pool, cache, processes, cancel_event, progress):
+        self.pool = pool
+        self.cache = cache
+        self.processes = processes
+        self.cancel_event = cancel_event
+        self.progress = progress
+
+    def cancelled(self):
+        return self.cancel_event is not None and self.cancel_event.is_set()
+
+    def run(self, stage, records):
+        """Get a hash per record (None if unreadable), or None if cancelled"""
+        hashes = [None] * len(records)
+        missing = []
+        for position, record in enumerate(records):
+            cached = self.cache.get(record, stage) if self.cache is not None else None
+            if cached is not None:
+                hashes[position] = cached
+            else:
+                missing.append(position)
+
+        done = len(records) - len(missing)
+        self._report(stage, done, len(records))
+        tasks = iter(self._plan(stage, records, missing))
+        running = {}
+        exhausted = False
+        while not exhausted or running:
+            if self.cancelled():
+                for future in running:
+                    future.cancel()
+                return None
+            while not exhausted and len(running) < self.processes * 2:
+                positions = next(tasks, None)
+                if positions is None:
+                    exhausted = True
+                    break
+                files = [(records[p].path, records[p].size) for p in positions]
+                running[self.pool.submit(hash_files, stage, files)] = positions
+            if not running:
+                break
+
+            finished, _ = wait(running, timeout=0.1, return_when=FIRST_COMPLETED)
+            for future in finished:
+                positions = running.pop(future)
+                results = future.result()
+                fresh = []
+                for position, digest in zip(positions, results):
+                    hashes[position] = digest
+                    if digest is not None:
+                        fresh.append((records[position], digest))
+                if self.cache is not None:
+                    self.cache.put(fresh, stage)
+                done += len(positions)
+                self._report(stage, done, len(records))
+        return hashes
+
+    def _plan(self, stage, records, positions):
+        """Split positions into tasks: fixed counts for edges, byte budgets for full hashes"""
+        batch = []
+        batch_bytes = 0
+        for position in positions:
+            batch.append(position)
+            batch_bytes += records[position].size
+            if (stage == STAGE_PARTIAL and len(batch) >= PARTIAL_TASK_FILES) or \
+                    (stage == STAGE_FULL and batch_bytes >= FULL_TASK_BYTES):
+                yield batch
+                batch = []
+                batch_bytes = 0
+        if batch:
+            yield batch
+
+    def _report(self, stage, done, total):
+        if self.progress is not None:
+            self.progress(stage, done, total)
+
+
+def find_duplicates(roots, cache=None, min_size=1, cancel_event=None, processes=None, progress=None):
+    """Find groups of files with identical contents under the roots
+
+    Each stage only reads what the previous one could not rule out: files
+    are bucketed by size from the directory walk alone, colliding sizes are
+    compared by a hash of their first and last EDGE_BYTES, and only files
+    still colliding are hashed in full (small files are fully covered by the
+    edge hash already). Hashing runs in a pool of worker processes over
+    mmap'ed files, and hashes are cached by (path, size, mtime) so a rerun
+    only reads changed files.
+
+    ``progress(stage, done, total)`` is called from the calling thread.
+    Returns DuplicateGroup tuples, most wasted space first, or None if
+    cancelled.
+    """
+    processes = processes or os.cpu_count() or 4
+
+    by_size = defaultdict(list)
+    scanned = 0
+    for record in iter_files(roots, min_size, cancel_event):
+        by_size[record.size].append(record)
+        scanned += 1
+        if progress is not None and scanned % 1000 == 0:
+            progress(STAGE_SCAN, scanned, 0)
+    if cancel_event is not None and cancel_event.is_set():
+        return None
+    candidates = [record for group in by_size.values() if len(group) > 1 for record in group]
+    del by_size
+
+    # Spawn rather than fork: the caller is one thread of a multithreaded GUI
+    pool = ProcessPoolExecutor(max_workers=processes, mp_context=multiprocessing.get_context('spawn'))
+    try:
+        stage = _Stage(pool, cache, processes, cancel_event, progress)
+
+        edge_hashes = stage.run(STAGE_PARTIAL, candidates)
+        if edge_hashes is None:
+            return None
+        groups = group_by_hash(candidates, edge_hashes)
+
+        confirmed = [group for group in groups if group[0].size <= 2 * EDGE_BYTES]
+        colliding = [record for group in groups if group[0].size > 2 * EDGE_BYTES for record in group]
+        full_hashes = stage.run(STAGE_FULL, colliding)
+        if full_hashes is None:
+            return None
+        confirmed.extend(group_by_hash(colliding, full_hashes))
+    finally:
+        pool.shutdown(wait=False, cancel_futures=True)
+
+    result = [DuplicateGroup(group[0].size, sorted(record.path for record in group)) for group in confirmed]
+    result.sort(key=lambda group: (-group.size * (len(group.paths) - 1), group.paths[0]))
+    return result
@@ -12,19 +12,52 @@ import time
 import zipfile
 import tarfile
 import mimetypes
+import bisect
+import multiprocessing
+import sqlite3
+from array import array
 from pathlib import Path
 from PyQt5.QtWidgets import (
     QApplication, QMainWindow, QWidget, QVBoxLayout, QHBoxLayout, 
     QListView, QTreeView, QTableView, QHeaderView, QSplitter, QPushButton, QLabel, QComboBox,
     QLineEdit, QSlider, QMenu, QMessageBox, QStyledItemDelegate, QStyle, QSizePolicy,
     QGraphicsView, QGraphicsScene, QGraphicsPixmapItem, QGraphicsProxyWidget, QFrame, QDialog,
-    QTextEdit, QPlainTextEdit, QScrollArea, QProgressBar, QListWidget, QListWidgetItem
+    QTextEdit, QPlainTextEdit, QScrollArea, QProgressBar, QListWidget, QListWidgetItem, QCheckBox,
+    QTreeWidget, QTreeWidgetItem, QFileIconProvider
 )
-from PyQt5.QtCore import Qt, QSize, QDir, QFileInfo, QAbstractTableModel, QModelIndex, QThread, pyqtSignal, QTimer, QPropertyAnimation, QEasingCurve, QUrl
-from PyQt5.QtGui import QIcon, QPixmap, QPainter, QColor, QStandardItemModel, QStandardItem, QFont, QPen, QBrush, QMovie, QTextCursor, QSyntaxHighlighter, QTextCharFormat
+from PyQt5.QtCore import Qt, QPoint, QSize, QDir, QFileInfo, QAbstractTableModel, QModelIndex, QAbstractProxyModel, QPersistentModelIndex, QObject, QThread, QByteArray, QBuffer, QIODevice, pyqtSignal, QTimer, QPropertyAnimation, QEasingCurve, QUrl, QDateTime, QFileSystemWatcher
+from PyQt5.QtGui import QIcon, QImage, QImageReader, QPixmap, QTransform, QPainter, QColor, QFont, QPen, QBrush, QMovie, QTextCursor, QSyntaxHighlighter, QTextCharFormat
 from PyQt5.QtMultimedia import QMediaPlayer, QMediaContent
 from PyQt5.QtMultimediaWidgets import QVideoWidget
 
+from mac_file_manager_pro.dirscan import (
+    ListingCache, directory_signature, iter_scan_batches, scan_directory, sort_entries
+)
+from mac_file_manager_pro.listing import (
+    DirectoryListing, format_file_size, file_type_name, icon_theme_names,
+    COLUMN_NAME, COLUMN_SIZE, COLUMN_TYPE, COLUMN_DATE
+)
+from mac_file_manager_pro.search import MATCH_MODES, MATCH_SUBSTRING, compile_matcher
+from mac_file_manager_pro.treesearch import search_tree
+from mac_file_manager_pro.compare import (
+    DIFFERENT, LEFT_NEWER, ONLY_LEFT, ONLY_RIGHT, RIGHT_NEWER, SYNC_DIRECTIONS,
+    compare_trees, execute_plan, plan_sync
+)
+from mac_file_manager_pro.contentsearch import (
+    CONTENT_MODES, TEXT_EXTENSIONS, compile_content_pattern, search_contents
+)
+from mac_file_manager_pro.duplicates import HashCache, find_duplicates
+from mac_file_manager_pro.fileindex import FileIndex
+from mac_file_manager_pro.imagemeta import ORIENTATIONS, fit_size, read_exif_thumbnail
+from mac_file_manager_pro.foldersize import FolderSizeCache, folder_sizes
+from mac_file_manager_pro.prefetch import Prefetcher, VisitCounter
+from mac_file_manager_pro.storage import app_cache_dir, load_bookmarks, save_bookmarks
+from mac_file_manager_pro.thumbnails import (
+    LANE_STORED, STORAGE_NETWORK, THUMBNAIL_LEVELS, LRUCache, StorageClassifier, ThumbnailPool, pyramid_level, pyramid_plan
+)
+from mac_file_manager_pro.thumbstore import NO_THUMBNAIL, ThumbnailStore
+from mac_file_manager_pro.videothumb import VIDEO_THUMBNAILS, extract_frame as extract_video_frame
+
 # Try to import QWebEngineView, but make it optional
 try:
     from PyQt5.QtWebEngineWidgets import QWebEngineView
@@ -40,6 +73,119 @@ logging.basicConfig(
 )
 logger = logging.getLogger(__name__)
 
+# Number of entries streamed to the GUI per directory scan batch
+SCAN_BATCH_SIZE = 256
+
+# Upper bound on entries kept in the shared directory listing cache
+LISTING_CACHE_MAX_ENTRIES = 250000
+
+# Delay used to coalesce bursts of change notifications for a directory
+REFRESH_DELAY_MS = 300
+
+# Polling interval for directories QFileSystemWatcher cannot watch
+POLL_INTERVAL_MS = 2000
+
+# Pause in typing before the search filter is applied
+SEARCH_DEBOUNCE_MS = 150
+
+# Number of rows a pane model exposes per fetchMore
+FETCH_BATCH_SIZE = 256
+
+# Rescans adding entries in more separate runs than this reset the model instead
+UPDATE_MAX_INSERT_RUNS = 32
+
+# Recursive search: stop after this many matches
+TREE_SEARCH_MAX_RESULTS = 10000
+
+# Recursive search: longest time matches are held back before being shown
+TREE_SEARCH_FLUSH_MS = 100
+
+# Content search: stop after this many matching lines
+CONTENT_SEARCH_MAX_RESULTS = 10000
+
+# Content search: longest time matches are held back before being shown
+CONTENT_SEARCH_FLUSH_MS = 100
+
+# Folder sizes: longest time computed sizes are held back before being shown
+FOLDER_SIZE_FLUSH_MS = 250
+
+# Per-directory folder size cache, kept in the cache directory
+FOLDER_SIZE_CACHE_NAME = "folder_sizes.sqlite3"
+
+# Folder sizes remembered in memory to fill panes instantly; cleared past this
+FOLDER_SIZE_MEMORY_MAX = 100000
+
+# Pane comparison: longest time differences are held back before being shown
+COMPARE_FLUSH_MS = 100
+
+# Row backgrounds marking comparison results in the panes and the compare dialog
+COMPARE_COLORS = {
+    ONLY_LEFT: "#dbeafe",
+    ONLY_RIGHT: "#dbeafe",
+    LEFT_NEWER: "#dcfce7",
+    RIGHT_NEWER: "#dcfce7",
+    DIFFERENT: "#fee2e2",
+}
+
+# Duplicate finder hash cache, kept in the cache directory
+HASH_CACHE_NAME = "file_hashes.sqlite3"
+
+# Filename index of bookmarked folders, kept in the cache directory
+FILE_INDEX_NAME = "file_index.sqlite3"
+
+# Indexed search: most matches shown for a query
+INDEX_SEARCH_MAX_RESULTS = 500
+
+# Pause after startup before the bookmarked folders are revalidated
+INDEX_STARTUP_DELAY_MS = 5000
+
+# Interval between full mtime revalidations of the bookmarked folders
+INDEX_REVALIDATE_MS = 15 * 60 * 1000
+
+# File extensions given thumbnails, decoded as images or sampled as video frames
+THUMBNAIL_IMAGE_EXTENSIONS = frozenset({'.jpg', '.jpeg', '.png', '.gif', '.bmp', '.tiff', '.webp'})
+THUMBNAIL_VIDEO_EXTENSIONS = frozenset({'.mp4', '.avi', '.mov', '.mkv', '.wmv', '.flv', '.webm', '.m4v', '.3gp'})
+
+# Embedded EXIF thumbnails are only used when their aspect ratio is this close to the photo's
+THUMBNAIL_ASPECT_TOLERANCE = 0.02
+
+# Persistent thumbnail store, kept in the cache directory
+THUMBNAIL_STORE_NAME = "thumbnails.sqlite3"
+
+# Quality of stored JPEG thumbnails; thumbnails with transparency are stored as PNG
+THUMBNAIL_JPEG_QUALITY = 85
+
+# Memory budget of the in-memory thumbnail cache; least recently used pixmaps go first
+THUMBNAIL_MEMORY_BYTES = 256 * 1024 * 1024
+
+# Thumbnail queue bands, lowest first: rows in the viewport, rows around it, then prefetched folders
+THUMBNAIL_BAND_VISIBLE = 0
+THUMBNAIL_BAND_NEARBY = 1
+THUMBNAIL_BAND_PREFETCH = 2
+
+# Viewport heights above and below the visible rows whose thumbnails are prefetched
+THUMBNAIL_PREFETCH_SCREENS = 1
+
+# Pause after scrolling or resizing before thumbnails are rescheduled
+THUMBNAIL_SCHEDULE_DELAY_MS = 30
+
+# Longest time finished thumbnails are held back so they reach the views together (one frame)
+THUMBNAIL_FLUSH_MS = 16
+
+# Thumbnail queue priorities within a band, lowest first; stored thumbnails only need a small decode
+THUMBNAIL_PRIORITY_STORED = -1
+THUMBNAIL_PRIORITY_IMAGE = 0
+THUMBNAIL_PRIORITY_VIDEO = 1
+
+# Pause without navigation, scans or hovering before likely next folders are prefetched
+PREFETCH_IDLE_MS = 400
+
+# Most visited folders prefetched after the hovered subfolders and the parents
+PREFETCH_FREQUENT_FOLDERS = 3
+
+# Thumbnails prefetched per folder, first in name order; they only fill the thumbnail store
+PREFETCH_THUMBNAILS = 48
+
 class VideoPreviewWidget(QWidget):
     """Widget for video preview with play controls"""
     
@@ -328,83 +474,1452 @@ class DocumentPreviewWidget(QWidget):
         except Exception as e:
             logger.error(f"Could not open document {self.file_path}: {e}")
 
-class ThumbnailLoader(QThread):
-    """Thread for loading thumbnails asynchronously"""
+class FileIconCache:
+    """Icons shared by every view, resolved once per file type
+    
+    A folder of 100,000 JPEGs hands out one QIcon instead of building one per
+    row. An icon theme entry for the type's MIME type wins (Linux desktops);
+    otherwise the platform's icon for the first file seen of that type is
+    kept (macOS and Windows), falling back to the generic file icon.
+    """
+    
+    def __init__(self):
+        self._provider = QFileIconProvider()
+        self._folder_icon = self._provider.icon(QFileIconProvider.Folder)
+        self._file_icon = self._provider.icon(QFileIconProvider.File)
+        self._icons = {}  # type name -> QIcon
+    
+    def icon(self, path, is_dir, type_name=None):
+        """Get the shared icon for a path; pass its type name when already known"""
+        if is_dir:
+            return self._folder_icon
+        if type_name is None:
+            type_name = file_type_name(os.path.basename(path))
+        icon = self._icons.get(type_name)
+        if icon is None:
+            icon = self._resolve(path)
+            self._icons[type_name] = icon
+        return icon
+    
+    def _resolve(self, path):
+        for name in icon_theme_names(os.path.basename(path)):
+            if QIcon.hasThemeIcon(name):
+                return QIcon.fromTheme(name)
+        icon = self._provider.icon(QFileInfo(path))
+        return self._file_icon if icon.isNull() else icon
+    
+    def __len__(self):
+        return len(self._icons)
+
+
+_file_icons = None
+
+
+def file_icons():
+    """Get the process-wide icon cache; built on first use, after the QApplication exists"""
+    global _file_icons
+    if _file_icons is None:
+        _file_icons = FileIconCache()
+    return _file_icons
+
+def render_thumbnail(file_path, size=128, min_size=None):
+    """Decode a thumbnail fitting size × size for an image or video file, or None if it has none
+    
+    Runs on thumbnail pool threads, so it only builds QImages; pixmaps are
+    made on the GUI thread. With ``min_size`` an image may come back
+    smaller than ``size`` but no smaller than that.
+    """
+    file_ext = Path(file_path).suffix.lower()
+    
+    # Video files
+    if file_ext in THUMBNAIL_VIDEO_EXTENSIONS:
+        frame = extract_video_frame(file_path, size)
+        if frame is None:
+            return None
+        height, width = frame.shape[:2]
+        # Copy the pixels out of the frame array, which QImage does not own
+        return QImage(frame.data, width, height, 3 * width, QImage.Format_RGB888).copy()
+    
+    # Image files
+    if file_ext in THUMBNAIL_IMAGE_EXTENSIONS:
+        return render_image_thumbnail(file_path, size, min_size)
+    return None
+
+def orient_image(image, orientation):
+    """Apply an EXIF orientation (1-8) to an image"""
+    rotation, mirrored = ORIENTATIONS.get(orientation, (0, False))
+    if mirrored:
+        image = image.mirrored(True, False)
+    if rotation:
+        image = image.transformed(QTransform().rotate(rotation))
+    return image
+
+def render_image_thumbnail(file_path, size, min_size=None):
+    """Decode an image at thumbnail resolution, never at full size if avoidable
+    
+    A JPEG's embedded EXIF thumbnail is used when it is at least ``min_size``
+    (by default ``size``) and has the photo's aspect ratio (some cameras
+    letterbox it), so the photo itself is never decoded. It is only ever
+    scaled down, so a smaller one comes back at its own size rather than
+    blurred up to ``size``. Otherwise the reader is given the scaled size up
+    front, which lets JPEGs decode at 1/2, 1/4 or 1/8 resolution instead of
+    decoding every pixel and scaling afterwards.
+    """
+    reader = QImageReader(file_path)
+    reader.setAutoTransform(True)
+    original = reader.size()
+    
+    if Path(file_path).suffix.lower() in ('.jpg', '.jpeg') and original.isValid():
+        data, orientation = read_exif_thumbnail(file_path)
+        if data is not None:
+            embedded = QImage.fromData(data, "JPG")
+            if not embedded.isNull() and max(embedded.width(), embedded.height()) >= (min_size or size):
+                embedded_aspect = embedded.width() / embedded.height()
+                original_aspect = original.width() / original.height()
+                if abs(embedded_aspect - original_aspect) <= THUMBNAIL_ASPECT_TOLERANCE * original_aspect:
+                    embedded = orient_image(embedded, orientation)
+                    if embedded.width() > size or embedded.height() > size:
+                        embedded = embedded.scaled(size, size, Qt.KeepAspectRatio, Qt.SmoothTransformation)
+                    return embedded
+    
+    if original.isValid():
+        reader.setScaledSize(QSize(*fit_size(original.width(), original.height(), size)))
+    image = reader.read()
+    if image.isNull():
+        return None
+    if image.width() > size or image.height() > size:
+        image = image.scaled(size, size, Qt.KeepAspectRatio, Qt.SmoothTransformation)
+    return image
+
+def visible_row_range(view):
+    """Get the (first, last) rows a list view's viewport shows, or None if it shows none
+    
+    The viewport is probed at half-grid steps, which finds every item in
+    icon modes and list mode alike without walking the model.
+    """
+    rect = view.viewport().rect()
+    grid = view.gridSize()
+    step_x = max(8, grid.width() // 2) if grid.isValid() else 16
+    step_y = max(8, grid.height() // 2) if grid.isValid() else 8
+    first = last = None
+    for y in range(rect.top(), rect.bottom() + 1, step_y):
+        for x in range(rect.left(), rect.right() + 1, step_x):
+            index = view.indexAt(QPoint(x, y))
+            if index.isValid():
+                row = index.row()
+                first = row if first is None else min(first, row)
+                last = row if last is None else max(last, row)
+    return None if first is None else (first, last)
+
+def pixmap_bytes(pixmap):
+    """Get the memory a pixmap's pixels take: width × height × depth"""
+    return pixmap.width() * pixmap.height() * pixmap.depth() // 8
+
+def encode_thumbnail(image):
+    """Encode a thumbnail for the thumbnail store: JPEG, or PNG to keep transparency"""
+    data = QByteArray()
+    buffer = QBuffer(data)
+    buffer.open(QIODevice.WriteOnly)
+    if image.hasAlphaChannel():
+        image.save(buffer, "PNG")
+    else:
+        image.save(buffer, "JPG", THUMBNAIL_JPEG_QUALITY)
+    buffer.close()
+    return bytes(data)
+
+def load_thumbnail_images(file_path, level, store=None):
+    """Get a file's thumbnail at a pyramid level as {level: QImage}, or None if it has none
+    
+    The level comes from the thumbnail store when it holds it for this
+    version of the file (size and mtime), so a hit never reads the file
+    itself. On a miss the file is decoded once at the top level and every
+    level that decode can fill is stored, so later size changes are store
+    hits; only the requested level is returned, to keep just the shown
+    level in memory. Files without a thumbnail are recorded at every level,
+    so they are not decoded again at this or any other size.
+    """
+    try:
+        st = os.stat(file_path)
+    except OSError:
+        return None
+    if store is not None:
+        data = store.get(file_path, level, st.st_size, st.st_mtime_ns)
+        if data == NO_THUMBNAIL:
+            return None
+        if data is not None:
+            image = QImage.fromData(data)
+            if not image.isNull():
+                return {level: image}
+    image = render_thumbnail(file_path, THUMBNAIL_LEVELS[-1], level)
+    if image is None:
+        if store is not None:
+            for failed_level in THUMBNAIL_LEVELS:
+                store.put(file_path, failed_level, st.st_size, st.st_mtime_ns, NO_THUMBNAIL)
+        return None
+    images = {}
+    plan = pyramid_plan(max(image.width(), image.height()), level)
+    # Scale each level from the next larger one, largest first
+    source = image
+    for plan_level in sorted(plan, reverse=True):
+        edge = plan[plan_level]
+        if edge is not None:
+            source = source.scaled(edge, edge, Qt.KeepAspectRatio, Qt.SmoothTransformation)
+            images[plan_level] = source
+        else:
+            images[plan_level] = image
+        if store is not None:
+            store.put(file_path, plan_level, st.st_size, st.st_mtime_ns, encode_thumbnail(images[plan_level]))
+    return {level: images[level]}
+
+def store_thumbnail(file_path, level, store):
+    """Decode a thumbnail into the thumbnail store only, for a folder not shown yet"""
+    load_thumbnail_images(file_path, level, store)
+
+class ThumbnailService(QObject):
+    """Loads thumbnails on the shared thumbnail pool and reports them on the GUI thread
+    
+    The pool's threads live as long as the service. Requests are grouped
+    by folder so a pane leaving a folder can drop what it still had queued.
+    Thumbnails found in the store jump the queue in their own lane; the rest
+    run in the lane of the storage holding the file.
+    """
+    
+    thumbnail_ready = pyqtSignal(str, object)  # file_path, {level: QImage}
     
-    thumbnail_loaded = pyqtSignal(str, QPixmap)  # file_path, thumbnail
+    # Pool group of the thumbnails of prefetched folders
+    PREFETCH_GROUP = "prefetch"
     
-    def __init__(self, file_path, size=128):
+    def __init__(self, store=None, parent=None):
+        super().__init__(parent)
+        self.store = store
+        self.storage = StorageClassifier()
+        self.pool = ThumbnailPool(self._on_job_done)
+    
+    def request(self, file_path, level, band=THUMBNAIL_BAND_VISIBLE):
+        """Queue or re-prioritize a thumbnail at a pyramid level
+        
+        Visible rows come before nearby ones; within a band stored thumbnails
+        come first and videos wait behind images, which are much cheaper.
+        """
+        directory = os.path.dirname(file_path)
+        if self.store is not None and self.store.contains(file_path, level):
+            kind = THUMBNAIL_PRIORITY_STORED
+            lane = LANE_STORED
+        else:
+            if Path(file_path).suffix.lower() in THUMBNAIL_VIDEO_EXTENSIONS:
+                kind = THUMBNAIL_PRIORITY_VIDEO
+            else:
+                kind = THUMBNAIL_PRIORITY_IMAGE
+            lane = self.storage.kind(directory)
+        self.pool.submit((file_path, level), load_thumbnail_images, (file_path, level, self.store),
+                         (band, kind), directory, lane)
+    
+    def cancel(self, file_path, level):
+        """Drop a queued thumbnail"""
+        return self.pool.cancel((file_path, level))
+    
+    def cancel_folder(self, directory):
+        """Drop the queued thumbnails of a folder"""
+        return self.pool.cancel_group(directory)
+    
+    def prefetch(self, directory, file_paths, level):
+        """Queue thumbnails of a folder no pane shows yet, behind every shown row
+        
+        Safe to call from any thread. They only go to the store, not to
+        memory; thumbnails already stored and folders on network storage
+        are skipped. Returns how many were queued.
+        """
+        if self.store is None:
+            return 0
+        lane = self.storage.kind(directory)
+        if lane == STORAGE_NETWORK:
+            return 0
+        queued = 0
+        for file_path in file_paths:
+            if self.store.contains(file_path, level):
+                continue
+            if Path(file_path).suffix.lower() in THUMBNAIL_VIDEO_EXTENSIONS:
+                kind = THUMBNAIL_PRIORITY_VIDEO
+            else:
+                kind = THUMBNAIL_PRIORITY_IMAGE
+            if self.pool.submit((self.PREFETCH_GROUP, file_path, level), store_thumbnail,
+                                (file_path, level, self.store), (THUMBNAIL_BAND_PREFETCH, kind),
+                                self.PREFETCH_GROUP, lane):
+                queued += 1
+        return queued
+    
+    def cancel_prefetch(self):
+        """Drop the queued thumbnails of prefetched folders"""
+        return self.pool.cancel_group(self.PREFETCH_GROUP)
+    
+    def shutdown(self):
+        """Drop queued thumbnails and wait for the running ones"""
+        self.pool.shutdown(timeout=5)
+    
+    def _on_job_done(self, key, images, error):
+        # Called on a pool thread; the signal is queued to the GUI thread
+        file_path = key[-2]  # (path, level), or (PREFETCH_GROUP, path, level)
+        if error is not None:
+            logger.error(f"Error loading thumbnail for {file_path}: {error}")
+        elif images:
+            self.thumbnail_ready.emit(file_path, images)
+
+class DirectoryScanWorker(QThread):
+    """Thread that enumerates a directory and streams entries back in batches
+    
+    When started with the signature of a cached listing, the worker first
+    checks it and emits scan_unchanged if the directory still matches. With
+    ``stream`` off the rescan is delivered as one batch, so panes that already
+    show the directory can apply it as a single diff.
+    """
+    
+    entries_loaded = pyqtSignal(list, list)  # folders, files
+    scan_finished = pyqtSignal(object, list, list)  # signature read before the scan, sorted folders, files
+    scan_unchanged = pyqtSignal()
+    scan_failed = pyqtSignal(str)  # error message
+    
+    def __init__(self, path, known_signature=None, stream=True, batch_size=SCAN_BATCH_SIZE):
         super().__init__()
-        self.file_path = file_path
-        self.size = size
+        self.path = path
+        self.known_signature = known_signature
+        self.stream = stream
+        self.batch_size = batch_size
+        self._cancel_event = threading.Event()
+        
+    def cancel(self):
+        """Stop the scan at the next entry"""
+        self._cancel_event.set()
+        
+    def is_cancelled(self):
+        """Check whether the scan has been cancelled"""
+        return self._cancel_event.is_set()
         
     def run(self):
-        """Load thumbnail in background thread"""
+        """Enumerate the directory in background thread"""
         try:
-            import cv2
-            import numpy as np
-            file_ext = Path(self.file_path).suffix.lower()
-            
-            # Video files
-            video_exts = ['.mp4', '.avi', '.mov', '.mkv', '.wmv', '.flv', '.webm', '.m4v', '.3gp']
-            if file_ext in video_exts:
-                cap = cv2.VideoCapture(self.file_path)
-                found = False
-                max_frames = 30  # Scan up to 30 frames
-                for i in range(max_frames):
-                    ret, frame = cap.read()
-                    if not ret:
-                        break
-                    # Check if frame is not blank (not all black or all white)
-                    if np.mean(frame) > 10 and np.std(frame) > 5:
-                        # Convert BGR to RGB
-                        rgb_frame = cv2.cvtColor(frame, cv2.COLOR_BGR2RGB)
-                        h, w, ch = rgb_frame.shape
-                        bytes_per_line = ch * w
-                        qimg = QImage(rgb_frame.data, w, h, bytes_per_line, QImage.Format_RGB888)
-                        pixmap = QPixmap.fromImage(qimg)
-                        scaled_pixmap = pixmap.scaled(
-                            self.size, self.size, 
-                            Qt.KeepAspectRatio, 
-                            Qt.SmoothTransformation
-                        )
-                        self.thumbnail_loaded.emit(self.file_path, scaled_pixmap)
-                        found = True
-                        break
-                cap.release()
-                if found:
-                    return
-                # If no good frame found, fall back to default icon
+            # Read the signature first so changes made during the scan invalidate it
+            signature = directory_signature(self.path)
+            if self.known_signature is not None and signature == self.known_signature:
+                self.scan_unchanged.emit()
+                return
             
-            # Image files
-            if file_ext in ['.jpg', '.jpeg', '.png', '.gif', '.bmp', '.tiff', '.webp']:
-                pixmap = QPixmap(self.file_path)
-                if not pixmap.isNull():
-                    # Scale to thumbnail size
-                    scaled_pixmap = pixmap.scaled(
-                        self.size, self.size, 
-                        Qt.KeepAspectRatio, 
-                        Qt.SmoothTransformation
-                    )
-                    self.thumbnail_loaded.emit(self.file_path, scaled_pixmap)
-                    return
-                    
-            # For other files, use default icon
-            default_icon = QPixmap(self.size, self.size)
-            default_icon.fill(Qt.lightGray)
-            painter = QPainter(default_icon)
-            painter.setPen(QPen(Qt.black, 2))
-            painter.drawRect(10, 10, self.size - 20, self.size - 20)
-            painter.drawText(default_icon.rect(), Qt.AlignCenter, "📄")
-            painter.end()
-            self.thumbnail_loaded.emit(self.file_path, default_icon)
+            if self.stream:
+                folders = []
+                files = []
+                for batch_folders, batch_files in iter_scan_batches(self.path, self.batch_size, self._cancel_event):
+                    self.entries_loaded.emit(batch_folders, batch_files)
+                    folders.extend(batch_folders)
+                    files.extend(batch_files)
+                # Sort here rather than on the GUI thread once streaming is done
+                sort_entries(folders)
+                sort_entries(files)
+            else:
+                folders, files = scan_directory(self.path)
+                if not self.is_cancelled():
+                    self.entries_loaded.emit(folders, files)
+        except Exception as e:
+            logger.error(f"Error scanning directory {self.path}: {e}")
+            self.scan_failed.emit(str(e))
+            return
             
+        if not self.is_cancelled():
+            self.scan_finished.emit(signature, folders, files)
+
+class DirectoryScanJob:
+    """In-flight scan of one directory, shared by every pane showing it"""
+    
+    def __init__(self, path, worker, revalidating):
+        self.path = path
+        self.worker = worker
+        self.revalidating = revalidating
+        self.folders = []
+        self.files = []
+        self.panes = set()
+        self.cancelled = False
+
+class TreeSearchWorker(QThread):
+    """Thread that walks a directory tree for name matches and streams them back
+    
+    The walk itself runs on search_tree's pool of scandir threads; this
+    thread batches its results so the GUI gets at most one update per
+    TREE_SEARCH_FLUSH_MS, with the first match sent right away.
+    """
+    
+    results_found = pyqtSignal(list)  # FileEntry objects
+    search_finished = pyqtSignal(int, bool)  # match count, stopped at the results cap
+    
+    def __init__(self, root, matcher, max_results=TREE_SEARCH_MAX_RESULTS):
+        super().__init__()
+        self.root = root
+        self.matcher = matcher
+        self.max_results = max_results
+        self._cancel_event = threading.Event()
+        
+    def cancel(self):
+        """Stop the walk as soon as the in-flight directory reads finish"""
+        self._cancel_event.set()
+        
+    def is_cancelled(self):
+        """Check whether the search has been cancelled"""
+        return self._cancel_event.is_set()
+        
+    def run(self):
+        """Walk the tree in background threads"""
+        found = 0
+        batch = []
+        last_flush = 0.0
+        try:
+            for matches in search_tree(self.root, self.matcher, self.max_results, self._cancel_event):
+                batch.extend(matches)
+                found += len(matches)
+                now = time.monotonic()
+                if found == len(batch) or now - last_flush >= TREE_SEARCH_FLUSH_MS / 1000:
+                    self.results_found.emit(batch)
+                    batch = []
+                    last_flush = now
+        except Exception as e:
+            logger.error(f"Error searching {self.root}: {e}")
+        if batch and not self.is_cancelled():
+            self.results_found.emit(batch)
+        self.search_finished.emit(found, found >= self.max_results)
+
+class TreeSearchResultsModel(QAbstractTableModel):
+    """Flat list of recursive search results, relative to the searched folder"""
+    
+    def __init__(self, root, parent=None):
+        super().__init__(parent)
+        self._root = root
+        self._entries = []
+        self._headers = ['Name', 'Folder', 'Size', 'Date Modified']
+        
+    def rowCount(self, parent=QModelIndex()):
+        if parent.isValid():
+            return 0
+        return len(self._entries)
+    
+    def columnCount(self, parent=QModelIndex()):
+        if parent.isValid():
+            return 0
+        return len(self._headers)
+    
+    def headerData(self, section, orientation, role=Qt.DisplayRole):
+        if orientation == Qt.Horizontal and role == Qt.DisplayRole:
+            return self._headers[section]
+        return None
+    
+    def data(self, index, role=Qt.DisplayRole):
+        if not index.isValid():
+            return None
+        entry = self._entries[index.row()]
+        column = index.column()
+        
+        if role == Qt.DisplayRole:
+            if column == 0:
+                return entry.name
+            if column == 1:
+                return os.path.relpath(os.path.dirname(entry.path), self._root)
+            if column == 2:
+                return "--" if entry.is_dir else format_file_size(entry.size)
+            if column == 3:
+                return format_date(entry.mtime)
+        elif role == Qt.DecorationRole and column == 0:
+            return file_icons().icon(entry.path, entry.is_dir)
+        elif role == Qt.UserRole:
+            return entry.path
+        elif role == Qt.ToolTipRole:
+            return entry.path
+        return None
+    
+    def appendEntries(self, entries):
+        """Append a batch of results"""
+        if not entries:
+            return
+        first = len(self._entries)
+        self.beginInsertRows(QModelIndex(), first, first + len(entries) - 1)
+        self._entries.extend(entries)
+        self.endInsertRows()
+    
+    def clear(self):
+        """Remove all results"""
+        self.beginResetModel()
+        self._entries = []
+        self.endResetModel()
+
+class TreeSearchDialog(QDialog):
+    """Dialog running a recursive name search under a folder"""
+    
+    result_activated = pyqtSignal(str)  # path of a double-clicked result
+    
+    def __init__(self, root, query="", match_mode=MATCH_SUBSTRING, parent=None):
+        super().__init__(parent)
+        self.root = root
+        self.worker = None
+        self.setWindowTitle(f"Search in {os.path.basename(root) or root}")
+        self.setAttribute(Qt.WA_DeleteOnClose)
+        self.resize(760, 480)
+        self.setup_ui(query, match_mode)
+        
+    def setup_ui(self, query, match_mode):
+        """Set up the dialog UI"""
+        layout = QVBoxLayout(self)
+        
+        controls = QHBoxLayout()
+        self.query_box = QLineEdit(query)
+        self.query_box.setPlaceholderText("Name to search for in all subfolders...")
+        self.query_box.returnPressed.connect(self.start_search)
+        controls.addWidget(self.query_box)
+        
+        self.mode_combo = QComboBox()
+        self.mode_combo.addItems(MATCH_MODES)
+        self.mode_combo.setCurrentText(match_mode)
+        controls.addWidget(self.mode_combo)
+        
+        self.search_button = QPushButton("Search")
+        self.search_button.clicked.connect(self.start_search)
+        controls.addWidget(self.search_button)
+        
+        self.stop_button = QPushButton("Stop")
+        self.stop_button.setEnabled(False)
+        self.stop_button.clicked.connect(self.stop_search)
+        controls.addWidget(self.stop_button)
+        layout.addLayout(controls)
+        
+        root_label = QLabel(self.root)
+        root_label.setStyleSheet("color: #666;")
+        layout.addWidget(root_label)
+        
+        self.results_model = TreeSearchResultsModel(self.root, self)
+        self.results_view = QTableView()
+        self.results_view.setModel(self.results_model)
+        self.results_view.setSelectionBehavior(QTableView.SelectRows)
+        self.results_view.setAlternatingRowColors(True)
+        self.results_view.verticalHeader().hide()
+        self.results_view.horizontalHeader().setStretchLastSection(True)
+        self.results_view.setColumnWidth(0, 240)
+        self.results_view.setColumnWidth(1, 240)
+        self.results_view.doubleClicked.connect(
+            lambda index: self.result_activated.emit(index.data(Qt.UserRole))
+        )
+        layout.addWidget(self.results_view)
+        
+        self.status_label = QLabel("")
+        self.status_label.setStyleSheet("color: #666;")
+        layout.addWidget(self.status_label)
+        
+    def start_search(self):
+        """Start a new search, cancelling one in progress"""
+        self.stop_search()
+        try:
+            matcher = compile_matcher(self.query_box.text(), self.mode_combo.currentText())
+        except ValueError as e:
+            self.status_label.setText(str(e))
+            return
+        if matcher is None:
+            return
+        
+        self.results_model.clear()
+        self.status_label.setText("Searching...")
+        self.search_button.setEnabled(False)
+        self.stop_button.setEnabled(True)
+        
+        worker = TreeSearchWorker(self.root, matcher)
+        worker.results_found.connect(self.results_model.appendEntries)
+        worker.search_finished.connect(self.on_search_finished)
+        self.worker = worker
+        worker.start()
+        
+    def stop_search(self):
+        """Cancel the running search"""
+        if self.worker is not None:
+            self.worker.cancel()
+        
+    def on_search_finished(self, count, capped):
+        """Report the outcome of a finished or cancelled search"""
+        worker = self.sender()
+        worker.wait()
+        worker.deleteLater()
+        if worker is not self.worker:
+            return
+        self.worker = None
+        self.search_button.setEnabled(True)
+        self.stop_button.setEnabled(False)
+        if capped:
+            self.status_label.setText(f"Showing the first {count:,} matches")
+        elif worker.is_cancelled():
+            self.status_label.setText(f"Stopped after {count:,} matches")
+        else:
+            self.status_label.setText(f"{count:,} matches")
+        
+    def closeEvent(self, event):
+        """Cancel the search before the dialog goes away"""
+        if self.worker is not None:
+            self.worker.cancel()
+            self.worker.wait()
+        super().closeEvent(event)
+
+class ContentSearchWorker(QThread):
+    """Thread that feeds a content search's process pool and streams matching lines back
+    
+    Like TreeSearchWorker, the first match is sent right away and later ones
+    at most every CONTENT_SEARCH_FLUSH_MS.
+    """
+    
+    results_found = pyqtSignal(list)  # ContentMatch tuples
+    search_finished = pyqtSignal(int, bool)  # match count, stopped at the results cap
+    
+    def __init__(self, root, pattern, recursive=True, max_results=CONTENT_SEARCH_MAX_RESULTS):
+        super().__init__()
+        self.root = root
+        self.pattern = pattern
+        self.recursive = recursive
+        self.max_results = max_results
+        self._cancel_event = threading.Event()
+        
+    def cancel(self):
+        """Stop handing out files and drop the queued ones"""
+        self._cancel_event.set()
+        
+    def is_cancelled(self):
+        """Check whether the search has been cancelled"""
+        return self._cancel_event.is_set()
+        
+    def run(self):
+        """Run the search in background thread"""
+        found = 0
+        batch = []
+        last_flush = 0.0
+        try:
+            for matches in search_contents(self.root, self.pattern, self.recursive,
+                                           self.max_results, self._cancel_event):
+                batch.extend(matches)
+                found += len(matches)
+                now = time.monotonic()
+                if found == len(batch) or now - last_flush >= CONTENT_SEARCH_FLUSH_MS / 1000:
+                    self.results_found.emit(batch)
+                    batch = []
+                    last_flush = now
+        except Exception as e:
+            logger.error(f"Error searching contents of {self.root}: {e}")
+        if batch and not self.is_cancelled():
+            self.results_found.emit(batch)
+        self.search_finished.emit(found, found >= self.max_results)
+
+class ContentSearchResultsModel(QAbstractTableModel):
+    """Flat list of matching lines, with files shown relative to the searched folder"""
+    
+    def __init__(self, root, parent=None):
+        super().__init__(parent)
+        self._root = root
+        self._matches = []
+        self._headers = ['File', 'Line', 'Text']
+        
+    def rowCount(self, parent=QModelIndex()):
+        if parent.isValid():
+            return 0
+        return len(self._matches)
+    
+    def columnCount(self, parent=QModelIndex()):
+        if parent.isValid():
+            return 0
+        return len(self._headers)
+    
+    def headerData(self, section, orientation, role=Qt.DisplayRole):
+        if orientation == Qt.Horizontal and role == Qt.DisplayRole:
+            return self._headers[section]
+        return None
+    
+    def data(self, index, role=Qt.DisplayRole):
+        if not index.isValid():
+            return None
+        match = self._matches[index.row()]
+        column = index.column()
+        
+        if role == Qt.DisplayRole:
+            if column == 0:
+                return os.path.relpath(match.path, self._root)
+            if column == 1:
+                return match.line_number
+            if column == 2:
+                return match.line.strip()
+        elif role == Qt.UserRole:
+            return match.path
+        elif role == Qt.ToolTipRole:
+            return f"{match.path}:{match.line_number} (byte {match.offset:,})"
+        return None
+    
+    def appendMatches(self, matches):
+        """Append a batch of matching lines"""
+        if not matches:
+            return
+        first = len(self._matches)
+        self.beginInsertRows(QModelIndex(), first, first + len(matches) - 1)
+        self._matches.extend(matches)
+        self.endInsertRows()
+    
+    def clear(self):
+        """Remove all results"""
+        self.beginResetModel()
+        self._matches = []
+        self.endResetModel()
+
+class ContentSearchDialog(QDialog):
+    """Dialog searching the contents of the text files in a folder"""
+    
+    result_activated = pyqtSignal(str)  # path of the file of a double-clicked match
+    
+    def __init__(self, root, query="", parent=None):
+        super().__init__(parent)
+        self.root = root
+        self.worker = None
+        self.setWindowTitle(f"Search contents of {os.path.basename(root) or root}")
+        self.setAttribute(Qt.WA_DeleteOnClose)
+        self.resize(900, 520)
+        self.setup_ui(query)
+        
+    def setup_ui(self, query):
+        """Set up the dialog UI"""
+        layout = QVBoxLayout(self)
+        
+        controls = QHBoxLayout()
+        self.query_box = QLineEdit(query)
+        self.query_box.setPlaceholderText("Text to search for inside files...")
+        self.query_box.returnPressed.connect(self.start_search)
+        controls.addWidget(self.query_box)
+        
+        self.mode_combo = QComboBox()
+        self.mode_combo.addItems(CONTENT_MODES)
+        controls.addWidget(self.mode_combo)
+        
+        self.subfolders_check = QCheckBox("Subfolders")
+        self.subfolders_check.setChecked(True)
+        controls.addWidget(self.subfolders_check)
+        
+        self.search_button = QPushButton("Search")
+        self.search_button.clicked.connect(self.start_search)
+        controls.addWidget(self.search_button)
+        
+        self.stop_button = QPushButton("Stop")
+        self.stop_button.setEnabled(False)
+        self.stop_button.clicked.connect(self.stop_search)
+        controls.addWidget(self.stop_button)
+        layout.addLayout(controls)
+        
+        root_label = QLabel(self.root)
+        root_label.setStyleSheet("color: #666;")
+        layout.addWidget(root_label)
+        
+        self.results_model = ContentSearchResultsModel(self.root, self)
+        self.results_view = QTableView()
+        self.results_view.setModel(self.results_model)
+        self.results_view.setSelectionBehavior(QTableView.SelectRows)
+        self.results_view.setAlternatingRowColors(True)
+        self.results_view.verticalHeader().hide()
+        self.results_view.horizontalHeader().setStretchLastSection(True)
+        self.results_view.setColumnWidth(0, 260)
+        self.results_view.setColumnWidth(1, 60)
+        self.results_view.setFont(QFont("Monaco", 11))
+        self.results_view.doubleClicked.connect(
+            lambda index: self.result_activated.emit(index.data(Qt.UserRole))
+        )
+        layout.addWidget(self.results_view)
+        
+        self.status_label = QLabel("")
+        self.status_label.setStyleSheet("color: #666;")
+        layout.addWidget(self.status_label)
+        
+    def start_search(self):
+        """Start a new search, cancelling one in progress"""
+        self.stop_search()
+        try:
+            pattern = compile_content_pattern(self.query_box.text(), self.mode_combo.currentText())
+        except ValueError as e:
+            self.status_label.setText(str(e))
+            return
+        if pattern is None:
+            return
+        
+        self.results_model.clear()
+        self.status_label.setText("Searching...")
+        self.search_button.setEnabled(False)
+        self.stop_button.setEnabled(True)
+        
+        worker = ContentSearchWorker(self.root, pattern, self.subfolders_check.isChecked())
+        worker.results_found.connect(self.results_model.appendMatches)
+        worker.search_finished.connect(self.on_search_finished)
+        self.worker = worker
+        worker.start()
+        
+    def stop_search(self):
+        """Cancel the running search"""
+        if self.worker is not None:
+            self.worker.cancel()
+        
+    def on_search_finished(self, count, capped):
+        """Report the outcome of a finished or cancelled search"""
+        worker = self.sender()
+        worker.wait()
+        worker.deleteLater()
+        if worker is not self.worker:
+            return
+        self.worker = None
+        self.search_button.setEnabled(True)
+        self.stop_button.setEnabled(False)
+        if capped:
+            self.status_label.setText(f"Showing the first {count:,} matching lines")
+        elif worker.is_cancelled():
+            self.status_label.setText(f"Stopped after {count:,} matching lines")
+        else:
+            self.status_label.setText(f"{count:,} matching lines")
+        
+    def closeEvent(self, event):
+        """Cancel the search before the dialog goes away"""
+        if self.worker is not None:
+            self.worker.cancel()
+            self.worker.wait()
+        super().closeEvent(event)
+
+class FolderSizeWorker(QThread):
+    """Thread that measures folders on a pool of walker threads and streams their sizes back"""
+    
+    sizes_computed = pyqtSignal(dict)  # folder path -> total bytes
+    
+    def __init__(self, paths, cache=None):
+        super().__init__()
+        self.paths = paths
+        self.cache = cache
+        self._cancel_event = threading.Event()
+        
+    def cancel(self):
+        """Stop measuring at the next directory"""
+        self._cancel_event.set()
+        
+    def is_cancelled(self):
+        """Check whether the worker has been cancelled"""
+        return self._cancel_event.is_set()
+        
+    def run(self):
+        """Measure the folders in background threads"""
+        batch = {}
+        last_flush = time.monotonic()
+        try:
+            for path, size in folder_sizes(self.paths, self.cache, self._cancel_event):
+                batch[path] = size
+                now = time.monotonic()
+                if now - last_flush >= FOLDER_SIZE_FLUSH_MS / 1000:
+                    self.sizes_computed.emit(batch)
+                    batch = {}
+                    last_flush = now
+        except Exception as e:
+            logger.error(f"Error measuring folder sizes: {e}")
+        if batch and not self.is_cancelled():
+            self.sizes_computed.emit(batch)
+
+class DuplicateFinderWorker(QThread):
+    """Thread that runs the staged duplicate search and reports its progress"""
+    
+    progress_changed = pyqtSignal(str, int, int)  # stage, files done, files in stage (0 if unknown)
+    search_finished = pyqtSignal(object)  # DuplicateGroup list, or None if cancelled or failed
+    
+    def __init__(self, roots, cache_path):
+        super().__init__()
+        self.roots = roots
+        self.cache_path = cache_path
+        self._cancel_event = threading.Event()
+        
+    def cancel(self):
+        """Stop the search and drop the queued hashing"""
+        self._cancel_event.set()
+        
+    def is_cancelled(self):
+        """Check whether the search has been cancelled"""
+        return self._cancel_event.is_set()
+        
+    def run(self):
+        """Find duplicates in background thread"""
+        groups = None
+        cache = None
+        try:
+            try:
+                cache = HashCache(self.cache_path)
+            except sqlite3.Error as e:
+                logger.error(f"Error opening hash cache, hashing without it: {e}")
+            groups = find_duplicates(self.roots, cache, cancel_event=self._cancel_event,
+                                     progress=self.progress_changed.emit)
+        except Exception as e:
+            logger.error(f"Error finding duplicates in {', '.join(self.roots)}: {e}")
+        finally:
+            if cache is not None:
+                cache.close()
+        self.search_finished.emit(groups)
+
+class DuplicatesDialog(QDialog):
+    """Dialog listing groups of identical files under one or more folders"""
+    
+    result_activated = pyqtSignal(str)  # path of a double-clicked file
+    
+    def __init__(self, roots, cache_path, parent=None):
+        super().__init__(parent)
+        self.roots = roots
+        self.cache_path = cache_path
+        self.worker = None
+        self.setWindowTitle("Find Duplicates")
+        self.setAttribute(Qt.WA_DeleteOnClose)
+        self.resize(820, 520)
+        self.setup_ui()
+        
+    def setup_ui(self):
+        """Set up the dialog UI"""
+        layout = QVBoxLayout(self)
+        
+        controls = QHBoxLayout()
+        roots_label = QLabel("\n".join(self.roots))
+        roots_label.setStyleSheet("color: #666;")
+        controls.addWidget(roots_label)
+        controls.addStretch()
+        
+        self.search_button = QPushButton("Search")
+        self.search_button.clicked.connect(self.start_search)
+        controls.addWidget(self.search_button)
+        
+        self.stop_button = QPushButton("Stop")
+        self.stop_button.setEnabled(False)
+        self.stop_button.clicked.connect(self.stop_search)
+        controls.addWidget(self.stop_button)
+        layout.addLayout(controls)
+        
+        self.results_tree = QTreeWidget()
+        self.results_tree.setHeaderLabels(['File', 'Size'])
+        self.results_tree.setColumnWidth(0, 620)
+        self.results_tree.itemDoubleClicked.connect(self.on_item_double_clicked)
+        layout.addWidget(self.results_tree)
+        
+        self.status_label = QLabel("")
+        self.status_label.setStyleSheet("color: #666;")
+        layout.addWidget(self.status_label)
+        
+    def start_search(self):
+        """Start a new search, cancelling one in progress"""
+        self.stop_search()
+        self.results_tree.clear()
+        self.status_label.setText("Scanning...")
+        self.search_button.setEnabled(False)
+        self.stop_button.setEnabled(True)
+        
+        worker = DuplicateFinderWorker(self.roots, self.cache_path)
+        worker.progress_changed.connect(self.on_progress_changed)
+        worker.search_finished.connect(self.on_search_finished)
+        self.worker = worker
+        worker.start()
+        
+    def stop_search(self):
+        """Cancel the running search"""
+        if self.worker is not None:
+            self.worker.cancel()
+        
+    def on_progress_changed(self, stage, done, total):
+        """Show which stage the search is in"""
+        if self.sender() is not self.worker:
+            return
+        if total:
+            self.status_label.setText(f"{stage}: {done:,} of {total:,} files")
+        else:
+            self.status_label.setText(f"{stage}: {done:,} files")
+        
+    def on_search_finished(self, groups):
+        """Show the duplicate groups of a finished search"""
+        worker = self.sender()
+        worker.wait()
+        worker.deleteLater()
+        if worker is not self.worker:
+            return
+        self.worker = None
+        self.search_button.setEnabled(True)
+        self.stop_button.setEnabled(False)
+        if groups is None:
+            self.status_label.setText("Stopped" if worker.is_cancelled() else "Search failed")
+            return
+        
+        icons = file_icons()
+        wasted = 0
+        for group in groups:
+            extra = group.size * (len(group.paths) - 1)
+            wasted += extra
+            group_item = QTreeWidgetItem([
+                f"{len(group.paths)} copies of {os.path.basename(group.paths[0])}",
+                f"{format_file_size(extra)} reclaimable"
+            ])
+            for path in group.paths:
+                child = QTreeWidgetItem([path, format_file_size(group.size)])
+                child.setIcon(0, icons.icon(path, False))
+                child.setData(0, Qt.UserRole, path)
+                group_item.addChild(child)
+            self.results_tree.addTopLevelItem(group_item)
+        self.status_label.setText(f"{len(groups):,} groups of duplicates, {format_file_size(wasted)} reclaimable")
+        
+    def on_item_double_clicked(self, item, column):
+        """Reveal a double-clicked file"""
+        path = item.data(0, Qt.UserRole)
+        if path:
+            self.result_activated.emit(path)
+        
+    def closeEvent(self, event):
+        """Cancel the search before the dialog goes away"""
+        if self.worker is not None:
+            self.worker.cancel()
+            self.worker.wait()
+        super().closeEvent(event)
+
+class CompareWorker(QThread):
+    """Thread that compares two directory trees and streams their differences back"""
+    
+    differences_found = pyqtSignal(list)  # Difference tuples
+    compare_finished = pyqtSignal(int)  # number of differences
+    
+    def __init__(self, left_root, right_root, verify=False):
+        super().__init__()
+        self.left_root = left_root
+        self.right_root = right_root
+        self.verify = verify
+        self._cancel_event = threading.Event()
+        
+    def cancel(self):
+        """Stop comparing as soon as the in-flight directories finish"""
+        self._cancel_event.set()
+        
+    def is_cancelled(self):
+        """Check whether the comparison has been cancelled"""
+        return self._cancel_event.is_set()
+        
+    def run(self):
+        """Compare the trees in background threads"""
+        found = 0
+        batch = []
+        last_flush = 0.0
+        try:
+            for differences in compare_trees(self.left_root, self.right_root, self.verify, self._cancel_event):
+                batch.extend(differences)
+                found += len(differences)
+                now = time.monotonic()
+                if found == len(batch) or now - last_flush >= COMPARE_FLUSH_MS / 1000:
+                    self.differences_found.emit(batch)
+                    batch = []
+                    last_flush = now
         except Exception as e:
-            logger.error(f"Error loading thumbnail for {self.file_path}: {e}")
-            # Return default icon on error
-            default_icon = QPixmap(self.size, self.size)
-            default_icon.fill(Qt.lightGray)
-            self.thumbnail_loaded.emit(self.file_path, default_icon)
+            logger.error(f"Error comparing {self.left_root} with {self.right_root}: {e}")
+        if batch and not self.is_cancelled():
+            self.differences_found.emit(batch)
+        self.compare_finished.emit(found)
+
+class SyncWorker(QThread):
+    """Thread that carries out a sync plan, copying one entry at a time"""
+    
+    action_done = pyqtSignal(int, str)  # actions done so far, error message or ""
+    sync_finished = pyqtSignal(int, int)  # actions done, errors
+    
+    def __init__(self, actions):
+        super().__init__()
+        self.actions = actions
+        self._cancel_event = threading.Event()
+        
+    def cancel(self):
+        """Stop after the current copy"""
+        self._cancel_event.set()
+        
+    def run(self):
+        """Copy the planned entries in background thread"""
+        done = 0
+        errors = 0
+        for action, error in execute_plan(self.actions, self._cancel_event):
+            done += 1
+            if error is not None:
+                errors += 1
+                logger.error(f"Error copying {action.source} to {action.target}: {error}")
+            self.action_done.emit(done, error or "")
+        self.sync_finished.emit(done, errors)
+
+class CompareResultsModel(QAbstractTableModel):
+    """Flat list of differences between the two compared folders"""
+    
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self._differences = []
+        self._headers = ['Path', 'Status', 'Left Size', 'Left Date', 'Right Size', 'Right Date']
+        
+    def rowCount(self, parent=QModelIndex()):
+        if parent.isValid():
+            return 0
+        return len(self._differences)
+    
+    def columnCount(self, parent=QModelIndex()):
+        if parent.isValid():
+            return 0
+        return len(self._headers)
+    
+    def headerData(self, section, orientation, role=Qt.DisplayRole):
+        if orientation == Qt.Horizontal and role == Qt.DisplayRole:
+            return self._headers[section]
+        return None
+    
+    def data(self, index, role=Qt.DisplayRole):
+        if not index.isValid():
+            return None
+        difference = self._differences[index.row()]
+        column = index.column()
+        
+        if role == Qt.DisplayRole:
+            if column == 0:
+                return difference.relpath
+            if column == 1:
+                return difference.status
+            side = difference.left if column < 4 else difference.right
+            if side is None:
+                return ""
+            if column in (2, 4):
+                return "--" if side.is_dir else format_file_size(side.size)
+            return format_date(side.mtime)
+        elif role == Qt.BackgroundRole:
+            return QBrush(QColor(COMPARE_COLORS[difference.status]))
+        elif role == Qt.UserRole:
+            return difference.relpath
+        return None
+    
+    def appendDifferences(self, differences):
+        """Append a batch of differences"""
+        if not differences:
+            return
+        first = len(self._differences)
+        self.beginInsertRows(QModelIndex(), first, first + len(differences) - 1)
+        self._differences.extend(differences)
+        self.endInsertRows()
+    
+    def differences(self):
+        """Get every difference shown"""
+        return list(self._differences)
+    
+    def clear(self):
+        """Remove all differences"""
+        self.beginResetModel()
+        self._differences = []
+        self.endResetModel()
+
+class CompareDialog(QDialog):
+    """Dialog comparing the two panes' folders recursively and syncing them"""
+    
+    differences_found = pyqtSignal(list)  # Difference tuples, for marking pane rows
+    result_activated = pyqtSignal(str)  # relative path of a double-clicked difference
+    
+    def __init__(self, left_root, right_root, parent=None):
+        super().__init__(parent)
+        self.left_root = left_root
+        self.right_root = right_root
+        self.worker = None
+        self.sync_worker = None
+        self.setWindowTitle("Compare Panes")
+        self.setAttribute(Qt.WA_DeleteOnClose)
+        self.resize(980, 560)
+        self.setup_ui()
+        
+    def setup_ui(self):
+        """Set up the dialog UI"""
+        layout = QVBoxLayout(self)
+        
+        roots_label = QLabel(f"Left: {self.left_root}\nRight: {self.right_root}")
+        roots_label.setStyleSheet("color: #666;")
+        layout.addWidget(roots_label)
+        
+        controls = QHBoxLayout()
+        self.verify_check = QCheckBox("Verify contents")
+        self.verify_check.setToolTip("Also compare the bytes of files with the same size and date")
+        controls.addWidget(self.verify_check)
+        
+        self.compare_button = QPushButton("Compare")
+        self.compare_button.clicked.connect(self.start_compare)
+        controls.addWidget(self.compare_button)
+        
+        self.stop_button = QPushButton("Stop")
+        self.stop_button.setEnabled(False)
+        self.stop_button.clicked.connect(self.stop)
+        controls.addWidget(self.stop_button)
+        
+        controls.addStretch()
+        controls.addWidget(QLabel("Sync:"))
+        self.direction_combo = QComboBox()
+        self.direction_combo.addItems(SYNC_DIRECTIONS)
+        controls.addWidget(self.direction_combo)
+        
+        self.sync_button = QPushButton("Sync")
+        self.sync_button.setEnabled(False)
+        self.sync_button.clicked.connect(self.start_sync)
+        controls.addWidget(self.sync_button)
+        layout.addLayout(controls)
+        
+        self.results_model = CompareResultsModel(self)
+        self.results_view = QTableView()
+        self.results_view.setModel(self.results_model)
+        self.results_view.setSelectionBehavior(QTableView.SelectRows)
+        self.results_view.verticalHeader().hide()
+        self.results_view.horizontalHeader().setStretchLastSection(True)
+        self.results_view.setColumnWidth(0, 360)
+        self.results_view.doubleClicked.connect(
+            lambda index: self.result_activated.emit(index.data(Qt.UserRole))
+        )
+        layout.addWidget(self.results_view)
+        
+        self.status_label = QLabel("")
+        self.status_label.setStyleSheet("color: #666;")
+        layout.addWidget(self.status_label)
+        
+    def set_busy(self, busy):
+        """Enable the controls that make sense while idle or busy"""
+        self.compare_button.setEnabled(not busy)
+        self.sync_button.setEnabled(not busy and self.results_model.rowCount() > 0)
+        self.stop_button.setEnabled(busy)
+        
+    def start_compare(self):
+        """Start a new comparison, cancelling one in progress"""
+        self.stop()
+        self.results_model.clear()
+        self.status_label.setText("Comparing...")
+        
+        worker = CompareWorker(self.left_root, self.right_root, self.verify_check.isChecked())
+        worker.differences_found.connect(self.results_model.appendDifferences)
+        worker.differences_found.connect(self.differences_found)
+        worker.compare_finished.connect(self.on_compare_finished)
+        self.worker = worker
+        self.set_busy(True)
+        worker.start()
+        
+    def stop(self):
+        """Cancel the running comparison or sync"""
+        if self.worker is not None:
+            self.worker.cancel()
+        if self.sync_worker is not None:
+            self.sync_worker.cancel()
+        
+    def on_compare_finished(self, count):
+        """Report the outcome of a finished or cancelled comparison"""
+        worker = self.sender()
+        worker.wait()
+        worker.deleteLater()
+        if worker is not self.worker:
+            return
+        self.worker = None
+        self.set_busy(False)
+        if worker.is_cancelled():
+            self.status_label.setText(f"Stopped after {count:,} differences")
+        elif count:
+            self.status_label.setText(f"{count:,} differences")
+        else:
+            self.status_label.setText("The folders are identical")
+        
+    def start_sync(self):
+        """Confirm and run the sync plan for the chosen direction"""
+        direction = self.direction_combo.currentText()
+        actions = plan_sync(self.results_model.differences(), self.left_root, self.right_root, direction)
+        if not actions:
+            self.status_label.setText("Nothing to copy in that direction")
+            return
+        total = sum(action.size for action in actions if not action.is_dir)
+        reply = QMessageBox.question(
+            self, "Sync",
+            f"Copy {len(actions):,} entries ({format_file_size(total)} of files, plus folders) {direction}?\n"
+            "Nothing will be deleted. Older files on the target side are overwritten;\n"
+            "files that are newer on the target side are left alone."
+        )
+        if reply != QMessageBox.Yes:
+            return
+        
+        worker = SyncWorker(actions)
+        worker.action_done.connect(
+            lambda done, error, count=len(actions): self.status_label.setText(f"Copied {done:,} of {count:,}")
+        )
+        worker.sync_finished.connect(self.on_sync_finished)
+        self.sync_worker = worker
+        self.set_busy(True)
+        worker.start()
+        
+    def on_sync_finished(self, done, errors):
+        """Report the sync outcome and compare again to show what is left"""
+        worker = self.sender()
+        worker.wait()
+        worker.deleteLater()
+        self.sync_worker = None
+        self.set_busy(False)
+        self.start_compare()
+        message = f"Synced {done:,} entries"
+        if errors:
+            message += f", {errors:,} failed (see log)"
+        self.status_label.setText(message + "; comparing again...")
+        
+    def closeEvent(self, event):
+        """Cancel background work before the dialog goes away"""
+        self.stop()
+        for worker in (self.worker, self.sync_worker):
+            if worker is not None:
+                worker.wait()
+        super().closeEvent(event)
+
+class IndexCrawlWorker(QThread):
+    """Thread that brings the filename index up to date for a list of folders
+    
+    Each job is a (path, recursive) pair. The worker opens its own
+    connection to the index, since SQLite connections stay on one thread.
+    """
+    
+    crawl_finished = pyqtSignal(int)  # number of directories re-listed
+    
+    def __init__(self, db_path, jobs):
+        super().__init__()
+        self.db_path = db_path
+        self.jobs = jobs
+        self._cancel_event = threading.Event()
+    
+    def cancel(self):
+        """Stop crawling at the next directory"""
+        self._cancel_event.set()
+    
+    def is_cancelled(self):
+        """Check whether the crawl has been cancelled"""
+        return self._cancel_event.is_set()
+    
+    def run(self):
+        """Crawl the queued folders in background thread"""
+        listed = 0
+        try:
+            index = FileIndex(self.db_path)
+            try:
+                for path, recursive in self.jobs:
+                    if self.is_cancelled():
+                        break
+                    listed += index.crawl(path, recursive, self._cancel_event)
+            finally:
+                index.close()
+        except sqlite3.Error as e:
+            logger.error(f"Error updating file index: {e}")
+        self.crawl_finished.emit(listed)
+
+class IndexSearchResultsModel(QAbstractTableModel):
+    """Flat list of (path, is_dir) matches from the filename index"""
+    
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self._results = []
+        self._headers = ['Name', 'Folder']
+    
+    def rowCount(self, parent=QModelIndex()):
+        if parent.isValid():
+            return 0
+        return len(self._results)
+    
+    def columnCount(self, parent=QModelIndex()):
+        if parent.isValid():
+            return 0
+        return len(self._headers)
+    
+    def headerData(self, section, orientation, role=Qt.DisplayRole):
+        if orientation == Qt.Horizontal and role == Qt.DisplayRole:
+            return self._headers[section]
+        return None
+    
+    def data(self, index, role=Qt.DisplayRole):
+        if not index.isValid():
+            return None
+        path, is_dir = self._results[index.row()]
+        column = index.column()
+        
+        if role == Qt.DisplayRole:
+            if column == 0:
+                return os.path.basename(path)
+            if column == 1:
+                return os.path.dirname(path)
+        elif role == Qt.DecorationRole and column == 0:
+            return file_icons().icon(path, is_dir)
+        elif role in (Qt.UserRole, Qt.ToolTipRole):
+            return path
+        return None
+    
+    def setResults(self, results):
+        """Replace the shown results"""
+        self.beginResetModel()
+        self._results = results
+        self.endResetModel()
+
+class IndexSearchDialog(QDialog):
+    """Dialog searching the filename index of the bookmarked folders as you type
+    
+    Queries are answered from the index alone, so results can lag changes
+    made outside the shown folders until the next revalidation.
+    """
+    
+    result_activated = pyqtSignal(str)  # path of a double-clicked result
+    
+    def __init__(self, file_index, query="", parent=None):
+        super().__init__(parent)
+        self.file_index = file_index
+        self.setWindowTitle("Search Bookmarked Folders")
+        self.setAttribute(Qt.WA_DeleteOnClose)
+        self.resize(760, 480)
+        self.setup_ui(query)
+    
+    def setup_ui(self, query):
+        """Set up the dialog UI"""
+        layout = QVBoxLayout(self)
+        
+        self.query_box = QLineEdit(query)
+        self.query_box.setPlaceholderText("Name or glob (shot_*.mov) to find in bookmarked folders...")
+        layout.addWidget(self.query_box)
+        
+        self.search_timer = QTimer(self)
+        self.search_timer.setSingleShot(True)
+        self.search_timer.setInterval(SEARCH_DEBOUNCE_MS)
+        self.search_timer.timeout.connect(self.run_search)
+        self.query_box.textChanged.connect(lambda text: self.search_timer.start())
+        self.query_box.returnPressed.connect(self.run_search)
+        
+        self.results_model = IndexSearchResultsModel(self)
+        self.results_view = QTableView()
+        self.results_view.setModel(self.results_model)
+        self.results_view.setSelectionBehavior(QTableView.SelectRows)
+        self.results_view.setAlternatingRowColors(True)
+        self.results_view.verticalHeader().hide()
+        self.results_view.horizontalHeader().setStretchLastSection(True)
+        self.results_view.setColumnWidth(0, 240)
+        self.results_view.doubleClicked.connect(
+            lambda index: self.result_activated.emit(index.data(Qt.UserRole))
+        )
+        layout.addWidget(self.results_view)
+        
+        self.status_label = QLabel("")
+        self.status_label.setStyleSheet("color: #666;")
+        layout.addWidget(self.status_label)
+    
+    def set_query(self, query):
+        """Replace the query and search for it"""
+        self.query_box.setText(query)
+        self.run_search()
+    
+    def run_search(self):
+        """Look the query up in the index"""
+        self.search_timer.stop()
+        query = self.query_box.text().strip()
+        if not query:
+            self.results_model.setResults([])
+            self.status_label.setText("")
+            return
+        
+        started = time.perf_counter()
+        try:
+            results = self.file_index.search(query, INDEX_SEARCH_MAX_RESULTS)
+        except sqlite3.Error as e:
+            logger.error(f"Error searching file index: {e}")
+            self.status_label.setText(str(e))
+            return
+        elapsed_ms = (time.perf_counter() - started) * 1000
+        self.results_model.setResults(results)
+        if len(results) >= INDEX_SEARCH_MAX_RESULTS:
+            self.status_label.setText(f"Showing the first {len(results):,} matches ({elapsed_ms:.0f} ms)")
+        else:
+            self.status_label.setText(f"{len(results):,} matches ({elapsed_ms:.0f} ms)")
 
 class TextPreviewWidget(QWidget):
     """Widget for text file preview with syntax highlighting"""
@@ -654,54 +2169,412 @@ class GIFPreviewWidget(QWidget):
         """Set animation speed (50-200%)"""
         self.movie.setSpeed(speed)
 
+def format_date(mtime):
+    """Format a modification timestamp for display"""
+    return QDateTime.fromMSecsSinceEpoch(int(mtime * 1000)).toString("MMM dd, yyyy hh:mm")
+
 class FileTableModel(QAbstractTableModel):
-    """Custom table model for file/folder data with multiple columns"""
+    """Custom table model for file/folder data with multiple columns
+    
+    Rows are backed by a columnar DirectoryListing holding raw sizes, times
+    and type ids; display strings are only formatted when a view asks for them.
+    The same model serves a pane's QListView (icon/thumbnail modes, column 0)
+    and QTableView (column mode). Rows are exposed to views incrementally via
+    canFetchMore/fetchMore. Thumbnails are not requested by the model: the
+    file manager asks for the rows missing one around a view's viewport.
+    """
     
     def __init__(self, parent=None):
         super().__init__(parent)
-        self._data = []
+        self._listing = DirectoryListing()
+        self._order = array('q')  # row -> entry index
+        self._loaded = 0  # number of rows exposed to views
         self._headers = ['Name', 'Size', 'Type', 'Date Modified']
         self._visible_columns = [0, 1, 2, 3]  # All columns visible by default
+        self._sort_column = COLUMN_NAME
+        self._sort_reverse = False
+        self._thumbnails_enabled = False
+        self._thumbnail_icons = {}  # entry index -> QIcon
+        self._thumbnail_level = THUMBNAIL_LEVELS[-2]  # pyramid level of the thumbnail icons
+        self._entry_rows = None  # entry index -> row, rebuilt after the order changes
+        self._compare_marks = {}  # entry index -> comparison status
         
     def rowCount(self, parent=QModelIndex()):
-        return len(self._data)
+        if parent.isValid():
+            return 0
+        return self._loaded
+    
+    def canFetchMore(self, parent=QModelIndex()):
+        if parent.isValid():
+            return False
+        return self._loaded < len(self._order)
+    
+    def fetchMore(self, parent=QModelIndex()):
+        if parent.isValid():
+            return
+        self._expose_rows(self._loaded + FETCH_BATCH_SIZE)
+    
+    def fetchAll(self):
+        """Expose every row"""
+        self._expose_rows(len(self._order))
+    
+    def fetchMatching(self, accepts, count):
+        """Expose rows until ``count`` more of them satisfy ``accepts(entry)``"""
+        order = self._order
+        row = self._loaded
+        found = 0
+        while row < len(order) and found < count:
+            if accepts(order[row]):
+                found += 1
+            row += 1
+        self._expose_rows(row)
+    
+    def _expose_rows(self, count):
+        """Make the first ``count`` rows visible to views"""
+        count = min(count, len(self._order))
+        if count <= self._loaded:
+            return
+        self.beginInsertRows(QModelIndex(), self._loaded, count - 1)
+        self._loaded = count
+        self.endInsertRows()
     
     def columnCount(self, parent=QModelIndex()):
+        if parent.isValid():
+            return 0
         return len(self._visible_columns)
     
     def data(self, index, role=Qt.DisplayRole):
         if not index.isValid():
             return None
+        
+        row = index.row()
+        if row >= self._loaded:
+            return None
+        entry = self._order[row]
+        listing = self._listing
             
         if role == Qt.DisplayRole:
-            row = index.row()
             col = self._visible_columns[index.column()]
-            if row < len(self._data) and col < len(self._data[row]):
-                return self._data[row][col]
+            if col == COLUMN_NAME:
+                return listing.names[entry]
+            elif col == COLUMN_SIZE:
+                size = listing.sizes[entry]
+                return "<DIR>" if size < 0 else format_file_size(size)
+            elif col == COLUMN_TYPE:
+                return listing.type_name(entry)
+            elif col == COLUMN_DATE:
+                return format_date(listing.mtimes[entry])
         elif role == Qt.DecorationRole and index.column() == 0:
             # Icon for the first column (Name)
-            row = index.row()
-            if row < len(self._data) and len(self._data[row]) > 4:
-                return self._data[row][4]  # Icon is stored at index 4
+            if self._thumbnails_enabled and not listing.is_dir[entry]:
+                icon = self._thumbnail_icons.get(entry)
+                if icon is not None:
+                    return icon
+            return file_icons().icon(listing.path(entry), listing.is_dir[entry], listing.type_name(entry))
         elif role == Qt.UserRole:
             # Return the full file path
-            row = index.row()
-            if row < len(self._data) and len(self._data[row]) > 5:
-                return self._data[row][5]  # File path is stored at index 5
+            return listing.path(entry)
+        elif role == Qt.BackgroundRole:
+            status = self._compare_marks.get(entry)
+            if status is not None:
+                return QBrush(QColor(COMPARE_COLORS[status]))
+        elif role == Qt.ToolTipRole:
+            return self._compare_marks.get(entry)
                 
         return None
     
-    def headerData(self, section, orientation, role=Qt.DisplayRole):
-        if orientation == Qt.Horizontal and role == Qt.DisplayRole:
-            if section < len(self._visible_columns):
-                return self._headers[self._visible_columns[section]]
-        return None
+    def headerData(self, section, orientation, role=Qt.DisplayRole):
+        if orientation == Qt.Horizontal and role == Qt.DisplayRole:
+            if section < len(self._visible_columns):
+                return self._headers[self._visible_columns[section]]
+        return None
+    
+    def setEntries(self, entries):
+        """Replace the model contents with scanned entries, keeping the current sort"""
+        self.beginResetModel()
+        self._listing.clear()
+        self._thumbnail_icons = {}
+        self._compare_marks = {}
+        self._listing.append(entries)
+        self._order = self._listing.argsort(self._sort_column, self._sort_reverse, folders_first=True)
+        self._entry_rows = None
+        self._loaded = min(len(self._order), FETCH_BATCH_SIZE)
+        self.endResetModel()
+    
+    def setListing(self, listing):
+        """Replace the model contents with a copy of a built listing, keeping the current sort
+        
+        Unlike setEntries no per-entry work is done: the columns are copied
+        and the listing's cached sort orders are reused.
+        """
+        self.beginResetModel()
+        self._listing = listing.copy()
+        self._thumbnail_icons = {}
+        self._compare_marks = {}
+        self._order = self._listing.argsort(self._sort_column, self._sort_reverse, folders_first=True)
+        self._entry_rows = None
+        self._loaded = min(len(self._order), FETCH_BATCH_SIZE)
+        self.endResetModel()
+    
+    def appendEntries(self, entries):
+        """Append scanned entries; only the first screenful is exposed right away"""
+        if not entries:
+            return
+        first = self._listing.append(entries)
+        if self._entry_rows is not None:
+            # New entries go to the end, so the index only grows
+            start = len(self._order)
+            self._entry_rows.extend(range(start, start + len(self._listing.names) - first))
+        self._order.extend(range(first, len(self._listing.names)))
+        # Further rows are pulled in by the views through fetchMore
+        self._expose_rows(FETCH_BATCH_SIZE)
+    
+    def updateEntries(self, entries):
+        """Bring the model in line with a fresh scan using row-level changes
+        
+        Removed entries become row removals, changed entries emit dataChanged and
+        new entries are inserted at their position in the current sort order.
+        Changed entries whose sort key moved (any sort but by name, or a file
+        turned folder) are removed and inserted again at their new position,
+        or the model is re-sorted when more than UPDATE_MAX_INSERT_RUNS moved.
+        Returns the paths of the folders that were added or changed.
+        """
+        listing = self._listing
+        added, removed, changed = listing.diff(entries)
+        if not (added or removed or changed):
+            return []
+        self._entry_rows = None
+        
+        if removed:
+            rows = {entry: row for row, entry in enumerate(self._order)}
+            self._remove_rows(sorted((rows[entry] for entry in removed), reverse=True))
+            for entry in removed:
+                listing.remove(entry)
+                self._thumbnail_icons.pop(entry, None)
+        
+        moved = []
+        resort = False
+        if changed:
+            rows = {entry: row for row, entry in enumerate(self._order)}
+            by_value = self._sort_column != COLUMN_NAME
+            for entry, scanned in changed:
+                was_dir = listing.is_dir[entry]
+                listing.update(entry, scanned)
+                # Drop a stale thumbnail so it is requested again
+                self._thumbnail_icons.pop(entry, None)
+                if by_value or was_dir != listing.is_dir[entry]:
+                    moved.append(entry)
+            resort = len(moved) > UPDATE_MAX_INSERT_RUNS
+            if resort or not moved:
+                for entry, _ in changed:
+                    row = rows[entry]
+                    if row < self._loaded:
+                        self.dataChanged.emit(self.index(row, 0), self.index(row, self.columnCount() - 1))
+                moved = []
+            else:
+                self._remove_rows(sorted((rows[entry] for entry in moved), reverse=True))
+        
+        if added or moved:
+            first = listing.append(added)
+            inserted = set(moved)
+            inserted.update(range(first, len(listing.names)))
+            find_position = listing.position_finder(self._sort_column, self._sort_reverse, folders_first=True)
+            order = self._order[:]
+            for entry in moved + list(range(first, len(listing.names))):
+                order.insert(find_position(order, entry), entry)
+            self._insert_rows(order, inserted)
+        if resort:
+            self.resort()
+        
+        return [scanned.path for scanned in added if scanned.is_dir] + [
+            scanned.path for _, scanned in changed if scanned.is_dir]
+    
+    def setFolderSizes(self, sizes):
+        """Fill in computed folder sizes given by name, re-sorting if sorted by size"""
+        listing = self._listing
+        changed = []
+        for name, size in sizes.items():
+            entry = listing.entry_index(name)
+            if entry is not None and listing.set_folder_size(entry, size):
+                changed.append(entry)
+        if not changed:
+            return
+        if self._sort_column == COLUMN_SIZE:
+            self.resort()
+            return
+        if COLUMN_SIZE not in self._visible_columns:
+            return
+        column = self._visible_columns.index(COLUMN_SIZE)
+        rows = {entry: row for row, entry in enumerate(self._order[:self._loaded])}
+        for entry in changed:
+            row = rows.get(entry)
+            if row is not None:
+                index = self.index(row, column)
+                self.dataChanged.emit(index, index, [Qt.DisplayRole])
+    
+    def setComparisonMarks(self, marks):
+        """Mark entries given by name with a comparison status, replacing earlier marks"""
+        listing = self._listing
+        self._compare_marks = {}
+        for name, status in marks.items():
+            entry = listing.entry_index(name)
+            if entry is not None:
+                self._compare_marks[entry] = status
+        if self._loaded:
+            self.dataChanged.emit(self.index(0, 0), self.index(self._loaded - 1, self.columnCount() - 1),
+                                  [Qt.BackgroundRole, Qt.ToolTipRole])
+    
+    def _remove_rows(self, rows):
+        """Remove rows given in descending order, one signal per contiguous run"""
+        i = 0
+        while i < len(rows):
+            last = rows[i]
+            first = last
+            while i + 1 < len(rows) and rows[i + 1] == first - 1:
+                i += 1
+                first = rows[i]
+            i += 1
+            visible_last = min(last, self._loaded - 1)
+            if first <= visible_last:
+                self.beginRemoveRows(QModelIndex(), first, visible_last)
+                del self._order[first:last + 1]
+                self._loaded -= visible_last - first + 1
+                self.endRemoveRows()
+            else:
+                # Rows beyond what views have fetched need no signals
+                del self._order[first:last + 1]
+    
+    def _insert_rows(self, order, inserted):
+        """Switch to an order holding the entries in ``inserted`` as new rows, one signal per run
+        
+        New entries landing next to each other are inserted as one range.
+        When they are scattered over more than UPDATE_MAX_INSERT_RUNS runs
+        the model is reset instead, which is cheaper for the views and proxy.
+        """
+        runs = []
+        for row, entry in enumerate(order):
+            if entry in inserted:
+                if runs and runs[-1][1] == row - 1:
+                    runs[-1][1] = row
+                else:
+                    runs.append([row, row])
+        
+        if len(runs) > UPDATE_MAX_INSERT_RUNS:
+            self.beginResetModel()
+            self._loaded = min(len(order), self._loaded + len(order) - len(self._order))
+            self._order = order
+            self.endResetModel()
+            return
+        
+        # Ascending runs start at their final row once the earlier ones are in
+        for start, stop in runs:
+            entries = order[start:stop + 1]
+            if start < self._loaded or (start == self._loaded and not self.canFetchMore()):
+                self.beginInsertRows(QModelIndex(), start, stop)
+                self._order[start:start] = entries
+                self._loaded += len(entries)
+                self.endInsertRows()
+            else:
+                self._order[start:start] = entries
+    
+    def listing(self):
+        """Get the DirectoryListing backing the model"""
+        return self._listing
+    
+    def entryAt(self, row):
+        """Get the listing entry index shown at a row"""
+        return self._order[row]
+    
+    def exposedEntries(self, first, stop):
+        """Get the listing entry indices of the exposed rows in [first, stop)"""
+        return self._order[first:min(stop, self._loaded)]
+    
+    def filePath(self, index):
+        """Get the full path for an index"""
+        return self.data(index, Qt.UserRole)
+    
+    def setThumbnailsEnabled(self, enabled):
+        """Switch between thumbnails and generic icons for file rows"""
+        if enabled == self._thumbnails_enabled:
+            return
+        self._thumbnails_enabled = enabled
+        if self._loaded:
+            self.dataChanged.emit(self.index(0, 0), self.index(self._loaded - 1, 0), [Qt.DecorationRole])
+    
+    def thumbnailsEnabled(self):
+        """Check whether file rows show thumbnails"""
+        return self._thumbnails_enabled
+    
+    def thumbnailLevel(self):
+        """Get the pyramid level the thumbnail icons are taken from"""
+        return self._thumbnail_level
+    
+    def setThumbnailLevel(self, level):
+        """Switch thumbnail icons to another pyramid level, dropping those of the old one"""
+        if level == self._thumbnail_level:
+            return
+        self._thumbnail_level = level
+        self._thumbnail_icons = {}
+        if self._thumbnails_enabled and self._loaded:
+            self.dataChanged.emit(self.index(0, 0), self.index(self._loaded - 1, 0), [Qt.DecorationRole])
+    
+    def missingThumbnails(self, rows):
+        """Get the paths of the file rows among ``rows`` that have no thumbnail yet"""
+        if not self._thumbnails_enabled:
+            return []
+        listing = self._listing
+        paths = []
+        for row in rows:
+            if 0 <= row < self._loaded:
+                entry = self._order[row]
+                if not listing.is_dir[entry] and entry not in self._thumbnail_icons:
+                    paths.append(listing.path(entry))
+        return paths
     
-    def setData(self, data_list):
-        """Set the data for the model"""
-        self.beginResetModel()
-        self._data = data_list
-        self.endResetModel()
+    def rowOfEntry(self, entry):
+        """Get the row showing a listing entry, or -1
+        
+        The entry -> row index is rebuilt in one pass after the order changes
+        (sorts, removals, inserts) and extended in place as entries stream in,
+        so lookups are O(1). Filtering happens in the proxy and leaves it alone.
+        """
+        if self._entry_rows is None:
+            entry_rows = array('q', [-1]) * len(self._listing.names)
+            for row, order_entry in enumerate(self._order):
+                entry_rows[order_entry] = row
+            self._entry_rows = entry_rows
+        return self._entry_rows[entry] if entry < len(self._entry_rows) else -1
+    
+    def setThumbnails(self, icons):
+        """Set thumbnail icons given as {path: icon}; returns how many entries were found
+        
+        Exposed rows that changed are refreshed with a single dataChanged
+        spanning them.
+        """
+        listing = self._listing
+        if listing.directory is None:
+            return 0
+        found = 0
+        first = last = None
+        for file_path, icon in icons.items():
+            if os.path.dirname(file_path) != listing.directory:
+                continue
+            entry = listing.entry_index(os.path.basename(file_path))
+            if entry is None:
+                continue
+            self._thumbnail_icons[entry] = icon
+            found += 1
+            row = self.rowOfEntry(entry)
+            if 0 <= row < self._loaded:
+                first = row if first is None else min(first, row)
+                last = row if last is None else max(last, row)
+        if first is not None:
+            self.dataChanged.emit(self.index(first, 0), self.index(last, 0), [Qt.DecorationRole])
+        return found
+    
+    def clear(self):
+        """Remove all rows from the model"""
+        self.setEntries([])
     
     def getVisibleColumns(self):
         """Get list of visible column indices"""
@@ -725,47 +2598,373 @@ class FileTableModel(QAbstractTableModel):
     
     def sort(self, column, order):
         """Sort the data by column"""
-        if column >= len(self._visible_columns):
+        if column < 0 or column >= len(self._visible_columns):
             return
             
-        actual_column = self._visible_columns[column]
-        
-        # Sort the data
-        reverse = (order == Qt.DescendingOrder)
-        
-        if actual_column == 0:  # Name column
-            self._data.sort(key=lambda x: x[0].lower(), reverse=reverse)
-        elif actual_column == 1:  # Size column
-            self._data.sort(key=lambda x: self._parse_size(x[1]), reverse=reverse)
-        elif actual_column == 2:  # Type column
-            self._data.sort(key=lambda x: x[2].lower(), reverse=reverse)
-        elif actual_column == 3:  # Date column
-            self._data.sort(key=lambda x: x[3], reverse=reverse)
-        
+        self.sortBy(self._visible_columns[column], order == Qt.DescendingOrder)
+    
+    def sortBy(self, column, reverse=False):
+        """Sort by a data column (COLUMN_NAME, COLUMN_SIZE, ...), visible or not"""
+        self.layoutAboutToBeChanged.emit()
+        old_order = self._order
+        self._sort_column = column
+        self._sort_reverse = reverse
+        # Permutation over precomputed raw keys, cached by the listing
+        self._order = self._listing.argsort(column, reverse, folders_first=True)
+        self._entry_rows = None
+        self._remap_persistent_indexes(old_order)
         self.layoutChanged.emit()
     
-    def _parse_size(self, size_str):
-        """Parse size string to numeric value for sorting"""
-        if size_str == "<DIR>":
-            return -1  # Folders come first
-        
-        try:
-            # Remove unit and convert to bytes
-            size_str = size_str.strip()
-            if size_str.endswith(" B"):
-                return float(size_str[:-2])
-            elif size_str.endswith(" KB"):
-                return float(size_str[:-3]) * 1024
-            elif size_str.endswith(" MB"):
-                return float(size_str[:-3]) * 1024 * 1024
-            elif size_str.endswith(" GB"):
-                return float(size_str[:-3]) * 1024 * 1024 * 1024
-            elif size_str.endswith(" TB"):
-                return float(size_str[:-3]) * 1024 * 1024 * 1024 * 1024
+    def resort(self):
+        """Re-apply the current sort, e.g. after entries were streamed in"""
+        self.sortBy(self._sort_column, self._sort_reverse)
+    
+    def sortColumn(self):
+        """Get the data column the model is sorted by"""
+        return self._sort_column
+    
+    def sortOrder(self):
+        """Get the current sort order as a Qt.SortOrder"""
+        return Qt.DescendingOrder if self._sort_reverse else Qt.AscendingOrder
+    
+    def _remap_persistent_indexes(self, old_order):
+        """Move persistent indexes (selection, current item) to their entries' new rows"""
+        old_indexes = self.persistentIndexList()
+        if not old_indexes:
+            return
+        new_rows = {entry: row for row, entry in enumerate(self._order)}
+        new_indexes = []
+        for index in old_indexes:
+            new_row = new_rows[old_order[index.row()]]
+            if new_row < self._loaded:
+                new_indexes.append(self.index(new_row, index.column()))
             else:
-                return float(size_str)
-        except:
+                new_indexes.append(QModelIndex())
+        self.changePersistentIndexList(old_indexes, new_indexes)
+
+class FileFilterProxyModel(QAbstractProxyModel):
+    """Sort/filter proxy over a FileTableModel, matched in memory against the listing
+    
+    Matches are kept as a set of listing entry indices computed by a compiled
+    search Matcher over the listing's case-folded name column. A query that
+    refines the previous one only re-tests the previous matches, and entries
+    appended after the last query are tested once when first seen. Accepted
+    source rows are held in an ascending array, so mapping costs no per-row
+    Python filter calls; sorting is forwarded to the source model's raw-column
+    argsort. Ranked matchers (fuzzy) instead list every match best-first. With
+    no query the proxy passes rows and signals straight through.
+    """
+    
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self._matcher = None
+        self._matches = set()  # matching entry indices
+        self._tested = 0  # entries below this index have been tested
+        self._rows = None  # accepted source rows, None when not filtering
+        self._ranked = False  # rows are in score order rather than source order
+        self._positions = None  # source row -> proxy row, built lazily when ranked
+        self._pending_removal = None
+        self._saved_persistent = []
+        
+    def setSourceModel(self, model):
+        super().setSourceModel(model)
+        model.rowsAboutToBeInserted.connect(self._on_rows_about_to_be_inserted)
+        model.rowsInserted.connect(self._on_rows_inserted)
+        model.rowsAboutToBeRemoved.connect(self._on_rows_about_to_be_removed)
+        model.rowsRemoved.connect(self._on_rows_removed)
+        model.dataChanged.connect(self._on_data_changed)
+        model.layoutAboutToBeChanged.connect(self._on_layout_about_to_be_changed)
+        model.layoutChanged.connect(self._on_layout_changed)
+        model.modelAboutToBeReset.connect(self._on_model_about_to_be_reset)
+        model.modelReset.connect(self._on_model_reset)
+        model.headerDataChanged.connect(self.headerDataChanged)
+        
+    # Structure
+    
+    def index(self, row, column, parent=QModelIndex()):
+        if parent.isValid() or row < 0 or column < 0:
+            return QModelIndex()
+        if row >= self.rowCount() or column >= self.columnCount():
+            return QModelIndex()
+        return self.createIndex(row, column)
+    
+    def parent(self, index=QModelIndex()):
+        return QModelIndex()
+    
+    def rowCount(self, parent=QModelIndex()):
+        if parent.isValid():
+            return 0
+        if self._rows is None:
+            return self.sourceModel().rowCount()
+        return len(self._rows)
+    
+    def columnCount(self, parent=QModelIndex()):
+        if parent.isValid():
             return 0
+        return self.sourceModel().columnCount()
+    
+    def hasChildren(self, parent=QModelIndex()):
+        return not parent.isValid() and self.rowCount() > 0
+    
+    def mapToSource(self, proxy_index):
+        if not proxy_index.isValid():
+            return QModelIndex()
+        row = proxy_index.row()
+        if self._rows is not None:
+            if row >= len(self._rows):
+                return QModelIndex()
+            row = self._rows[row]
+        return self.sourceModel().index(row, proxy_index.column())
+    
+    def mapFromSource(self, source_index):
+        if not source_index.isValid():
+            return QModelIndex()
+        row = source_index.row()
+        if self._ranked:
+            if self._positions is None:
+                self._positions = {source_row: position for position, source_row in enumerate(self._rows)}
+            row = self._positions.get(row)
+            if row is None:
+                return QModelIndex()
+        elif self._rows is not None:
+            position = bisect.bisect_left(self._rows, row)
+            if position >= len(self._rows) or self._rows[position] != row:
+                return QModelIndex()
+            row = position
+        return self.index(row, source_index.column())
+    
+    def sort(self, column, order=Qt.AscendingOrder):
+        """Sort in the source model on raw values"""
+        self.sourceModel().sort(column, order)
+    
+    def listing(self):
+        """Get the DirectoryListing backing the source model"""
+        return self.sourceModel().listing()
+    
+    # Filtering
+    
+    def matcher(self):
+        """Get the active search Matcher, or None"""
+        return self._matcher
+        
+    def setSearchText(self, text, mode=MATCH_SUBSTRING):
+        """Filter rows to names matching the text in a search mode
+        
+        Raises ValueError for a malformed regular expression, leaving the
+        current filter in place.
+        """
+        matcher = compile_matcher(text, mode)
+        previous = self._matcher
+        if matcher is None and previous is None:
+            return
+        if matcher is not None and previous is not None and (
+                matcher.mode == previous.mode and matcher.query == previous.query):
+            return
+        
+        source = self.sourceModel()
+        folded = source.listing().folded_names
+        if matcher is None:
+            matches = set()
+        elif previous is not None and matcher.refines(previous):
+            # Narrowing: only previous matches can still match
+            self._test_new_entries()
+            matches = set(matcher.search(folded, self._matches))
+        else:
+            matches = set(matcher.search(folded))
+        
+        ranked = matcher is not None and matcher.ranked
+        if ranked:
+            # A ranking spans every match, so expose all source rows up front
+            source.fetchAll()
+        
+        self._begin_layout_change()
+        self._matcher = matcher
+        self._matches = matches
+        self._tested = len(folded)
+        self._rebuild_rows()
+        self._end_layout_change()
+        self._fill()
+    
+    def _test_new_entries(self):
+        """Test entries appended to the listing since the last query"""
+        folded = self.sourceModel().listing().folded_names
+        if self._tested < len(folded):
+            self._matches.update(self._matcher.search(folded, range(self._tested, len(folded))))
+            self._tested = len(folded)
+    
+    def _accepts_entry(self, entry):
+        """Check whether a listing entry matches the active query"""
+        if entry >= self._tested:
+            self._test_new_entries()
+        return entry in self._matches
+    
+    def _accepted_rows(self, first, last):
+        """Get the source rows in [first, last] whose entries match"""
+        self._test_new_entries()
+        matches = self._matches
+        entries = self.sourceModel().exposedEntries(first, last + 1)
+        return [first + offset for offset, entry in enumerate(entries) if entry in matches]
+    
+    def _rebuild_rows(self):
+        """Recompute the accepted source rows from scratch"""
+        self._positions = None
+        if self._matcher is None:
+            self._rows = None
+            self._ranked = False
+            return
+        self._test_new_entries()
+        self._ranked = self._matcher.ranked
+        source = self.sourceModel()
+        count = source.rowCount()
+        if not self._ranked:
+            self._rows = array('q', self._accepted_rows(0, count - 1) if count else [])
+            return
+        # Best match first; matches not exposed by the source yet are skipped
+        folded = source.listing().folded_names
+        ranked = self._matcher.rank(folded, sorted(self._matches))
+        entry_rows = dict(zip(source.exposedEntries(0, count), range(count)))
+        self._rows = array('q', [row for row in map(entry_rows.get, ranked) if row is not None])
+    
+    def canFetchMore(self, parent=QModelIndex()):
+        if parent.isValid():
+            return False
+        return self.sourceModel().canFetchMore(QModelIndex())
+    
+    def fetchMore(self, parent=QModelIndex()):
+        if parent.isValid():
+            return
+        if self._matcher is None:
+            self.sourceModel().fetchMore(QModelIndex())
+        elif self._ranked:
+            self.sourceModel().fetchAll()
+        else:
+            # Expose source rows only up to the next screenful of matches
+            self.sourceModel().fetchMatching(self._accepts_entry, FETCH_BATCH_SIZE)
+    
+    def _fill(self):
+        """Fetch source rows until a screenful of matches is visible"""
+        if self._matcher is None or not self.canFetchMore():
+            return
+        if self._ranked or self.rowCount() < FETCH_BATCH_SIZE:
+            self.fetchMore()
+    
+    # Source change handling
+    
+    def _on_rows_about_to_be_inserted(self, parent, first, last):
+        if self._ranked:
+            self._begin_layout_change()
+        elif self._rows is None:
+            self.beginInsertRows(QModelIndex(), first, last)
+    
+    def _on_rows_inserted(self, parent, first, last):
+        if self._ranked:
+            # New rows can land anywhere in the ranking
+            self._rebuild_rows()
+            self._end_layout_change()
+            QTimer.singleShot(0, self._fill)
+            return
+        if self._rows is None:
+            self.endInsertRows()
+            return
+        count = last - first + 1
+        accepted = self._accepted_rows(first, last)
+        position = bisect.bisect_left(self._rows, first)
+        # Rows after the insertion point moved down in the source; follow them
+        # before announcing the insert, so existing proxy rows keep their data
+        for i in range(position, len(self._rows)):
+            self._rows[i] += count
+        if accepted:
+            self.beginInsertRows(QModelIndex(), position, position + len(accepted) - 1)
+            self._rows[position:position] = array('q', accepted)
+            self.endInsertRows()
+    
+    def _on_rows_about_to_be_removed(self, parent, first, last):
+        if self._ranked:
+            self._begin_layout_change()
+            return
+        if self._rows is None:
+            self.beginRemoveRows(QModelIndex(), first, last)
+            return
+        start = bisect.bisect_left(self._rows, first)
+        stop = bisect.bisect_right(self._rows, last)
+        self._pending_removal = (start, stop, last - first + 1)
+        if start < stop:
+            self.beginRemoveRows(QModelIndex(), start, stop - 1)
+    
+    def _on_rows_removed(self, parent, first, last):
+        if self._ranked:
+            self._rebuild_rows()
+            self._end_layout_change()
+            return
+        if self._rows is None:
+            self.endRemoveRows()
+            return
+        start, stop, count = self._pending_removal
+        self._pending_removal = None
+        del self._rows[start:stop]
+        for i in range(start, len(self._rows)):
+            self._rows[i] -= count
+        if start < stop:
+            self.endRemoveRows()
+    
+    def _on_data_changed(self, top_left, bottom_right, roles=[]):
+        first = top_left.row()
+        last = bottom_right.row()
+        if self._ranked:
+            positions = [position for position, row in enumerate(self._rows) if first <= row <= last]
+            if not positions:
+                return
+            first = min(positions)
+            last = max(positions)
+        elif self._rows is not None:
+            first = bisect.bisect_left(self._rows, first)
+            last = bisect.bisect_right(self._rows, last) - 1
+            if first > last:
+                return
+        self.dataChanged.emit(
+            self.index(first, top_left.column()), self.index(last, bottom_right.column()), roles
+        )
+    
+    def _begin_layout_change(self):
+        """Remember persistent indexes by their source index before rows move"""
+        self.layoutAboutToBeChanged.emit()
+        self._saved_persistent = [
+            (index, QPersistentModelIndex(self.mapToSource(index)))
+            for index in self.persistentIndexList()
+        ]
+    
+    def _end_layout_change(self):
+        """Remap persistent indexes after the accepted rows were recomputed"""
+        old_indexes = []
+        new_indexes = []
+        for index, source_index in self._saved_persistent:
+            old_indexes.append(index)
+            new_indexes.append(self.mapFromSource(QModelIndex(source_index)))
+        self._saved_persistent = []
+        self.changePersistentIndexList(old_indexes, new_indexes)
+        self.layoutChanged.emit()
+    
+    def _on_layout_about_to_be_changed(self, parents=[], hint=None):
+        self._begin_layout_change()
+    
+    def _on_layout_changed(self, parents=[], hint=None):
+        # The source reordered its rows, e.g. after a sort
+        self._rebuild_rows()
+        self._end_layout_change()
+        if self._matcher is not None:
+            QTimer.singleShot(0, self._fill)
+    
+    def _on_model_about_to_be_reset(self):
+        self.beginResetModel()
+        # The listing is being replaced, so matched entry indices are meaningless
+        self._matches = set()
+        self._tested = 0
+    
+    def _on_model_reset(self):
+        self._rebuild_rows()
+        self.endResetModel()
+        if self._matcher is not None:
+            QTimer.singleShot(0, self._fill)
 
 class GlobalMediaManager:
     """Global manager to ensure only one media file plays at a time"""
@@ -813,21 +3012,85 @@ class FileManager(QMainWindow):
         self.left_current_view_mode = 'icon'
         self.right_current_view_mode = 'icon'
         
-        # Create models for both panes
-        self.left_folder_model = QStandardItemModel()
-        self.left_file_model = QStandardItemModel()
-        self.right_folder_model = QStandardItemModel()
-        self.right_file_model = QStandardItemModel()
-        
-        # Create table models for column view
-        self.left_folder_table_model = FileTableModel()
-        self.left_file_table_model = FileTableModel()
-        self.right_folder_table_model = FileTableModel()
-        self.right_file_table_model = FileTableModel()
-        
-        # Thumbnail cache
-        self.thumbnail_cache = {}
-        self.thumbnail_loaders = {}
+        # Create models for both panes, shared by the icon, thumbnail and column views
+        self.left_folder_model = FileTableModel()
+        self.left_file_model = FileTableModel()
+        self.right_folder_model = FileTableModel()
+        self.right_file_model = FileTableModel()
+        # Directory listings shared by both panes, and scans in flight by path
+        self.listing_cache = ListingCache(LISTING_CACHE_MAX_ENTRIES)
+        self.scan_jobs = {}
+        self.scan_workers = []
+        self.left_scan_job = None
+        self.right_scan_job = None
+        
+        # Open recursive, content and duplicate search dialogs, closed with the window
+        self.tree_search_dialogs = []
+        
+        # Bookmarked folders and their filename index, crawled in the background
+        self.bookmarks = load_bookmarks()
+        self.index_db_path = os.path.join(app_cache_dir(), FILE_INDEX_NAME)
+        self.file_index = self.open_file_index()
+        self.pending_index_crawls = {}  # path -> recursive
+        self.index_worker = None
+        self.stale_index_roots = set()  # removed while the crawler may still be writing them
+        self.index_search_dialog = None
+        self.index_timer = QTimer(self)
+        self.index_timer.setInterval(INDEX_REVALIDATE_MS)
+        self.index_timer.timeout.connect(self.revalidate_file_index)
+        
+        # Live refresh of the shown directories
+        self.directory_watcher = QFileSystemWatcher(self)
+        self.directory_watcher.directoryChanged.connect(self.on_directory_changed)
+        self.polled_directories = {}  # path -> signature, for paths the watcher rejected
+        self.dirty_directories = set()
+        self.refresh_timer = QTimer(self)
+        self.refresh_timer.setSingleShot(True)
+        self.refresh_timer.setInterval(REFRESH_DELAY_MS)
+        self.refresh_timer.timeout.connect(self.refresh_dirty_directories)
+        self.poll_timer = QTimer(self)
+        self.poll_timer.setInterval(POLL_INTERVAL_MS)
+        self.poll_timer.timeout.connect(self.poll_directories)
+        
+        # Recursive folder sizes for the Size column, computed in the background
+        try:
+            self.folder_size_cache = FolderSizeCache(os.path.join(app_cache_dir(), FOLDER_SIZE_CACHE_NAME))
+        except sqlite3.Error as e:
+            logger.error(f"Error opening folder size cache: {e}")
+            self.folder_size_cache = None
+        self.folder_sizes = {}  # path -> bytes, last computed
+        self.folder_size_workers = []
+        self.left_folder_size_worker = None
+        self.right_folder_size_worker = None
+        
+        # Rows marked by the last pane comparison: top-level name -> status
+        self.compare_marks = {}
+        
+        # Thumbnail cache, filled by the shared thumbnail pool from the thumbnail store
+        self.thumbnail_cache = LRUCache(THUMBNAIL_MEMORY_BYTES, pixmap_bytes)
+        try:
+            self.thumbnail_store = ThumbnailStore(os.path.join(app_cache_dir(), THUMBNAIL_STORE_NAME))
+        except sqlite3.Error as e:
+            logger.error(f"Error opening thumbnail store: {e}")
+            self.thumbnail_store = None
+        self.thumbnail_service = ThumbnailService(self.thumbnail_store, self)
+        self.thumbnail_service.thumbnail_ready.connect(self.on_thumbnail_loaded)
+        # Finished thumbnails are applied together, at most once per frame
+        self.pending_thumbnails = {}
+        self.thumbnail_flush_timer = QTimer(self)
+        self.thumbnail_flush_timer.setSingleShot(True)
+        self.thumbnail_flush_timer.setInterval(THUMBNAIL_FLUSH_MS)
+        self.thumbnail_flush_timer.timeout.connect(self.flush_thumbnails)
+        
+        # Likely next folders, listed and thumbnailed in the background while the panes are idle
+        self.folder_visits = VisitCounter()
+        self.prefetch_hints = {"Left": None, "Right": None}  # hovered or selected subfolder
+        self.prefetch_thumbnail_level = None  # read by the prefetch thread
+        self.prefetcher = Prefetcher(self.listing_cache, self.prefetch_folder_thumbnails)
+        self.prefetch_timer = QTimer(self)
+        self.prefetch_timer.setSingleShot(True)
+        self.prefetch_timer.setInterval(PREFETCH_IDLE_MS)
+        self.prefetch_timer.timeout.connect(self.start_prefetch)
         
         # In-place preview tracking
         self.left_preview_widget = None
@@ -853,6 +3116,11 @@ class FileManager(QMainWindow):
             self.left_folder_selector.setCurrentText(self.left_current_directory)
         if hasattr(self, 'right_folder_selector'):
             self.right_folder_selector.setCurrentText(self.right_current_directory)
+        
+        # Catch up on changes made while the app was closed, once the panes have loaded
+        if self.file_index is not None:
+            QTimer.singleShot(INDEX_STARTUP_DELAY_MS, self.revalidate_file_index)
+            self.index_timer.start()
     
     def setup_views(self):
         """Set up all views for both panes"""
@@ -860,15 +3128,20 @@ class FileManager(QMainWindow):
         self.left_folder_view = QListView()
         self.left_file_view = QListView()
         
-        self.left_folder_view.setModel(self.left_folder_model)
-        self.left_file_view.setModel(self.left_file_model)
+        # Views see the pane models through search filter proxies
+        self.left_folder_proxy = self.create_filter_proxy(self.left_folder_model)
+        self.left_file_proxy = self.create_filter_proxy(self.left_file_model)
+        self.left_folder_view.setModel(self.left_folder_proxy)
+        self.left_file_view.setModel(self.left_file_proxy)
         
         # Right pane views
         self.right_folder_view = QListView()
         self.right_file_view = QListView()
         
-        self.right_folder_view.setModel(self.right_folder_model)
-        self.right_file_view.setModel(self.right_file_model)
+        self.right_folder_proxy = self.create_filter_proxy(self.right_folder_model)
+        self.right_file_proxy = self.create_filter_proxy(self.right_file_model)
+        self.right_folder_view.setModel(self.right_folder_proxy)
+        self.right_file_view.setModel(self.right_file_proxy)
         
         # Set up view properties
         for view in [self.left_folder_view, self.left_file_view, 
@@ -892,6 +3165,39 @@ class FileManager(QMainWindow):
         self.right_folder_view.clicked.connect(self.on_right_folder_clicked)
         self.right_file_view.clicked.connect(self.on_right_file_clicked)
         self.right_file_view.doubleClicked.connect(self.on_right_file_double_clicked)
+        self.connect_prefetch_hints("Left", self.left_folder_view)
+        self.connect_prefetch_hints("Right", self.right_folder_view)
+        
+        # Thumbnails follow the viewport: rescheduled shortly after scrolling, resizing or new rows
+        self.thumbnail_windows = {"Left": set(), "Right": set()}  # paths requested around each viewport
+        self.thumbnail_timers = {}
+        for pane_name, view in (("Left", self.left_file_view), ("Right", self.right_file_view)):
+            timer = QTimer(self)
+            timer.setSingleShot(True)
+            timer.setInterval(THUMBNAIL_SCHEDULE_DELAY_MS)
+            timer.timeout.connect(lambda pn=pane_name: self.schedule_thumbnails(pn))
+            self.thumbnail_timers[pane_name] = timer
+            view.verticalScrollBar().valueChanged.connect(timer.start)
+            view.verticalScrollBar().rangeChanged.connect(timer.start)
+            proxy = view.model()
+            proxy.rowsInserted.connect(timer.start)
+            proxy.rowsRemoved.connect(timer.start)
+            proxy.modelReset.connect(timer.start)
+            proxy.layoutChanged.connect(timer.start)
+    
+    def create_filter_proxy(self, model):
+        """Create the search filter proxy a view uses for a pane model"""
+        proxy = FileFilterProxyModel(self)
+        proxy.setSourceModel(model)
+        return proxy
+    
+    def get_source_model(self, view_model):
+        """Get the FileTableModel behind a view's model"""
+        if isinstance(view_model, QAbstractProxyModel):
+            view_model = view_model.sourceModel()
+        if isinstance(view_model, FileTableModel):
+            return view_model
+        return None
     
     def create_dual_pane_layout(self):
         """Create the dual-pane layout with toolbars"""
@@ -899,6 +3205,9 @@ class FileManager(QMainWindow):
         main_layout = QVBoxLayout(central_widget)
         main_layout.setContentsMargins(0, 0, 0, 0)
         
+        # Indexed search across all bookmarked folders
+        main_layout.addLayout(self.create_global_search_bar())
+        
         # Create left pane with toolbar
         left_pane = self.create_pane_with_toolbar("Left", self.left_folder_view, self.left_file_view)
         
@@ -914,6 +3223,40 @@ class FileManager(QMainWindow):
         main_layout.addWidget(self.dual_splitter)
         self.setCentralWidget(central_widget)
     
+    def create_global_search_bar(self):
+        """Create the search bar that queries the index of bookmarked folders"""
+        bar = QHBoxLayout()
+        bar.setContentsMargins(4, 4, 4, 0)
+        bar.setSpacing(4)
+        
+        bar.addWidget(QLabel("Find in bookmarks:"))
+        self.global_search_box = QLineEdit()
+        self.global_search_box.setPlaceholderText("Name or glob, e.g. *shot_0420*")
+        self.global_search_box.setMinimumHeight(25)
+        self.global_search_box.setMaximumWidth(320)
+        self.global_search_box.setToolTip("Search the filename index of every bookmarked folder")
+        self.global_search_box.returnPressed.connect(self.show_index_search)
+        bar.addWidget(self.global_search_box)
+        
+        bar.addStretch()
+        
+        compare_btn = QPushButton("Compare Panes")
+        compare_btn.setMinimumHeight(25)
+        compare_btn.setToolTip("Compare the left and right folders recursively and sync them")
+        compare_btn.clicked.connect(self.show_compare)
+        bar.addWidget(compare_btn)
+        
+        duplicates_btn = QPushButton("Find Duplicates in Both Panes")
+        duplicates_btn.setMinimumHeight(25)
+        duplicates_btn.setToolTip("Find files with identical contents under the left and right folders")
+        duplicates_btn.clicked.connect(lambda: self.show_duplicate_finder(["Left", "Right"]))
+        bar.addWidget(duplicates_btn)
+        
+        self.index_status_label = QLabel("")
+        self.index_status_label.setStyleSheet("color: #666;")
+        bar.addWidget(self.index_status_label)
+        return bar
+    
     def create_pane_with_toolbar(self, pane_name, folder_view, file_view):
         """Create a pane with its own toolbar and folder/file split"""
         pane_widget = QWidget()
@@ -1080,6 +3423,40 @@ class FileManager(QMainWindow):
         search_box.textChanged.connect(lambda text: self.on_search_text_changed(pane_name, text))
         filter_toolbar.addWidget(search_box)
         
+        tree_search_btn = QPushButton("🔍")
+        tree_search_btn.setMaximumWidth(40)
+        tree_search_btn.setMinimumHeight(25)
+        tree_search_btn.setToolTip(f"Search all subfolders of the {pane_name} pane's folder")
+        tree_search_btn.clicked.connect(lambda: self.show_tree_search(pane_name))
+        filter_toolbar.addWidget(tree_search_btn)
+        
+        content_search_btn = QPushButton("≣")
+        content_search_btn.setMaximumWidth(40)
+        content_search_btn.setMinimumHeight(25)
+        content_search_btn.setToolTip(f"Search inside the files of the {pane_name} pane's folder")
+        content_search_btn.clicked.connect(lambda: self.show_content_search(pane_name))
+        filter_toolbar.addWidget(content_search_btn)
+        
+        duplicates_btn = QPushButton("⧉")
+        duplicates_btn.setMaximumWidth(40)
+        duplicates_btn.setMinimumHeight(25)
+        duplicates_btn.setToolTip(f"Find duplicate files under the {pane_name} pane's folder")
+        duplicates_btn.clicked.connect(lambda: self.show_duplicate_finder([pane_name]))
+        filter_toolbar.addWidget(duplicates_btn)
+        
+        # Match mode: substring, glob (*.mov), regex or ranked fuzzy
+        match_mode_combo = QComboBox()
+        match_mode_combo.addItems(MATCH_MODES)
+        match_mode_combo.setMaximumWidth(90)
+        match_mode_combo.setMinimumHeight(25)
+        match_mode_combo.currentTextChanged.connect(lambda text: self.apply_filters(pane_name))
+        filter_toolbar.addWidget(match_mode_combo)
+        
+        search_timer = QTimer(self)
+        search_timer.setSingleShot(True)
+        search_timer.setInterval(SEARCH_DEBOUNCE_MS)
+        search_timer.timeout.connect(lambda: self.apply_filters(pane_name))
+        
         # Sort dropdown
         filter_toolbar.addWidget(QLabel("Sort:"))
         sort_combo = QComboBox()
@@ -1091,13 +3468,24 @@ class FileManager(QMainWindow):
         
         filter_toolbar.addStretch()
         
+        # Loading / entry count status
+        status_label = QLabel("")
+        status_label.setStyleSheet("color: #666;")
+        filter_toolbar.addWidget(status_label)
+        
         # Store references for later use
         if pane_name == "Left":
             self.left_search_box = search_box
+            self.left_match_mode_combo = match_mode_combo
+            self.left_search_timer = search_timer
             self.left_sort_combo = sort_combo
+            self.left_status_label = status_label
         else:
             self.right_search_box = search_box
+            self.right_match_mode_combo = match_mode_combo
+            self.right_search_timer = search_timer
             self.right_sort_combo = sort_combo
+            self.right_status_label = status_label
         
         return filter_toolbar
     
@@ -1107,11 +3495,8 @@ class FileManager(QMainWindow):
             return
         
         self.left_current_directory = path
-        self.load_folders_to_model(self.left_folder_model, path)
-        self.load_files_to_model(self.left_file_model, path)
-        # Also load into table models for column view
-        self.load_folders_to_table_model(self.left_folder_table_model, path)
-        self.load_files_to_table_model(self.left_file_table_model, path)
+        self.start_directory_scan("Left", path)
+        self.update_directory_watches()
         # Update the folder selector dropdown
         if hasattr(self, 'left_folder_selector'):
             self.left_folder_selector.setCurrentText(path)
@@ -1122,129 +3507,447 @@ class FileManager(QMainWindow):
             return
         
         self.right_current_directory = path
-        self.load_folders_to_model(self.right_folder_model, path)
-        self.load_files_to_model(self.right_file_model, path)
-        # Also load into table models for column view
-        self.load_folders_to_table_model(self.right_folder_table_model, path)
-        self.load_files_to_table_model(self.right_file_table_model, path)
+        self.start_directory_scan("Right", path)
+        self.update_directory_watches()
         # Update the folder selector dropdown
         if hasattr(self, 'right_folder_selector'):
             self.right_folder_selector.setCurrentText(path)
     
-    def load_folders_to_model(self, model, path):
-        """Load folders into a model"""
-        model.clear()
+    def get_pane_models(self, pane_name):
+        """Get (folder_model, file_model) for a pane"""
+        if pane_name == "Left":
+            return self.left_folder_model, self.left_file_model
+        return self.right_folder_model, self.right_file_model
+    
+    def start_directory_scan(self, pane_name, path):
+        """Show a directory in a pane from the listing cache or a background scan"""
+        # Leave the pane's in-flight scan; it is cancelled if no other pane needs it
+        self.cancel_directory_scan(pane_name)
+        self.cancel_folder_sizes(pane_name)
+        self.cancel_thumbnails(pane_name, path)
+        self.folder_visits.record(path)
+        self.prefetch_hints[pane_name] = None
+        
+        folder_model, file_model = self.get_pane_models(pane_name)
+        job = self.scan_jobs.get(path)
+        cached = self.listing_cache.get(path)
+        
+        if job is None:
+            # A cached listing only needs revalidation; otherwise stream a full scan
+            if cached is not None:
+                job = self.create_scan_job(path, cached.signature, stream=False)
+            else:
+                job = self.create_scan_job(path)
         
-        try:
-            dir_info = QDir(path)
-            dir_info.setFilter(QDir.Dirs | QDir.NoDotAndDotDot)
-            entries = dir_info.entryInfoList()
-            
-            for entry in entries:
-                item = QStandardItem(entry.fileName())
-                item.setData(entry.filePath(), Qt.UserRole)
-                item.setIcon(self.style().standardIcon(QStyle.SP_DirIcon))
-                model.appendRow(item)
-                
-        except Exception as e:
-            logger.error(f"Error loading folders from {path}: {e}")
+        if cached is not None and job.revalidating:
+            # Render instantly from cache while the job revalidates in background
+            if cached.snapshots is not None:
+                folder_model.setListing(cached.snapshots[0])
+                file_model.setListing(cached.snapshots[1])
+            else:
+                # Listed by the prefetcher and not shown yet; build it once
+                folder_model.setEntries(cached.folders)
+                file_model.setEntries(cached.files)
+                cached.snapshots = (folder_model.listing().copy(), file_model.listing().copy())
+            self.set_pane_status(pane_name, self.format_pane_counts(folder_model, file_model))
+            self.request_folder_sizes(pane_name)
+        else:
+            # Catch up with whatever the shared scan has streamed so far
+            folder_model.setEntries(list(job.folders))
+            file_model.setEntries(list(job.files))
+            self.set_pane_status(pane_name, "Loading…")
+        
+        job.panes.add(pane_name)
+        if pane_name == "Left":
+            self.left_scan_job = job
+        else:
+            self.right_scan_job = job
+    
+    def create_scan_job(self, path, known_signature=None, stream=True):
+        """Start a background scan of a directory that panes can subscribe to"""
+        self.pause_prefetch()
+        worker = DirectoryScanWorker(path, known_signature, stream)
+        job = DirectoryScanJob(path, worker, not stream)
+        worker.entries_loaded.connect(
+            lambda folders, files, j=job: self.on_scan_entries_loaded(j, folders, files)
+        )
+        worker.scan_finished.connect(
+            lambda signature, folders, files, j=job: self.on_scan_finished(j, signature, folders, files)
+        )
+        worker.scan_unchanged.connect(lambda j=job: self.on_scan_unchanged(j))
+        worker.scan_failed.connect(lambda message, j=job: self.on_scan_failed(j, message))
+        # Keep a reference until the thread exits so it is not destroyed while running
+        self.scan_workers.append(worker)
+        worker.finished.connect(lambda w=worker: self.on_scan_worker_done(w))
+        
+        self.scan_jobs[path] = job
+        worker.start()
+        return job
     
-    def load_folders_to_table_model(self, table_model, path):
-        """Load folders into a table model with multiple columns"""
-        table_data = []
+    def cancel_directory_scan(self, pane_name):
+        """Detach a pane from its in-flight scan, cancelling it if no pane is left"""
+        job = self.left_scan_job if pane_name == "Left" else self.right_scan_job
+        if pane_name == "Left":
+            self.left_scan_job = None
+        else:
+            self.right_scan_job = None
+        if job is None:
+            return
         
-        try:
-            dir_info = QDir(path)
-            dir_info.setFilter(QDir.Dirs | QDir.NoDotAndDotDot)
-            entries = dir_info.entryInfoList()
+        job.panes.discard(pane_name)
+        if not job.panes and not job.cancelled:
+            job.cancelled = True
+            job.worker.cancel()
+            self.finish_scan_job(job)
+    
+    def finish_scan_job(self, job):
+        """Forget a scan job and detach its panes"""
+        if self.scan_jobs.get(job.path) is job:
+            del self.scan_jobs[job.path]
+        if self.left_scan_job is job:
+            self.left_scan_job = None
+        if self.right_scan_job is job:
+            self.right_scan_job = None
+        # Changes seen while the scan was running need another pass
+        if job.path in self.dirty_directories and not self.refresh_timer.isActive():
+            self.refresh_timer.start()
+        if not self.scan_jobs:
+            self.prefetch_timer.start()
+    
+    def connect_prefetch_hints(self, pane_name, view):
+        """Prefetch the subfolder under the pointer or selected in a folder view"""
+        view.setMouseTracking(True)
+        view.entered.connect(lambda index, pn=pane_name: self.on_folder_hinted(pn, index))
+        view.selectionModel().currentChanged.connect(
+            lambda current, previous, pn=pane_name: self.on_folder_hinted(pn, current)
+        )
+    
+    def on_folder_hinted(self, pane_name, index):
+        """Remember a pane's hovered or selected subfolder and prefetch it once the pointer rests"""
+        path = index.data(Qt.UserRole) if index.isValid() else None
+        if not path or path == self.prefetch_hints[pane_name]:
+            return
+        self.prefetch_hints[pane_name] = path
+        if not self.scan_jobs:
+            self.prefetch_timer.start()
+    
+    def pause_prefetch(self):
+        """Hold prefetching while foreground scans run"""
+        self.prefetch_timer.stop()
+        self.prefetcher.hold()
+        self.thumbnail_service.cancel_prefetch()
+    
+    def start_prefetch(self):
+        """Prefetch the folders the panes are most likely to show next
+        
+        Hovered or selected subfolders come first, then the parents go_up
+        would show, then the most visited folders. Their listings go to the
+        listing cache and their first thumbnails, at the smallest level the
+        panes show, to the thumbnail store.
+        """
+        if self.scan_jobs:
+            return
+        current = {self.left_current_directory, self.right_current_directory}
+        candidates = [path for path in self.prefetch_hints.values() if path]
+        for directory in (self.left_current_directory, self.right_current_directory):
+            parent = os.path.dirname(directory)
+            if parent != directory:
+                candidates.append(parent)
+        candidates.extend(self.folder_visits.top(PREFETCH_FREQUENT_FOLDERS, exclude=current))
+        levels = [model.thumbnailLevel() for model in (self.left_file_model, self.right_file_model)
+                  if model.thumbnailsEnabled()]
+        self.prefetch_thumbnail_level = min(levels) if levels else None
+        self.prefetcher.prefetch([path for path in candidates if path not in current])
+        self.prefetcher.release()
+    
+    def prefetch_folder_thumbnails(self, listing):
+        """Queue the first thumbnails of a prefetched folder; runs on the prefetch thread"""
+        level = self.prefetch_thumbnail_level
+        if level is None:
+            return
+        paths = []
+        for entry in listing.files:
+            suffix = Path(entry.name).suffix.lower()
+            if suffix in THUMBNAIL_IMAGE_EXTENSIONS or (VIDEO_THUMBNAILS and suffix in THUMBNAIL_VIDEO_EXTENSIONS):
+                paths.append(entry.path)
+                if len(paths) >= PREFETCH_THUMBNAILS:
+                    break
+        self.thumbnail_service.prefetch(listing.path, paths, level)
+    
+    def update_directory_watches(self):
+        """Watch the directories shown in either pane, falling back to polling"""
+        wanted = {self.left_current_directory, self.right_current_directory}
+        
+        watched = set(self.directory_watcher.directories())
+        stale = list(watched - wanted)
+        if stale:
+            self.directory_watcher.removePaths(stale)
+        for path in list(self.polled_directories):
+            if path not in wanted:
+                del self.polled_directories[path]
+        
+        for path in wanted - watched:
+            if path in self.polled_directories:
+                continue
+            if not self.directory_watcher.addPath(path):
+                # Out of watch descriptors or unsupported filesystem: poll instead
+                try:
+                    self.polled_directories[path] = directory_signature(path)
+                except OSError:
+                    continue
+        
+        if self.polled_directories and not self.poll_timer.isActive():
+            self.poll_timer.start()
+        elif not self.polled_directories:
+            self.poll_timer.stop()
+    
+    def on_directory_changed(self, path):
+        """Queue a refresh of a watched directory, coalescing bursts of changes"""
+        self.remeasure_containing_folders(path)
+        if self.file_index is not None and self.file_index.root_for(path) is not None:
+            self.queue_index_crawl(path, recursive=False)
+        self.dirty_directories.add(path)
+        if not self.refresh_timer.isActive():
+            self.refresh_timer.start()
+    
+    def poll_directories(self):
+        """Detect changes in directories that could not be watched"""
+        for path, signature in list(self.polled_directories.items()):
+            try:
+                current = directory_signature(path)
+            except OSError:
+                continue
+            if current != signature:
+                self.polled_directories[path] = current
+                self.on_directory_changed(path)
+    
+    def refresh_dirty_directories(self):
+        """Rescan changed directories still shown in a pane and apply the differences"""
+        for path in list(self.dirty_directories):
+            if path in self.scan_jobs:
+                # Picked up again when the running scan finishes
+                continue
+            self.dirty_directories.discard(path)
+            panes = [pane_name for pane_name, current in
+                     (("Left", self.left_current_directory), ("Right", self.right_current_directory))
+                     if current == path]
+            if not panes:
+                continue
             
-            for entry in entries:
-                # Get folder info
-                name = entry.fileName()
-                size = "<DIR>"  # Folders don't have size in traditional sense
-                file_type = "Folder"
-                date_modified = entry.lastModified().toString("MMM dd, yyyy hh:mm")
-                icon = self.style().standardIcon(QStyle.SP_DirIcon)
-                file_path = entry.filePath()
-                
-                # Add to table data: [Name, Size, Type, Date Modified, Icon, FilePath]
-                table_data.append([name, size, file_type, date_modified, icon, file_path])
-                
-        except Exception as e:
-            logger.error(f"Error loading folders to table model from {path}: {e}")
+            # Always rescan: edits to files inside a directory do not change its own mtime
+            job = self.create_scan_job(path, stream=False)
+            for pane_name in panes:
+                self.cancel_directory_scan(pane_name)
+                job.panes.add(pane_name)
+                if pane_name == "Left":
+                    self.left_scan_job = job
+                else:
+                    self.right_scan_job = job
+    
+    def on_scan_entries_loaded(self, job, folders, files):
+        """Insert a batch of scanned entries into the models of every subscribed pane"""
+        if job.cancelled:
+            return
+        job.folders.extend(folders)
+        job.files.extend(files)
+        if job.revalidating:
+            return
         
-        table_model.setData(table_data)
+        for pane_name in job.panes:
+            folder_model, file_model = self.get_pane_models(pane_name)
+            self.append_folders_to_model(folder_model, folders)
+            self.append_files_to_model(file_model, files)
+            loaded = len(job.folders) + len(job.files)
+            self.set_pane_status(pane_name, f"Loading {loaded:,} entries…")
     
-    def load_files_to_model(self, model, path):
-        """Load files into a model"""
-        model.clear()
+    def on_scan_finished(self, job, signature, folders, files):
+        """Cache a completed scan and bring the subscribed panes up to date"""
+        if job.cancelled:
+            return
+        # The worker delivers both lists sorted by natural name order
+        cached = self.listing_cache.put(job.path, folders, files, signature)
+        
+        for pane_name in job.panes:
+            folder_model, file_model = self.get_pane_models(pane_name)
+            if job.revalidating:
+                # The shown listing was stale; apply only what changed
+                changed_folders = folder_model.updateEntries(folders)
+                file_model.updateEntries(files)
+                # Only folders whose (inode, mtime) moved need measuring again
+                if changed_folders:
+                    self.request_folder_sizes(pane_name, changed_folders)
+            else:
+                # Batches arrive in directory order; reuse the worker's name sort
+                for model, entries in ((folder_model, folders), (file_model, files)):
+                    model.listing().adopt_name_order(entries)
+                    model.resort()
+                self.request_folder_sizes(pane_name)
+            self.set_pane_status(pane_name, self.format_pane_counts(folder_model, file_model))
+        
+        if job.panes:
+            # Keep the built columns so a revisit skips rebuilding them
+            cached.snapshots = (folder_model.listing().copy(), file_model.listing().copy())
+        
+        self.finish_scan_job(job)
+    
+    def on_scan_unchanged(self, job):
+        """Keep the cached listing when revalidation finds the directory unchanged"""
+        if not job.cancelled:
+            self.finish_scan_job(job)
+    
+    def on_scan_failed(self, job, message):
+        """Show a directory scan error in the subscribed panes"""
+        if job.cancelled:
+            return
+        self.listing_cache.invalidate(job.path)
+        for pane_name in job.panes:
+            self.set_pane_status(pane_name, f"Cannot read folder: {message}")
+        self.finish_scan_job(job)
+    
+    def on_scan_worker_done(self, worker):
+        """Release a scan worker once its thread has exited"""
+        if worker in self.scan_workers:
+            self.scan_workers.remove(worker)
+        worker.deleteLater()
+    
+    def folder_sizes_wanted(self, pane_name):
+        """Check whether a pane needs folder sizes: shown in its Size column or sorted by size"""
+        mode = self.left_current_view_mode if pane_name == "Left" else self.right_current_view_mode
+        folder_model, _ = self.get_pane_models(pane_name)
+        if folder_model.sortColumn() == COLUMN_SIZE:
+            return True
+        return mode == 'column' and COLUMN_SIZE in folder_model.getVisibleColumns()
+    
+    def request_folder_sizes(self, pane_name, paths=None):
+        """Measure folders shown in a pane, by default all of them, in the background
+        
+        Nothing is measured unless the pane shows or sorts by folder sizes.
+        Sizes remembered from earlier are shown right away and corrected when
+        the measurement comes in. A request for all folders replaces the
+        pane's previous one.
+        """
+        if not self.folder_sizes_wanted(pane_name):
+            return
+        folder_model, _ = self.get_pane_models(pane_name)
+        listing = folder_model.listing()
+        full = paths is None
+        if full:
+            self.cancel_folder_sizes(pane_name)
+            paths = [listing.path(index) for index in listing.live_indices()]
+            known = {os.path.basename(path): self.folder_sizes[path]
+                     for path in paths if path in self.folder_sizes}
+            folder_model.setFolderSizes(known)
+        if not paths:
+            return
         
+        worker = FolderSizeWorker(paths, self.folder_size_cache)
+        worker.sizes_computed.connect(self.on_folder_sizes_computed)
+        worker.finished.connect(lambda w=worker: self.on_folder_size_worker_done(w))
+        self.folder_size_workers.append(worker)
+        if full:
+            if pane_name == "Left":
+                self.left_folder_size_worker = worker
+            else:
+                self.right_folder_size_worker = worker
+        # Yield to scans and thumbnails, which the user is waiting on
+        worker.start(QThread.LowPriority)
+    
+    def cancel_folder_sizes(self, pane_name):
+        """Stop measuring the folders of the directory a pane is leaving"""
+        worker = self.left_folder_size_worker if pane_name == "Left" else self.right_folder_size_worker
+        if worker is not None:
+            worker.cancel()
+        if pane_name == "Left":
+            self.left_folder_size_worker = None
+        else:
+            self.right_folder_size_worker = None
+    
+    def remeasure_containing_folders(self, path):
+        """Re-measure the folders shown in a pane whose subtree holds a changed directory"""
+        for pane_name, current in (("Left", self.left_current_directory), ("Right", self.right_current_directory)):
+            prefix = current.rstrip(os.sep) + os.sep
+            if path.startswith(prefix):
+                child = prefix + path[len(prefix):].split(os.sep, 1)[0]
+                self.request_folder_sizes(pane_name, [child])
+    
+    def on_folder_sizes_computed(self, sizes):
+        """Show computed folder sizes in every pane listing their parent folder"""
+        if len(self.folder_sizes) + len(sizes) > FOLDER_SIZE_MEMORY_MAX:
+            self.folder_sizes.clear()
+        self.folder_sizes.update(sizes)
+        for pane_name in ("Left", "Right"):
+            folder_model, _ = self.get_pane_models(pane_name)
+            directory = folder_model.listing().directory
+            if directory is None:
+                continue
+            shown = {os.path.basename(path): size for path, size in sizes.items()
+                     if os.path.dirname(path) == directory}
+            if shown:
+                folder_model.setFolderSizes(shown)
+    
+    def on_folder_size_worker_done(self, worker):
+        """Release a folder size worker once its thread has exited"""
+        if worker in self.folder_size_workers:
+            self.folder_size_workers.remove(worker)
+        worker.deleteLater()
+    
+    def format_pane_counts(self, folder_model, file_model):
+        """Format the folder/file counts shown in a pane's status"""
+        return f"{len(folder_model.listing()):,} folders, {len(file_model.listing()):,} files"
+    
+    def set_pane_status(self, pane_name, text):
+        """Show a status message under a pane's search box"""
+        label = getattr(self, 'left_status_label' if pane_name == "Left" else 'right_status_label', None)
+        if label is not None:
+            label.setText(text)
+    
+    def scan_directory_entries(self, path):
+        """Enumerate a directory once, returning (folders, files) entry lists"""
         try:
-            dir_info = QDir(path)
-            dir_info.setFilter(QDir.Files | QDir.NoDotAndDotDot)
-            entries = dir_info.entryInfoList()
-            
-            for entry in entries:
-                item = QStandardItem(entry.fileName())
-                item.setData(entry.filePath(), Qt.UserRole)
-                
-                # Set default icon first
-                item.setIcon(self.style().standardIcon(QStyle.SP_FileIcon))
-                
-                # Load thumbnail if in thumbnail mode
-                if hasattr(self, 'left_current_view_mode') and self.left_current_view_mode == 'thumbnail':
-                    self.load_thumbnail(entry.filePath(), item)
-                
-                model.appendRow(item)
-                
+            return scan_directory(path)
         except Exception as e:
-            logger.error(f"Error loading files from {path}: {e}")
+            logger.error(f"Error scanning directory {path}: {e}")
+            return [], []
     
-    def load_files_to_table_model(self, table_model, path):
-        """Load files into a table model with multiple columns"""
-        table_data = []
+    def load_folders_to_model(self, model, path, entries=None):
+        """Load folders into a model"""
+        if entries is None:
+            entries, _ = self.scan_directory_entries(path)
         
         try:
-            dir_info = QDir(path)
-            dir_info.setFilter(QDir.Files | QDir.NoDotAndDotDot)
-            entries = dir_info.entryInfoList()
-            
-            for entry in entries:
-                # Get file info
-                name = entry.fileName()
-                size = self.format_file_size(entry.size())
-                file_type = self.get_file_type(entry.fileName())
-                date_modified = entry.lastModified().toString("MMM dd, yyyy hh:mm")
-                icon = self.style().standardIcon(QStyle.SP_FileIcon)
-                file_path = entry.filePath()
-                
-                # Add to table data: [Name, Size, Type, Date Modified, Icon, FilePath]
-                table_data.append([name, size, file_type, date_modified, icon, file_path])
-                
+            model.setEntries(entries)
         except Exception as e:
-            logger.error(f"Error loading files to table model from {path}: {e}")
+            logger.error(f"Error loading folders from {path}: {e}")
+    
+    def append_folders_to_model(self, model, entries):
+        """Append folder entries to a model in one batch"""
+        model.appendEntries(entries)
+    
+    def load_files_to_model(self, model, path, entries=None):
+        """Load files into a model"""
+        if entries is None:
+            _, entries = self.scan_directory_entries(path)
         
-        table_model.setData(table_data)
+        try:
+            model.setEntries(entries)
+        except Exception as e:
+            logger.error(f"Error loading files from {path}: {e}")
+    
+    def append_files_to_model(self, model, entries):
+        """Append file entries to a model in one batch"""
+        model.appendEntries(entries)
     
     def format_file_size(self, size_bytes):
         """Format file size in human readable format"""
-        if size_bytes == 0:
-            return "0 B"
-        
-        size_names = ["B", "KB", "MB", "GB", "TB"]
-        i = 0
-        while size_bytes >= 1024 and i < len(size_names) - 1:
-            size_bytes /= 1024.0
-            i += 1
-        
-        return f"{size_bytes:.1f} {size_names[i]}"
+        return format_file_size(size_bytes)
+    
+    def format_date(self, mtime):
+        """Format a modification timestamp for display"""
+        return format_date(mtime)
     
     def get_file_type(self, filename):
         """Get file type based on extension"""
-        if '.' in filename:
-            ext = filename.split('.')[-1].lower()
-            return f"{ext.upper()} File"
-        return "File"
+        return file_type_name(filename)
     
     def get_file_category(self, file_path):
         """Get file category for preview/thumbnail purposes"""
@@ -1270,8 +3973,7 @@ class FileManager(QMainWindow):
             return 'image'
             
         # Text files
-        text_exts = ['.txt', '.md', '.py', '.js', '.html', '.css', '.json', '.xml', '.csv', '.log', '.ini', '.cfg', '.conf']
-        if file_ext in text_exts:
+        if file_ext in TEXT_EXTENSIONS:
             return 'text'
             
         # Archive files
@@ -1312,53 +4014,100 @@ class FileManager(QMainWindow):
             # For other files, return None to use default icon
             return None
     
-    def load_thumbnail(self, file_path, item):
-        """Load thumbnail for a file"""
-        # Check cache first
-        if file_path in self.thumbnail_cache:
-            item.setIcon(QIcon(self.thumbnail_cache[file_path]))
-            return
-            
-        # Don't load thumbnails for folders
-        if os.path.isdir(file_path):
+    def load_thumbnail(self, file_path, level, band=THUMBNAIL_BAND_VISIBLE):
+        """Queue a file's thumbnail at a pyramid level on the thumbnail pool"""
+        # Files without a thumbnail keep their generic icon; the pool skips files already loading
+        suffix = Path(file_path).suffix.lower()
+        if suffix in THUMBNAIL_IMAGE_EXTENSIONS or (VIDEO_THUMBNAILS and suffix in THUMBNAIL_VIDEO_EXTENSIONS):
+            self.thumbnail_service.request(file_path, level, band)
+    
+    def schedule_thumbnails(self, pane_name):
+        """Request thumbnails for a pane's visible rows first, then the rows around them
+        
+        Rows within THUMBNAIL_PREFETCH_SCREENS viewport heights above and below
+        are requested behind the visible ones; queued thumbnails of rows that
+        scrolled further away are dropped. Thumbnails come from the pyramid
+        level nearest above the view's icon size, and the view scales them.
+        """
+        view = self.left_file_view if pane_name == "Left" else self.right_file_view
+        proxy = view.model()
+        source = self.get_source_model(proxy)
+        level = pyramid_level(view.iconSize().width())
+        if source is not None:
+            source.setThumbnailLevel(level)
+        wanted = {}
+        visible = visible_row_range(view) if source is not None and source.thumbnailsEnabled() else None
+        if visible is not None:
+            first, last = visible
+            margin = (last - first + 1) * THUMBNAIL_PREFETCH_SCREENS
+            before = range(first - 1, max(0, first - margin) - 1, -1)
+            after = range(last + 1, min(proxy.rowCount(), last + 1 + margin))
+            for band, rows in ((THUMBNAIL_BAND_VISIBLE, range(first, last + 1)),
+                               (THUMBNAIL_BAND_NEARBY, after), (THUMBNAIL_BAND_NEARBY, before)):
+                source_rows = [proxy.mapToSource(proxy.index(row, 0)).row() for row in rows]
+                for path in source.missingThumbnails(source_rows):
+                    wanted.setdefault(path, band)
+        
+        window = {(path, level) for path in wanted}
+        other_window = self.thumbnail_windows["Right" if pane_name == "Left" else "Left"]
+        for path, old_level in self.thumbnail_windows[pane_name] - window - other_window:
+            self.thumbnail_service.cancel(path, old_level)
+        self.thumbnail_windows[pane_name] = window
+        cached = {}
+        for path, band in wanted.items():
+            pixmap = self.thumbnail_cache.get((path, level))
+            if pixmap is not None:
+                cached[(path, level)] = pixmap
+            else:
+                self.load_thumbnail(path, level, band)
+        self.update_item_icons(cached)
+    
+    def cancel_thumbnails(self, pane_name, next_directory):
+        """Drop the queued thumbnails of the folder a pane is leaving, unless the other pane shows it"""
+        self.thumbnail_windows[pane_name] = set()
+        _, file_model = self.get_pane_models(pane_name)
+        _, other_file_model = self.get_pane_models("Right" if pane_name == "Left" else "Left")
+        directory = file_model.listing().directory
+        if directory not in (None, next_directory, other_file_model.listing().directory):
+            self.thumbnail_service.cancel_folder(directory)
+    
+    def on_thumbnail_loaded(self, file_path, images):
+        """Hold the thumbnails loaded by the thumbnail pool until the next flush"""
+        for level, image in images.items():
+            self.pending_thumbnails[(file_path, level)] = image
+        if not self.thumbnail_flush_timer.isActive():
+            self.thumbnail_flush_timer.start()
+    
+    def flush_thumbnails(self):
+        """Show the thumbnails that arrived since the last flush, one model update per pane"""
+        pending = self.pending_thumbnails
+        self.pending_thumbnails = {}
+        pixmaps = {}
+        for key, image in pending.items():
+            # Pixmaps can only be made on the GUI thread
+            pixmap = QPixmap.fromImage(image)
+            self.thumbnail_cache.put(key, pixmap)
+            pixmaps[key] = pixmap
+        self.update_item_icons(pixmaps)
+    
+    def update_item_icons(self, pixmaps):
+        """Update the icons of items given as {(path, level): pixmap} in the models showing that level"""
+        if not pixmaps:
             return
-            
-        # Start thumbnail loading in background
-        loader = ThumbnailLoader(file_path, 128)
-        loader.thumbnail_loaded.connect(lambda path, pixmap: self.on_thumbnail_loaded(path, pixmap))
-        self.thumbnail_loaders[file_path] = loader
-        loader.start()
-    
-    def on_thumbnail_loaded(self, file_path, pixmap):
-        """Handle thumbnail loaded signal"""
-        # Cache the thumbnail
-        self.thumbnail_cache[file_path] = pixmap
-        
-        # Find and update the item in all models
-        self.update_item_icon(file_path, pixmap)
-        
-        # Clean up loader
-        if file_path in self.thumbnail_loaders:
-            self.thumbnail_loaders[file_path].deleteLater()
-            del self.thumbnail_loaders[file_path]
-    
-    def update_item_icon(self, file_path, pixmap):
-        """Update icon for an item in all models"""
-        # Update left file model
-        for row in range(self.left_file_model.rowCount()):
-            item = self.left_file_model.item(row)
-            if item and item.data(Qt.UserRole) == file_path:
-                item.setIcon(QIcon(pixmap))
-                break
-                
-        # Update right file model
-        for row in range(self.right_file_model.rowCount()):
-            item = self.right_file_model.item(row)
-            if item and item.data(Qt.UserRole) == file_path:
-                item.setIcon(QIcon(pixmap))
-                break
-    
-    def show_in_place_preview(self, pane_name, file_path, item):
+        icons = {}
+        for model in (self.left_file_model, self.right_file_model):
+            level = model.thumbnailLevel()
+            model_icons = {}
+            for (file_path, pixmap_level), pixmap in pixmaps.items():
+                if pixmap_level == level:
+                    icon = icons.get((file_path, level))
+                    if icon is None:
+                        icon = icons[(file_path, level)] = QIcon(pixmap)
+                    model_icons[file_path] = icon
+            if model_icons:
+                model.setThumbnails(model_icons)
+    
+    def show_in_place_preview(self, pane_name, file_path, index):
         """Show in-place preview for a file"""
         # Hide existing preview in this pane
         self.hide_in_place_preview(pane_name)
@@ -1368,13 +4117,13 @@ class FileManager(QMainWindow):
         if not preview_widget:
             return
             
-        # Store preview widget and item
+        # Store preview widget and index
         if pane_name == "Left":
             self.left_preview_widget = preview_widget
-            self.left_preview_item = item
+            self.left_preview_item = index
         else:
             self.right_preview_widget = preview_widget
-            self.right_preview_item = item
+            self.right_preview_item = index
             
         # Replace the item's icon with the preview widget
         # This is a simplified approach - in a real implementation,
@@ -1397,113 +4146,43 @@ class FileManager(QMainWindow):
     
     def on_left_folder_clicked(self, index):
         """Handle left pane folder click"""
-        # Handle both standard model and table model
-        sender = self.sender()
-        if isinstance(sender, QTableView):
-            # Table view - get data from table model
-            model = sender.model()
-            if isinstance(model, FileTableModel):
-                file_path = model.data(index, Qt.UserRole)
-                if file_path:
-                    self.load_left_directory(file_path)
-        else:
-            # List view - get data from standard model
-            item = self.left_folder_model.itemFromIndex(index)
-            if item:
-                folder_path = item.data(Qt.UserRole)
-                self.load_left_directory(folder_path)
+        # List and table views share the same model
+        folder_path = index.data(Qt.UserRole)
+        if folder_path:
+            self.load_left_directory(folder_path)
     
     def on_left_file_clicked(self, index):
         """Handle left pane file click"""
-        # Handle both standard model and table model
-        sender = self.sender()
-        if isinstance(sender, QTableView):
-            # Table view - get data from table model
-            model = sender.model()
-            if isinstance(model, FileTableModel):
-                file_path = model.data(index, Qt.UserRole)
-                if file_path:
-                    # Show in-place preview
-                    item = self.left_file_model.itemFromIndex(index)
-                    if item:
-                        self.show_in_place_preview("Left", file_path, item)
-        else:
-            # List view - get data from standard model
-            item = self.left_file_model.itemFromIndex(index)
-            if item:
-                file_path = item.data(Qt.UserRole)
-                # Show in-place preview
-                self.show_in_place_preview("Left", file_path, item)
+        file_path = index.data(Qt.UserRole)
+        if file_path:
+            # Show in-place preview
+            self.show_in_place_preview("Left", file_path, index)
     
     def on_left_file_double_clicked(self, index):
         """Handle left pane file double click for opening"""
-        sender = self.sender()
-        if isinstance(sender, QTableView):
-            model = sender.model()
-            if isinstance(model, FileTableModel):
-                file_path = model.data(index, Qt.UserRole)
-                if file_path:
-                    self.open_file(file_path)
-        else:
-            item = self.left_file_model.itemFromIndex(index)
-            if item:
-                file_path = item.data(Qt.UserRole)
-                self.open_file(file_path)
+        file_path = index.data(Qt.UserRole)
+        if file_path:
+            self.open_file(file_path)
     
     def on_right_folder_clicked(self, index):
         """Handle right pane folder click"""
-        # Handle both standard model and table model
-        sender = self.sender()
-        if isinstance(sender, QTableView):
-            # Table view - get data from table model
-            model = sender.model()
-            if isinstance(model, FileTableModel):
-                file_path = model.data(index, Qt.UserRole)
-                if file_path:
-                    self.load_right_directory(file_path)
-        else:
-            # List view - get data from standard model
-            item = self.right_folder_model.itemFromIndex(index)
-            if item:
-                folder_path = item.data(Qt.UserRole)
-                self.load_right_directory(folder_path)
+        # List and table views share the same model
+        folder_path = index.data(Qt.UserRole)
+        if folder_path:
+            self.load_right_directory(folder_path)
     
     def on_right_file_clicked(self, index):
         """Handle right pane file click"""
-        # Handle both standard model and table model
-        sender = self.sender()
-        if isinstance(sender, QTableView):
-            # Table view - get data from table model
-            model = sender.model()
-            if isinstance(model, FileTableModel):
-                file_path = model.data(index, Qt.UserRole)
-                if file_path:
-                    # Show in-place preview
-                    item = self.right_file_model.itemFromIndex(index)
-                    if item:
-                        self.show_in_place_preview("Right", file_path, item)
-        else:
-            # List view - get data from standard model
-            item = self.right_file_model.itemFromIndex(index)
-            if item:
-                file_path = item.data(Qt.UserRole)
-                # Show in-place preview
-                self.show_in_place_preview("Right", file_path, item)
+        file_path = index.data(Qt.UserRole)
+        if file_path:
+            # Show in-place preview
+            self.show_in_place_preview("Right", file_path, index)
     
     def on_right_file_double_clicked(self, index):
         """Handle right pane file double click for opening"""
-        sender = self.sender()
-        if isinstance(sender, QTableView):
-            model = sender.model()
-            if isinstance(model, FileTableModel):
-                file_path = model.data(index, Qt.UserRole)
-                if file_path:
-                    self.open_file(file_path)
-        else:
-            item = self.right_file_model.itemFromIndex(index)
-            if item:
-                file_path = item.data(Qt.UserRole)
-                self.open_file(file_path)
+        file_path = index.data(Qt.UserRole)
+        if file_path:
+            self.open_file(file_path)
     
     def open_file(self, file_path):
         """Open a file with the default application"""
@@ -1579,6 +4258,9 @@ class FileManager(QMainWindow):
             self.left_current_view_mode = mode
         else:
             self.right_current_view_mode = mode
+        self.thumbnail_timers[pane_name].start()
+        if mode == 'column':
+            self.request_folder_sizes(pane_name)
     
     def set_icon_size(self, pane_name, size):
         """Set the icon size for a specific pane"""
@@ -1596,11 +4278,14 @@ class FileManager(QMainWindow):
             grid_size = size + 48  # Icon size + space for text
             self.right_folder_view.setGridSize(QSize(grid_size, grid_size))
             self.right_file_view.setGridSize(QSize(grid_size, grid_size))
+        # Crossing a pyramid level swaps thumbnails for the nearest level's
+        self.thumbnail_timers[pane_name].start()
     
     def apply_view_mode_to_view(self, view, mode):
         """Apply view mode to a specific view"""
         if mode == 'icon':
             self.restore_list_view(view)
+            self.get_source_model(view.model()).setThumbnailsEnabled(False)
             view.setViewMode(QListView.IconMode)
             view.setResizeMode(QListView.Adjust)
             icon_size = view.iconSize().width() if view.iconSize().width() > 0 else 32
@@ -1613,24 +4298,24 @@ class FileManager(QMainWindow):
         elif mode == 'column':
             if isinstance(view, QListView):
                 table_view = QTableView()
-                if view == self.left_folder_view:
-                    table_model = self.left_folder_table_model
+                # The table shares the list view's model, so switching is instant
+                table_model = view.model()
+                source_model = self.get_source_model(table_model)
+                source_model.setThumbnailsEnabled(False)
+                if view == self.left_folder_view or view == self.left_file_view:
                     pane_name = "Left"
-                elif view == self.left_file_view:
-                    table_model = self.left_file_table_model
-                    pane_name = "Left"
-                elif view == self.right_folder_view:
-                    table_model = self.right_folder_table_model
-                    pane_name = "Right"
-                elif view == self.right_file_view:
-                    table_model = self.right_file_table_model
-                    pane_name = "Right"
                 else:
-                    table_model = self.left_folder_table_model
-                    pane_name = "Left"
+                    pane_name = "Right"
                 table_view.setModel(table_model)
                 table_view.setIconSize(QSize(16, 16))
                 table_view.setAlternatingRowColors(True)
+                # Show the pane's current sort instead of resetting it to Name
+                visible_columns = source_model.getVisibleColumns()
+                if source_model.sortColumn() in visible_columns:
+                    sort_section = visible_columns.index(source_model.sortColumn())
+                else:
+                    sort_section = -1
+                table_view.horizontalHeader().setSortIndicator(sort_section, source_model.sortOrder())
                 table_view.setSortingEnabled(True)
                 table_view.setSelectionBehavior(QTableView.SelectRows)
                 table_view.setSelectionMode(QTableView.SingleSelection)
@@ -1654,12 +4339,14 @@ class FileManager(QMainWindow):
                 if view == self.left_folder_view:
                     table_view.clicked.connect(self.on_left_folder_clicked)
                     table_view.doubleClicked.connect(self.on_left_folder_clicked)
+                    self.connect_prefetch_hints("Left", table_view)
                 elif view == self.left_file_view:
                     table_view.clicked.connect(self.on_left_file_clicked)
                     table_view.doubleClicked.connect(self.on_left_file_clicked)
                 elif view == self.right_folder_view:
                     table_view.clicked.connect(self.on_right_folder_clicked)
                     table_view.doubleClicked.connect(self.on_right_folder_clicked)
+                    self.connect_prefetch_hints("Right", table_view)
                 elif view == self.right_file_view:
                     table_view.clicked.connect(self.on_right_file_clicked)
                     table_view.doubleClicked.connect(self.on_right_file_clicked)
@@ -1686,15 +4373,9 @@ class FileManager(QMainWindow):
             view.setTextElideMode(Qt.ElideMiddle)
             view.setUniformItemSizes(False)
             
-            # Reload current directory to load thumbnails
-            if view == self.left_folder_view or view == self.left_file_view:
-                current_path = self.left_current_directory
-                self.load_folders_to_model(self.left_folder_model, current_path)
-                self.load_files_to_model(self.left_file_model, current_path)
-            elif view == self.right_folder_view or view == self.right_file_view:
-                current_path = self.right_current_directory
-                self.load_folders_to_model(self.right_folder_model, current_path)
-                self.load_files_to_model(self.right_file_model, current_path)
+            # The viewport scheduler requests thumbnails for the rows on and near screen
+            if view == self.left_file_view or view == self.right_file_view:
+                self.get_source_model(view.model()).setThumbnailsEnabled(True)
     
     def replace_view_in_splitter(self, old_view, new_view):
         """Replace a view in the splitter"""
@@ -1750,9 +4431,12 @@ class FileManager(QMainWindow):
         """Handle folder selector text change for a specific pane"""
         if os.path.isdir(text):
             if pane_name == "Left":
-                self.load_left_directory(text)
+                # Skip the echo from load_left_directory updating the selector
+                if text != self.left_current_directory:
+                    self.load_left_directory(text)
             else:
-                self.load_right_directory(text)
+                if text != self.right_current_directory:
+                    self.load_right_directory(text)
     
     def add_bookmark(self, pane_name):
         """Add current folder to bookmarks for a specific pane"""
@@ -1761,71 +4445,270 @@ class FileManager(QMainWindow):
         else:
             path = self.right_current_directory
         
-        # This would add to bookmarks
+        if path in self.bookmarks:
+            reply = QMessageBox.question(self, "Bookmarks", f"{path} is already bookmarked. Remove it?")
+            if reply == QMessageBox.Yes:
+                self.remove_bookmark(path)
+            return
+        
+        self.bookmarks.append(path)
+        self.write_bookmarks()
+        if self.file_index is not None:
+            self.file_index.add_root(path)
+            self.queue_index_crawl(path, recursive=True)
         logger.info(f"Added bookmark for {pane_name} pane: {path}")
     
+    def remove_bookmark(self, path):
+        """Remove a folder from bookmarks and drop it from the index"""
+        self.bookmarks.remove(path)
+        self.write_bookmarks()
+        if self.file_index is not None:
+            self.pending_index_crawls.pop(path, None)
+            try:
+                self.file_index.remove_root(path)
+            except sqlite3.Error as e:
+                logger.error(f"Error removing {path} from file index: {e}")
+            if self.index_worker is not None:
+                # Stop the crawl, requeue the other folders and clear what it wrote after removal
+                self.index_worker.cancel()
+                self.stale_index_roots.add(path)
+                for job_path, recursive in self.index_worker.jobs:
+                    if self.file_index.root_for(job_path) is not None:
+                        self.pending_index_crawls[job_path] = self.pending_index_crawls.get(job_path, False) or recursive
+        logger.info(f"Removed bookmark: {path}")
+    
+    def write_bookmarks(self):
+        """Save the bookmarks, logging failures"""
+        try:
+            save_bookmarks(self.bookmarks)
+        except OSError as e:
+            logger.error(f"Error saving bookmarks: {e}")
+    
+    def open_file_index(self):
+        """Open the filename index and match its roots to the bookmarks, or None"""
+        try:
+            index = FileIndex(self.index_db_path)
+            for root in index.roots():
+                if root not in self.bookmarks:
+                    index.remove_root(root)
+            for bookmark in self.bookmarks:
+                index.add_root(bookmark)
+        except sqlite3.Error as e:
+            logger.error(f"Error opening file index {self.index_db_path}: {e}")
+            return None
+        return index
+    
+    def revalidate_file_index(self):
+        """Re-check every bookmarked folder, re-listing directories whose mtime changed"""
+        if self.file_index is None:
+            return
+        for root in self.bookmarks:
+            self.queue_index_crawl(root, recursive=True)
+    
+    def queue_index_crawl(self, path, recursive):
+        """Queue a folder for the index crawler, starting it if idle"""
+        self.pending_index_crawls[path] = self.pending_index_crawls.get(path, False) or recursive
+        if self.index_worker is None:
+            self.start_index_crawl()
+    
+    def start_index_crawl(self):
+        """Hand the queued folders to a new crawler thread"""
+        jobs = list(self.pending_index_crawls.items())
+        self.pending_index_crawls.clear()
+        worker = IndexCrawlWorker(self.index_db_path, jobs)
+        worker.crawl_finished.connect(self.on_index_crawl_finished)
+        self.index_worker = worker
+        if any(recursive for path, recursive in jobs):
+            self.index_status_label.setText("Indexing bookmarked folders...")
+        worker.start()
+    
+    def on_index_crawl_finished(self, listed):
+        """Clean up after a crawl and start the next one if folders were queued meanwhile"""
+        worker = self.sender()
+        worker.wait()
+        worker.deleteLater()
+        self.index_worker = None
+        if listed:
+            logger.info(f"File index updated: {listed} directories re-listed")
+        if self.file_index is None:
+            return
+        for root in self.stale_index_roots:
+            try:
+                self.file_index.remove_root(root)
+            except sqlite3.Error as e:
+                logger.error(f"Error removing {root} from file index: {e}")
+        self.stale_index_roots.clear()
+        if self.pending_index_crawls:
+            self.start_index_crawl()
+        else:
+            self.index_status_label.setText("")
+    
+    def show_index_search(self):
+        """Search the index of bookmarked folders for the global search box's text"""
+        if self.file_index is None:
+            self.index_status_label.setText("File index unavailable")
+            return
+        if not self.bookmarks:
+            self.index_status_label.setText("Bookmark folders with ★ to search them here")
+            return
+        
+        query = self.global_search_box.text()
+        if self.index_search_dialog is None:
+            dialog = IndexSearchDialog(self.file_index, query, self)
+            dialog.result_activated.connect(lambda path: self.reveal_path("Left", path))
+            dialog.destroyed.connect(lambda: setattr(self, 'index_search_dialog', None))
+            self.index_search_dialog = dialog
+            dialog.show()
+            dialog.run_search()
+        else:
+            self.index_search_dialog.set_query(query)
+            self.index_search_dialog.raise_()
+            self.index_search_dialog.activateWindow()
+    
     def on_search_text_changed(self, pane_name, text):
         """Handle search text change for a specific pane"""
-        self.apply_filters(pane_name)
+        # Debounce typing; the filter runs once the user pauses
+        timer = self.left_search_timer if pane_name == "Left" else self.right_search_timer
+        timer.start()
     
-    def on_sort_changed(self, pane_name, sort_type):
-        """Handle sort type change for a specific pane"""
+    def show_tree_search(self, pane_name):
+        """Open a recursive search of the pane's folder, seeded with its search text"""
+        if pane_name == "Left":
+            root = self.left_current_directory
+            search_box = self.left_search_box
+            match_mode = self.left_match_mode_combo.currentText()
+        else:
+            root = self.right_current_directory
+            search_box = self.right_search_box
+            match_mode = self.right_match_mode_combo.currentText()
+        
+        dialog = TreeSearchDialog(root, search_box.text(), match_mode, self)
+        dialog.result_activated.connect(lambda path: self.reveal_path(pane_name, path))
+        dialog.destroyed.connect(lambda: self.tree_search_dialogs.remove(dialog))
+        self.tree_search_dialogs.append(dialog)
+        dialog.show()
+        if search_box.text():
+            dialog.start_search()
+    
+    def show_content_search(self, pane_name):
+        """Open a content search of the pane's folder"""
+        root = self.left_current_directory if pane_name == "Left" else self.right_current_directory
+        dialog = ContentSearchDialog(root, parent=self)
+        dialog.result_activated.connect(lambda path: self.reveal_path(pane_name, path))
+        dialog.destroyed.connect(lambda: self.tree_search_dialogs.remove(dialog))
+        self.tree_search_dialogs.append(dialog)
+        dialog.show()
+    
+    def show_duplicate_finder(self, pane_names):
+        """Open a duplicate search over the folders of one or both panes"""
+        roots = []
+        for pane_name in pane_names:
+            root = self.left_current_directory if pane_name == "Left" else self.right_current_directory
+            if root not in roots:
+                roots.append(root)
+        
+        dialog = DuplicatesDialog(roots, os.path.join(app_cache_dir(), HASH_CACHE_NAME), self)
+        dialog.result_activated.connect(lambda path: self.reveal_path(pane_names[0], path))
+        dialog.destroyed.connect(lambda: self.tree_search_dialogs.remove(dialog))
+        self.tree_search_dialogs.append(dialog)
+        dialog.show()
+        dialog.start_search()
+    
+    def show_compare(self):
+        """Open a recursive comparison of the two panes' folders"""
+        left_root = self.left_current_directory
+        right_root = self.right_current_directory
+        if left_root == right_root:
+            QMessageBox.information(self, "Compare Panes", "Both panes show the same folder.")
+            return
+        
+        for model in self.get_pane_models("Left") + self.get_pane_models("Right"):
+            model.setComparisonMarks({})
+        self.compare_marks = {}
+        dialog = CompareDialog(left_root, right_root, self)
+        dialog.differences_found.connect(
+            lambda differences: self.mark_compared_rows(left_root, right_root, differences)
+        )
+        dialog.result_activated.connect(
+            lambda relpath: self.reveal_path("Left", os.path.join(left_root, relpath))
+            if os.path.lexists(os.path.join(left_root, relpath))
+            else self.reveal_path("Right", os.path.join(right_root, relpath))
+        )
+        dialog.destroyed.connect(lambda: self.tree_search_dialogs.remove(dialog))
+        self.tree_search_dialogs.append(dialog)
+        dialog.show()
+        dialog.start_compare()
+    
+    def mark_compared_rows(self, left_root, right_root, differences):
+        """Mark the rows of both panes whose entries, or whose subtrees, differ"""
+        for difference in differences:
+            top, _, rest = difference.relpath.partition(os.sep)
+            # A folder holding differences further down is marked as different
+            if not rest or top not in self.compare_marks:
+                self.compare_marks[top] = DIFFERENT if rest else difference.status
+        
+        # Names missing from a pane's listing are skipped by the model
+        for pane_name, root in (("Left", left_root), ("Right", right_root)):
+            current = self.left_current_directory if pane_name == "Left" else self.right_current_directory
+            if current != root:
+                continue
+            for model in self.get_pane_models(pane_name):
+                model.setComparisonMarks(self.compare_marks)
+    
+    def reveal_path(self, pane_name, path):
+        """Show a path in a pane: folders are opened, files shown in their folder"""
+        directory = path if os.path.isdir(path) else os.path.dirname(path)
         if pane_name == "Left":
-            folder_model = self.left_folder_model
-            file_model = self.left_file_model
+            self.load_left_directory(directory)
         else:
-            folder_model = self.right_folder_model
-            file_model = self.right_file_model
+            self.load_right_directory(directory)
+    
+    def on_sort_changed(self, pane_name, sort_type):
+        """Handle sort type change for a specific pane"""
+        folder_model, file_model = self.get_pane_models(pane_name)
         
+        # Sizes and dates read largest/newest first, like Finder
         if sort_type == 'Name':
-            folder_model.sort(0, Qt.AscendingOrder)
-            file_model.sort(0, Qt.AscendingOrder)
+            column, reverse = COLUMN_NAME, False
         elif sort_type == 'Size':
-            folder_model.sort(0, Qt.AscendingOrder)
-            file_model.sort(0, Qt.AscendingOrder)
+            column, reverse = COLUMN_SIZE, True
         elif sort_type == 'Type':
-            folder_model.sort(0, Qt.AscendingOrder)
-            file_model.sort(0, Qt.AscendingOrder)
+            column, reverse = COLUMN_TYPE, False
         elif sort_type == 'Date':
-            folder_model.sort(0, Qt.AscendingOrder)
-            file_model.sort(0, Qt.AscendingOrder)
+            column, reverse = COLUMN_DATE, True
+        else:
+            return
+        
+        # Under Size, folders sort by measured total; those not measured yet
+        # come after them in name order until their sizes arrive
+        folder_model.sortBy(column, reverse)
+        file_model.sortBy(column, reverse)
+        if column == COLUMN_SIZE:
+            self.request_folder_sizes(pane_name)
     
     def apply_filters(self, pane_name):
         """Apply search filter to a specific pane"""
         if pane_name == "Left":
             search_box = self.left_search_box
-            folder_model = self.left_folder_model
-            file_model = self.left_file_model
+            match_mode = self.left_match_mode_combo.currentText()
+            proxies = (self.left_folder_proxy, self.left_file_proxy)
         else:
             search_box = self.right_search_box
-            folder_model = self.right_folder_model
-            file_model = self.right_file_model
+            match_mode = self.right_match_mode_combo.currentText()
+            proxies = (self.right_folder_proxy, self.right_file_proxy)
         
-        search_text = search_box.text().lower()
-        
-        # Reload the current directory to reset filters
-        if pane_name == "Left":
-            current_path = self.left_current_directory
-            self.load_folders_to_model(folder_model, current_path)
-            self.load_files_to_model(file_model, current_path)
-        else:
-            current_path = self.right_current_directory
-            self.load_folders_to_model(folder_model, current_path)
-            self.load_files_to_model(file_model, current_path)
-        
-        # Apply search filter to folder model
-        if search_text:
-            for row in range(folder_model.rowCount() - 1, -1, -1):
-                item = folder_model.item(row)
-                if item and search_text not in item.text().lower():
-                    folder_model.removeRow(row)
-        
-        # Apply search filter to file model
-        if search_text:
-            for row in range(file_model.rowCount() - 1, -1, -1):
-                item = file_model.item(row)
-                if item and search_text not in item.text().lower():
-                    file_model.removeRow(row)
+        # Filtering happens in memory on the loaded listing, no disk access
+        search_text = search_box.text()
+        try:
+            for proxy in proxies:
+                proxy.setSearchText(search_text, match_mode)
+        except ValueError as e:
+            # Keep the previous results while a regex is being typed
+            search_box.setStyleSheet("border: 1px solid #d9534f;")
+            search_box.setToolTip(str(e))
+            return
+        search_box.setStyleSheet("")
+        search_box.setToolTip("")
     
     def show_context_menu(self, position):
         """Show context menu for any view"""
@@ -1841,8 +4724,8 @@ class FileManager(QMainWindow):
         menu = QMenu()
         
         # Get the table model
-        model = table_view.model()
-        if not isinstance(model, FileTableModel):
+        model = self.get_source_model(table_view.model())
+        if model is None:
             return
         
         # Get all available columns and currently visible columns
@@ -1854,14 +4737,16 @@ class FileManager(QMainWindow):
             action = menu.addAction(column_name)
             action.setCheckable(True)
             action.setChecked(i in visible_columns)
-            action.triggered.connect(lambda checked, col_idx=i, tv=table_view: self.toggle_column(tv, col_idx, checked))
+            action.triggered.connect(
+                lambda checked, col_idx=i, tv=table_view, pn=pane_name: self.toggle_column(tv, col_idx, checked, pn)
+            )
         
         menu.exec_(table_view.horizontalHeader().mapToGlobal(position))
     
-    def toggle_column(self, table_view, column_index, show):
+    def toggle_column(self, table_view, column_index, show, pane_name=None):
         """Toggle visibility of a column"""
-        model = table_view.model()
-        if not isinstance(model, FileTableModel):
+        model = self.get_source_model(table_view.model())
+        if model is None:
             return
         
         visible_columns = model.getVisibleColumns()
@@ -1875,6 +4760,8 @@ class FileManager(QMainWindow):
             visible_columns.remove(column_index)
         
         model.setVisibleColumns(visible_columns)
+        if show and column_index == COLUMN_SIZE and pane_name is not None:
+            self.request_folder_sizes(pane_name)
     
     def restore_list_view(self, view):
         """Restore the original list view when switching from column view"""
@@ -1895,8 +4782,44 @@ class FileManager(QMainWindow):
             if self.right_file_table_view and self.right_file_table_view.parent():
                 self.replace_view_in_splitter(self.right_file_table_view, self.right_file_view)
                 self.right_file_table_view = None
+    
+    def closeEvent(self, event):
+        """Stop background scans before the window closes"""
+        for dialog in list(self.tree_search_dialogs):
+            dialog.close()
+        if self.index_search_dialog is not None:
+            self.index_search_dialog.close()
+        self.index_timer.stop()
+        if self.index_worker is not None:
+            self.index_worker.cancel()
+            self.index_worker.wait()
+        if self.file_index is not None:
+            self.file_index.close()
+            self.file_index = None
+        for worker in list(self.scan_workers) + list(self.folder_size_workers):
+            worker.cancel()
+        for worker in list(self.scan_workers):
+            worker.wait(1000)
+        for worker in list(self.folder_size_workers):
+            worker.wait()
+        if self.folder_size_cache is not None:
+            self.folder_size_cache.close()
+        self.prefetch_timer.stop()
+        self.prefetcher.shutdown(timeout=1)
+        logger.info(f"Prefetched {self.prefetcher.listed} folders, skipped {self.prefetcher.skipped} over budget")
+        self.thumbnail_service.shutdown()
+        logger.info(f"Thumbnail memory cache: {self.thumbnail_cache.stats()}")
+        if self.thumbnail_store is not None:
+            try:
+                self.thumbnail_store.prune()
+            except sqlite3.Error as e:
+                logger.error(f"Error pruning thumbnail store: {e}")
+            self.thumbnail_store.close()
+        super().closeEvent(event)
 
 def main():
+    # Content search workers re-launch the frozen app binary
+    multiprocessing.freeze_support()
     app = QApplication(sys.argv)
     win = FileManager()
     win.show()
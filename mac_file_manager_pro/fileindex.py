@@ -0,0 +1,276 @@
+"""
+Persistent filename index for bookmarked folders, stored in SQLite
+"""
+
+import os
+import re
+import sqlite3
+import time
+
+from mac_file_manager_pro.treesearch import DEFAULT_IGNORED_DIRS
+
+# Directories written between commits while crawling
+CRAWL_COMMIT_INTERVAL = 200
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS roots (
+    path TEXT PRIMARY KEY,
+    crawled_at REAL
+);
+CREATE TABLE IF NOT EXISTS dirs (
+    id INTEGER PRIMARY KEY,
+    path TEXT NOT NULL UNIQUE,
+    mtime_ns INTEGER
+);
+CREATE TABLE IF NOT EXISTS entries (
+    id INTEGER PRIMARY KEY,
+    dir_id INTEGER NOT NULL,
+    name TEXT NOT NULL,
+    is_dir INTEGER NOT NULL
+);
+CREATE INDEX IF NOT EXISTS entries_dir ON entries(dir_id);
+"""
+
+# Trigram full-text index over entry names, kept in sync by triggers.
+# Needs SQLite 3.34+; older builds fall back to scanning the names table.
+TRIGRAM_SCHEMA = """
+CREATE VIRTUAL TABLE IF NOT EXISTS entry_names USING fts5(
+    name, content='entries', content_rowid='id', tokenize='trigram'
+);
+CREATE TRIGGER IF NOT EXISTS entries_insert AFTER INSERT ON entries BEGIN
+    INSERT INTO entry_names(rowid, name) VALUES (new.id, new.name);
+END;
+CREATE TRIGGER IF NOT EXISTS entries_delete AFTER DELETE ON entries BEGIN
+    INSERT INTO entry_names(entry_names, rowid, name) VALUES ('delete', old.id, old.name);
+END;
+"""
+
+
+def pattern_to_like(pattern):
+    """Translate a name query into a LIKE pattern
+
+    ``*`` and ``?`` are glob wildcards; a query without them matches names
+    containing it.
+    """
+    escaped = pattern.replace('\\', '\\\\').replace('%', '\\%').replace('_', '\\_')
+    like = escaped.replace('*', '%').replace('?', '_')
+    if '*' not in pattern and '?' not in pattern:
+        like = f"%{like}%"
+    return like
+
+
+def longest_literal(pattern):
+    """Get the longest run of a query without wildcards"""
+    return max(re.split(r'[*?]', pattern), key=len)
+
+
+def is_hidden_name(name):
+    """Check whether a name is skipped by the index"""
+    return name.startswith('.')
+
+
+class FileIndex:
+    """Filename index of the folders under a set of roots
+
+    Each directory is stored with the mtime it was listed at; a crawl only
+    re-lists directories whose mtime changed, so revalidating an unchanged
+    tree costs one stat per directory. Entries are name-only (no per-file
+    stat), which keeps crawling network volumes cheap. Queries go through a
+    trigram FTS5 index and never touch the disk.
+
+    A FileIndex wraps one SQLite connection, so use one instance per thread.
+    The database runs in WAL mode, letting searches proceed during a crawl.
+    """
+
+    def __init__(self, db_path):
+        self.db_path = db_path
+        self._conn = sqlite3.connect(db_path, timeout=30)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.executescript(SCHEMA)
+        try:
+            self._conn.executescript(TRIGRAM_SCHEMA)
+            self.has_trigram = True
+        except sqlite3.OperationalError:
+            self.has_trigram = False
+        self._conn.commit()
+
+    def close(self):
+        """Close the database connection"""
+        self._conn.close()
+
+    # Roots
+
+    def roots(self):
+        """Get the indexed root folders"""
+        return [row[0] for row in self._conn.execute("SELECT path FROM roots ORDER BY path")]
+
+    def add_root(self, path):
+        """Register a root folder; it is filled in by the next crawl"""
+        self._conn.execute("INSERT OR IGNORE INTO roots(path) VALUES (?)", (path,))
+        self._conn.commit()
+
+    def remove_root(self, path):
+        """Forget a root folder and everything indexed under it"""
+        self._conn.execute("DELETE FROM roots WHERE path = ?", (path,))
+        self._remove_subtree(path)
+        self._conn.commit()
+
+    def root_for(self, path):
+        """Get the indexed root containing a path, or None"""
+        for root in self.roots():
+            if path == root or path.startswith(root.rstrip(os.sep) + os.sep):
+                return root
+        return None
+
+    # Crawling
+
+    def crawl(self, path, recursive=True, cancel_event=None):
+        """Bring the index of a folder up to date; returns the number of directories re-listed
+
+        Unchanged directories are skipped by mtime. With ``recursive`` off only
+        the folder itself is checked, plus any subfolders new to the index.
+        """
+        listed = 0
+        since_commit = 0
+        stack = [(path, recursive)]
+        try:
+            while stack:
+                if cancel_event is not None and cancel_event.is_set():
+                    break
+                current, descend = stack.pop()
+                try:
+                    mtime_ns = os.stat(current).st_mtime_ns
+                except OSError:
+                    self._remove_subtree(current)
+                    continue
+
+                row = self._conn.execute(
+                    "SELECT id, mtime_ns FROM dirs WHERE path = ?", (current,)
+                ).fetchone()
+                if row is not None and row[1] == mtime_ns:
+                    if descend:
+                        stack.extend((subdir, True) for subdir in self._indexed_subdirs(row[0], current))
+                    continue
+
+                subdirs, new_subdirs = self._relist(current, row[0] if row else None, mtime_ns)
+                listed += 1
+                since_commit += 1
+                # Folders the index has never seen always get a full walk
+                stack.extend((subdir, True) for subdir in (subdirs if descend else new_subdirs))
+                if since_commit >= CRAWL_COMMIT_INTERVAL:
+                    self._conn.commit()
+                    since_commit = 0
+        finally:
+            self._conn.commit()
+
+        if recursive and not (cancel_event is not None and cancel_event.is_set()):
+            self._conn.execute("UPDATE roots SET crawled_at = ? WHERE path = ?", (time.time(), path))
+            self._conn.commit()
+        return listed
+
+    def _indexed_subdirs(self, dir_id, path):
+        """Get the paths of a directory's indexed subfolders"""
+        return [
+            os.path.join(path, name) for (name,) in self._conn.execute(
+                "SELECT name FROM entries WHERE dir_id = ? AND is_dir = 1", (dir_id,)
+            )
+        ]
+
+    def _relist(self, path, dir_id, mtime_ns):
+        """Replace a directory's entries with a fresh listing
+
+        Returns (subfolders, subfolders new to the index) as paths.
+        """
+        entries = []
+        try:
+            with os.scandir(path) as it:
+                for dir_entry in it:
+                    name = dir_entry.name
+                    if is_hidden_name(name):
+                        continue
+                    try:
+                        is_dir = dir_entry.is_dir(follow_symlinks=False)
+                    except OSError:
+                        continue
+                    if is_dir and name in DEFAULT_IGNORED_DIRS:
+                        continue
+                    entries.append((name, is_dir))
+        except OSError:
+            self._remove_subtree(path)
+            return [], []
+
+        conn = self._conn
+        old_subdirs = set()
+        if dir_id is None:
+            dir_id = conn.execute(
+                "INSERT INTO dirs(path, mtime_ns) VALUES (?, ?)", (path, mtime_ns)
+            ).lastrowid
+        else:
+            old_subdirs = {name for (name,) in conn.execute(
+                "SELECT name FROM entries WHERE dir_id = ? AND is_dir = 1", (dir_id,)
+            )}
+            conn.execute("UPDATE dirs SET mtime_ns = ? WHERE id = ?", (mtime_ns, dir_id))
+            conn.execute("DELETE FROM entries WHERE dir_id = ?", (dir_id,))
+
+        conn.executemany(
+            "INSERT INTO entries(dir_id, name, is_dir) VALUES (?, ?, ?)",
+            [(dir_id, name, int(is_dir)) for name, is_dir in entries]
+        )
+
+        subdirs = {name for name, is_dir in entries if is_dir}
+        for name in old_subdirs - subdirs:
+            self._remove_subtree(os.path.join(path, name))
+        return ([os.path.join(path, name) for name in subdirs],
+                [os.path.join(path, name) for name in subdirs - old_subdirs])
+
+    def _remove_subtree(self, path):
+        """Drop a directory and everything below it from the index"""
+        prefix = path.rstrip(os.sep) + os.sep
+        # Paths below the prefix sort between "prefix/" and "prefix0" ("0" follows "/")
+        ids = [(dir_id,) for (dir_id,) in self._conn.execute(
+            "SELECT id FROM dirs WHERE path = ? OR (path >= ? AND path < ?)",
+            (path, prefix, prefix[:-1] + chr(ord(os.sep) + 1))
+        )]
+        self._conn.executemany("DELETE FROM entries WHERE dir_id = ?", ids)
+        self._conn.executemany("DELETE FROM dirs WHERE id = ?", ids)
+        parent, name = os.path.split(path)
+        self._conn.execute(
+            "DELETE FROM entries WHERE name = ? AND is_dir = 1 AND dir_id = (SELECT id FROM dirs WHERE path = ?)",
+            (name, parent)
+        )
+
+    # Queries
+
+    def search(self, pattern, limit=500):
+        """Find indexed entries by name; returns (path, is_dir) pairs
+
+        ``pattern`` is a substring, or a glob when it contains ``*`` or ``?``.
+        Matching ignores ASCII case.
+        """
+        if not pattern.strip('*?'):
+            return []
+        like = pattern_to_like(pattern)
+        literal = longest_literal(pattern)
+        if self.has_trigram and len(literal) >= 3:
+            # The trigram index narrows candidates to names containing the literal
+            phrase = '"' + literal.replace('"', '""') + '"'
+            rows = self._conn.execute(
+                "SELECT dirs.path, entries.name, entries.is_dir FROM entry_names "
+                "JOIN entries ON entries.id = entry_names.rowid "
+                "JOIN dirs ON dirs.id = entries.dir_id "
+                "WHERE entry_names MATCH ? AND entries.name LIKE ? ESCAPE '\\' LIMIT ?",
+                (phrase, like, limit)
+            )
+        else:
+            rows = self._conn.execute(
+                "SELECT dirs.path, entries.name, entries.is_dir FROM entries "
+                "JOIN dirs ON dirs.id = entries.dir_id "
+                "WHERE entries.name LIKE ? ESCAPE '\\' LIMIT ?",
+                (like, limit)
+            )
+        return [(os.path.join(path, name), bool(is_dir)) for path, name, is_dir in rows]
+
+    def entry_count(self):
+        """Get the number of indexed entries"""
+        return self._conn.execute("SELECT COUNT(*) FROM entries").fetchone()[0]
@@ -0,0 +1,211 @@
+"""
+Recursive folder sizes, computed on a thread pool with a persistent per-directory cache
+"""
+
+import os
+import queue
+import sqlite3
+import stat
+import threading
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+
+from mac_file_manager_pro.treesearch import default_worker_count
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS dir_sizes (
+    path TEXT PRIMARY KEY,
+    ino INTEGER NOT NULL,
+    mtime_ns INTEGER NOT NULL,
+    own_bytes INTEGER NOT NULL,
+    subdirs TEXT NOT NULL
+);
+"""
+
+# Subdirectory names are stored joined by a character names cannot contain
+SUBDIR_SEPARATOR = '/'
+
+
+class FolderSizeCache:
+    """Per-directory sizes of directly contained files, keyed by (inode, mtime)
+
+    A record holds the bytes of a directory's own files and the names of its
+    subdirectories. Adding, removing or renaming an entry changes the
+    directory's mtime, so a matching record lets a size walk skip listing and
+    stat'ing the directory's files; subdirectories are still visited, which
+    costs one stat each. A file rewritten in place leaves its directory's
+    mtime alone, so its new size is only seen once the directory changes.
+
+    Lookups may come from any thread and borrow a connection from a small
+    pool, so worker threads can come and go without leaking connections.
+    The database runs in WAL mode so lookups proceed during writes.
+    """
+
+    def __init__(self, db_path):
+        self.db_path = db_path
+        self._idle = queue.SimpleQueue()
+        self._lock = threading.Lock()
+        self._connections = []
+        conn = self._acquire()
+        conn.execute("PRAGMA journal_mode=WAL")
+        conn.executescript(SCHEMA)
+        conn.commit()
+        self._release(conn)
+
+    def _acquire(self):
+        """Borrow an idle connection, opening one if none is free"""
+        try:
+            return self._idle.get_nowait()
+        except queue.Empty:
+            pass
+        conn = sqlite3.connect(self.db_path, timeout=30, check_same_thread=False)
+        conn.execute("PRAGMA synchronous=NORMAL")
+        with self._lock:
+            self._connections.append(conn)
+        return conn
+
+    def _release(self, conn):
+        """Return a borrowed connection"""
+        self._idle.put(conn)
+
+    def close(self):
+        """Close every connection; call once no lookups are running"""
+        with self._lock:
+            for conn in self._connections:
+                conn.close()
+            self._connections = []
+        self._idle = queue.SimpleQueue()
+
+    def lookup(self, path, ino, mtime_ns):
+        """Get (own bytes, subdirectory names) for a directory, or None if missing or stale"""
+        conn = self._acquire()
+        try:
+            row = conn.execute(
+                "SELECT own_bytes, subdirs FROM dir_sizes WHERE path = ? AND ino = ? AND mtime_ns = ?",
+                (path, ino, mtime_ns)
+            ).fetchone()
+        finally:
+            self._release(conn)
+        if row is None:
+            return None
+        own_bytes, subdirs = row
+        return own_bytes, subdirs.split(SUBDIR_SEPARATOR) if subdirs else []
+
+    def store(self, records):
+        """Save (path, ino, mtime_ns, own bytes, subdirectory names) records"""
+        if not records:
+            return
+        conn = self._acquire()
+        try:
+            conn.executemany(
+                "INSERT OR REPLACE INTO dir_sizes(path, ino, mtime_ns, own_bytes, subdirs) VALUES (?, ?, ?, ?, ?)",
+                [(path, ino, mtime_ns, own_bytes, SUBDIR_SEPARATOR.join(subdirs))
+                 for path, ino, mtime_ns, own_bytes, subdirs in records]
+            )
+            conn.commit()
+        finally:
+            self._release(conn)
+
+
+def list_directory(path, dev):
+    """Sum the sizes of a directory's files and find its subdirectories on the same device
+
+    Symlinks are counted as themselves and never followed; mount points are
+    not descended into, like ``du -x``.
+    """
+    own_bytes = 0
+    subdirs = []
+    with os.scandir(path) as it:
+        for dir_entry in it:
+            try:
+                st = dir_entry.stat(follow_symlinks=False)
+            except OSError:
+                continue
+            if stat.S_ISDIR(st.st_mode):
+                if st.st_dev == dev:
+                    subdirs.append(dir_entry.name)
+            elif stat.S_ISREG(st.st_mode):
+                own_bytes += st.st_size
+    return own_bytes, subdirs
+
+
+def measure_folder(path, cache=None, cancel_event=None):
+    """Get the total size of the files under a folder
+
+    Returns (bytes, cache records to store), or (None, records) when
+    cancelled. Directories with a current cache record are not listed, and
+    unreadable directories count as empty.
+    """
+    try:
+        root_st = os.stat(path, follow_symlinks=False)
+    except OSError:
+        return None, []
+    if not stat.S_ISDIR(root_st.st_mode):
+        # A symlinked folder takes no space of its own
+        return 0, []
+    dev = root_st.st_dev
+
+    # Preorder walk: every directory comes after its parent
+    parents = []
+    own_sizes = []
+    records = []
+    stack = [(path, -1)]
+    while stack:
+        if cancel_event is not None and cancel_event.is_set():
+            return None, records
+        current, parent = stack.pop()
+        try:
+            st = os.stat(current, follow_symlinks=False)
+        except OSError:
+            continue
+        cached = cache.lookup(current, st.st_ino, st.st_mtime_ns) if cache is not None else None
+        if cached is not None:
+            own_bytes, subdirs = cached
+        else:
+            try:
+                own_bytes, subdirs = list_directory(current, dev)
+            except OSError:
+                own_bytes, subdirs = 0, []
+            records.append((current, st.st_ino, st.st_mtime_ns, own_bytes, subdirs))
+
+        index = len(own_sizes)
+        parents.append(parent)
+        own_sizes.append(own_bytes)
+        stack.extend((os.path.join(current, name), index) for name in subdirs)
+
+    # Children have higher indices, so one backwards pass rolls totals up
+    totals = own_sizes
+    for index in range(len(totals) - 1, 0, -1):
+        totals[parents[index]] += totals[index]
+    return (totals[0] if totals else 0), records
+
+
+def folder_sizes(paths, cache=None, cancel_event=None, workers=None):
+    """Measure folders on a thread pool, yielding (path, bytes) as each completes
+
+    Cache records found by the workers are stored from the calling thread.
+    Folders that cannot be read are skipped.
+    """
+    workers = workers or default_worker_count()
+    pending = list(reversed(paths))
+    running = {}
+
+    with ThreadPoolExecutor(max_workers=workers, thread_name_prefix="folder-size") as pool:
+        try:
+            while pending or running:
+                if cancel_event is not None and cancel_event.is_set():
+                    return
+                while pending and len(running) < workers:
+                    path = pending.pop()
+                    running[pool.submit(measure_folder, path, cache, cancel_event)] = path
+
+                done, _ = wait(running, timeout=0.1, return_when=FIRST_COMPLETED)
+                for future in done:
+                    path = running.pop(future)
+                    total, records = future.result()
+                    if cache is not None:
+                        cache.store(records)
+                    if total is not None:
+                        yield path, total
+        finally:
+            for future in running:
+                future.cancel()
@@ -0,0 +1,102 @@
+"""
+Image metadata read without decoding pixels: embedded EXIF thumbnails and target sizes
+"""
+
+import struct
+
+# EXIF tags
+TAG_ORIENTATION = 0x0112
+TAG_THUMBNAIL_OFFSET = 0x0201
+TAG_THUMBNAIL_LENGTH = 0x0202
+
+# JPEG markers that end the header segments
+MARKER_SOS = 0xDA
+MARKER_EOI = 0xD9
+
+# EXIF orientations (1-8) as (degrees rotated clockwise, mirrored left to right before rotating)
+ORIENTATIONS = {
+    1: (0, False), 2: (0, True), 3: (180, False), 4: (180, True),
+    5: (270, True), 6: (90, False), 7: (90, True), 8: (270, False),
+}
+
+# Header segments of a JPEG are read up to this far into the file
+HEADER_SCAN_BYTES = 256 * 1024
+
+
+def fit_size(width, height, box):
+    """Get the size of width × height scaled down to fit a box × box square, never up"""
+    if width <= 0 or height <= 0:
+        return width, height
+    scale = min(1.0, box / width, box / height)
+    return max(1, round(width * scale)), max(1, round(height * scale))
+
+
+def read_ifd(tiff, offset, endian):
+    """Read a TIFF IFD as ({tag: (type, count, raw value field)}, next IFD offset)"""
+    (count,) = struct.unpack_from(endian + 'H', tiff, offset)
+    entries = {}
+    for number in range(count):
+        tag, kind, values = struct.unpack_from(endian + 'HHI', tiff, offset + 2 + number * 12)
+        entries[tag] = (kind, values, tiff[offset + 10 + number * 12:offset + 14 + number * 12])
+    (next_offset,) = struct.unpack_from(endian + 'I', tiff, offset + 2 + count * 12)
+    return entries, next_offset
+
+
+def ifd_int(entry, endian):
+    """Get the first value of a SHORT or LONG IFD entry"""
+    kind, _, field = entry
+    if kind == 3:
+        return struct.unpack_from(endian + 'H', field)[0]
+    return struct.unpack_from(endian + 'I', field)[0]
+
+
+def parse_exif_thumbnail(tiff):
+    """Get (JPEG bytes or None, orientation) from the TIFF structure of an EXIF block"""
+    endian = {b'II': '<', b'MM': '>'}.get(tiff[:2])
+    if endian is None or struct.unpack_from(endian + 'H', tiff, 2)[0] != 42:
+        return None, 1
+    ifd0, ifd1_offset = read_ifd(tiff, struct.unpack_from(endian + 'I', tiff, 4)[0], endian)
+    orientation = ifd_int(ifd0[TAG_ORIENTATION], endian) if TAG_ORIENTATION in ifd0 else 1
+    if orientation not in ORIENTATIONS:
+        orientation = 1
+    if not ifd1_offset:
+        return None, orientation
+    ifd1, _ = read_ifd(tiff, ifd1_offset, endian)
+    if TAG_THUMBNAIL_OFFSET not in ifd1 or TAG_THUMBNAIL_LENGTH not in ifd1:
+        return None, orientation
+    start = ifd_int(ifd1[TAG_THUMBNAIL_OFFSET], endian)
+    data = tiff[start:start + ifd_int(ifd1[TAG_THUMBNAIL_LENGTH], endian)]
+    if not data.startswith(b'\xff\xd8'):
+        return None, orientation
+    return data, orientation
+
+
+def read_exif_thumbnail(path):
+    """Get (embedded JPEG thumbnail bytes or None, EXIF orientation) of a JPEG file
+
+    Only the header segments are read; files that are not JPEGs or carry
+    malformed EXIF data give (None, 1).
+    """
+    try:
+        with open(path, 'rb') as f:
+            head = f.read(HEADER_SCAN_BYTES)
+    except OSError:
+        return None, 1
+    if not head.startswith(b'\xff\xd8'):
+        return None, 1
+    pos = 2
+    try:
+        while pos + 4 <= len(head):
+            if head[pos] != 0xFF:
+                break
+            marker = head[pos + 1]
+            if marker in (MARKER_SOS, MARKER_EOI):
+                break
+            (length,) = struct.unpack_from('>H', head, pos + 2)
+            segment = head[pos + 4:pos + 2 + length]
+            if marker == 0xE1 and segment.startswith(b'Exif\0\0'):
+                return parse_exif_thumbnail(segment[6:])
+            pos += 2 + length
+    except struct.error:
+        pass
+    return None, 1
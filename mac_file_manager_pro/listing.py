@@ -0,0 +1,414 @@
+"""
+Columnar storage for directory listings shown in the file manager panes
+"""
+
+import mimetypes
+import os
+import sys
+from array import array
+
+# NumPy argsorts the listing columns; without it sorts fall back to sorted(),
+# several times slower on large listings
+try:
+    import numpy as np
+    NUMPY_AVAILABLE = True
+except ImportError:
+    np = None
+    NUMPY_AVAILABLE = False
+
+# Column indices shared with FileTableModel
+COLUMN_NAME = 0
+COLUMN_SIZE = 1
+COLUMN_TYPE = 2
+COLUMN_DATE = 3
+
+# Type name used for folders in the Type column
+FOLDER_TYPE_NAME = "Folder"
+
+# Generic icon theme names per MIME major type
+GENERIC_ICON_NAMES = {
+    'image': 'image-x-generic',
+    'video': 'video-x-generic',
+    'audio': 'audio-x-generic',
+    'text': 'text-x-generic',
+}
+
+# MIME types shown with the generic archive icon
+ARCHIVE_MIME_TYPES = frozenset({
+    'application/zip', 'application/x-tar', 'application/gzip', 'application/x-gzip',
+    'application/x-7z-compressed', 'application/x-rar-compressed', 'application/vnd.rar',
+    'application/x-bzip2', 'application/x-xz', 'application/x-apple-diskimage',
+})
+
+
+def format_file_size(size_bytes):
+    """Format file size in human readable format"""
+    if size_bytes == 0:
+        return "0 B"
+
+    size_names = ["B", "KB", "MB", "GB", "TB"]
+    i = 0
+    while size_bytes >= 1024 and i < len(size_names) - 1:
+        size_bytes /= 1024.0
+        i += 1
+
+    return f"{size_bytes:.1f} {size_names[i]}"
+
+
+def file_type_name(filename):
+    """Get file type based on extension"""
+    if '.' in filename:
+        ext = filename.split('.')[-1].lower()
+        return f"{ext.upper()} File"
+    return "File"
+
+
+def icon_theme_names(filename):
+    """Get icon theme names (freedesktop naming) for a file's MIME type, most specific first"""
+    mime, _ = mimetypes.guess_type(filename, strict=False)
+    if mime is None:
+        return []
+    names = [mime.replace('/', '-')]
+    if mime in ARCHIVE_MIME_TYPES:
+        names.append('package-x-generic')
+    else:
+        generic = GENERIC_ICON_NAMES.get(mime.split('/')[0])
+        if generic is not None:
+            names.append(generic)
+    return names
+
+
+def _stable_argsort(values):
+    """Argsort a NumPy array, keeping equal values in their original order
+
+    NumPy's stable sort is a timsort for 64-bit keys, several times slower
+    than its introsort. Sort unstably instead, then put each run of equal
+    values back in index order with a second sort over (run, index) keys,
+    which is skipped when all values differ.
+    """
+    if values.dtype.kind == 'u' and values.max(initial=0) <= 0xFFFF:
+        # Small unsigned keys take NumPy's radix sort, which is stable and fast
+        return np.argsort(values.astype(np.uint16), kind='stable')
+    order = np.argsort(values)
+    ordered = values[order]
+    ties = ordered[1:] == ordered[:-1]
+    if not ties.any():
+        return order
+    # Only positions inside a run of equal values need reordering
+    tied = np.zeros(len(values), dtype=np.bool_)
+    tied[1:] = ties
+    tied[:-1] |= ties
+    runs = np.cumsum(np.concatenate(([True], ~ties)))[tied]
+    keys = runs * len(values) + order[tied]
+    keys.sort()
+    order[tied] = keys % len(values)
+    return order
+
+
+class DirectoryListing:
+    """Raw per-entry values for one directory, stored column by column
+
+    Rows are identified by their insertion index. Sizes, modification times
+    and type ids live in compact ``array`` columns; type names are kept once
+    in a shared table, and names are interned so listings of the same
+    directory share their strings. Removed entries are tombstoned in place so
+    indices held by models stay valid until the listing is cleared.
+
+    Sort keys are precomputed per entry (natural name keys come from the
+    scan), and every sort is stable over the natural name order, so ties on
+    size, type or date fall back to the name. Sorted permutations are cached
+    until the listing changes, making a repeated sort a lookup.
+    """
+
+    def __init__(self):
+        self.clear()
+
+    def clear(self):
+        """Remove all entries"""
+        self.directory = None
+        self.names = []
+        self.folded_names = []
+        self.name_keys = []  # natural sort keys
+        self.sizes = array('q')  # bytes, -1 for folders not yet measured
+        self.mtimes = array('d')
+        self.inos = array('Q')
+        self.type_ids = array('I')
+        self.is_dir = bytearray()
+        self.alive = bytearray()
+        self.type_names = []
+        self._type_ids_by_name = {}
+        self._entries_by_name = {}
+        self._orders = {}  # (column, reverse, folders_first) -> cached argsort
+
+    def copy(self):
+        """Get an independent copy of the listing, including its cached sort orders
+
+        Columns are copied wholesale, without touching individual entries, so
+        a listing built once can be shown again cheaply.
+        """
+        listing = DirectoryListing.__new__(DirectoryListing)
+        listing.directory = self.directory
+        listing.names = self.names[:]
+        listing.folded_names = self.folded_names[:]
+        listing.name_keys = self.name_keys[:]
+        listing.sizes = self.sizes[:]
+        listing.mtimes = self.mtimes[:]
+        listing.inos = self.inos[:]
+        listing.type_ids = self.type_ids[:]
+        listing.is_dir = self.is_dir[:]
+        listing.alive = self.alive[:]
+        listing.type_names = self.type_names[:]
+        listing._type_ids_by_name = self._type_ids_by_name.copy()
+        listing._entries_by_name = self._entries_by_name.copy()
+        # Cached orders are never edited in place, so both listings can share them
+        listing._orders = self._orders.copy()
+        return listing
+
+    def __len__(self):
+        # Live entries only; removed entries keep their slot in the columns
+        return len(self._entries_by_name)
+
+    def entry_index(self, name):
+        """Get the index of the live entry with a name, or None"""
+        return self._entries_by_name.get(name)
+
+    def live_indices(self):
+        """Get the indices of all live entries in insertion order"""
+        return [index for index, alive in enumerate(self.alive) if alive]
+
+    def _type_id(self, type_name):
+        """Get the id of a type name, registering it on first use"""
+        type_id = self._type_ids_by_name.get(type_name)
+        if type_id is None:
+            type_id = len(self.type_names)
+            self.type_names.append(sys.intern(type_name))
+            self._type_ids_by_name[type_name] = type_id
+        return type_id
+
+    def append(self, entries):
+        """Append scanned FileEntry objects; returns the index of the first one"""
+        first = len(self.names)
+        if entries and self.directory is None:
+            self.directory = os.path.dirname(entries[0].path)
+
+        if entries:
+            self._orders.clear()
+        intern = sys.intern
+        for entry in entries:
+            name = intern(entry.name)
+            self._entries_by_name[name] = len(self.names)
+            self.names.append(name)
+            self.folded_names.append(name.casefold())
+            self.name_keys.append(entry.name_key)
+            self.alive.append(1)
+            self.mtimes.append(entry.mtime)
+            self.inos.append(entry.ino)
+            if entry.is_dir:
+                self.sizes.append(-1)
+                self.type_ids.append(self._type_id(FOLDER_TYPE_NAME))
+                self.is_dir.append(1)
+            else:
+                self.sizes.append(entry.size)
+                self.type_ids.append(self._type_id(file_type_name(name)))
+                self.is_dir.append(0)
+        return first
+
+    def update(self, index, entry):
+        """Replace the stat values of an existing entry"""
+        self._orders.clear()
+        self.mtimes[index] = entry.mtime
+        self.inos[index] = entry.ino
+        if entry.is_dir:
+            # Keep a computed folder size until it is recomputed
+            if not self.is_dir[index]:
+                self.sizes[index] = -1
+            self.type_ids[index] = self._type_id(FOLDER_TYPE_NAME)
+            self.is_dir[index] = 1
+        else:
+            self.sizes[index] = entry.size
+            self.type_ids[index] = self._type_id(file_type_name(self.names[index]))
+            self.is_dir[index] = 0
+
+    def set_folder_size(self, index, size):
+        """Record the computed total size of a folder entry; returns whether it changed"""
+        if not self.is_dir[index] or self.sizes[index] == size:
+            return False
+        self._orders.clear()
+        self.sizes[index] = size
+        return True
+
+    def remove(self, index):
+        """Tombstone an entry"""
+        if self.alive[index]:
+            self._orders.clear()
+            self.alive[index] = 0
+            del self._entries_by_name[self.names[index]]
+
+    def diff(self, entries):
+        """Compare the live entries with a fresh scan
+
+        Returns (added, removed, changed): FileEntry objects not yet listed,
+        indices of listed entries that are gone, and (index, FileEntry) pairs
+        whose size, mtime, inode or kind changed.
+        """
+        added = []
+        changed = []
+        seen = set()
+        for entry in entries:
+            index = self._entries_by_name.get(entry.name)
+            if index is None:
+                added.append(entry)
+                continue
+            seen.add(index)
+            # Folder sizes are filled in separately, so only the mtime tells of a change
+            size_changed = not entry.is_dir and self.sizes[index] != entry.size
+            if (size_changed or self.mtimes[index] != entry.mtime or self.inos[index] != entry.ino
+                    or self.is_dir[index] != entry.is_dir):
+                changed.append((index, entry))
+        removed = [index for index in self._entries_by_name.values() if index not in seen]
+        return added, removed, changed
+
+    def path(self, index):
+        """Get the full path of an entry"""
+        return os.path.join(self.directory, self.names[index])
+
+    def type_name(self, index):
+        """Get the display type name of an entry"""
+        return self.type_names[self.type_ids[index]]
+
+    def type_ranks(self):
+        """Get the alphabetical rank of every registered type name, indexed by type id"""
+        ranked = sorted(range(len(self.type_names)), key=lambda i: self.type_names[i].casefold())
+        ranks = array('I', bytes(4 * len(self.type_names)))
+        for rank, type_id in enumerate(ranked):
+            ranks[type_id] = rank
+        return ranks
+
+    def sort_key_column(self, column):
+        """Get a per-entry raw sort key sequence for a column"""
+        if column == COLUMN_SIZE:
+            return self.sizes
+        if column == COLUMN_DATE:
+            return self.mtimes
+        if column == COLUMN_TYPE:
+            ranks = self.type_ranks()
+            return array('I', (ranks[type_id] for type_id in self.type_ids))
+        return self.name_keys
+
+    def adopt_name_order(self, entries):
+        """Record the natural name order from entries already sorted by the scan
+
+        Saves re-sorting the listing by name on the GUI thread when the scan
+        thread has sorted the same entries.
+        """
+        if len(entries) != len(self._entries_by_name):
+            return
+        try:
+            order = array('q', map(self._entries_by_name.__getitem__, (entry.name for entry in entries)))
+        except KeyError:
+            return
+        self._orders[(COLUMN_NAME, False, False)] = order
+
+    def argsort(self, column, reverse=False, folders_first=False):
+        """Get the live entry indices ordered by a column, as an array of row -> entry
+
+        Ties are broken by natural name order. With ``folders_first`` folders
+        precede files whichever way the column is sorted.
+        """
+        cache_key = (column, reverse, folders_first)
+        order = self._orders.get(cache_key)
+        if order is not None:
+            # Models edit their order in place, so hand out copies
+            return order[:]
+
+        if folders_first and 0 < self.is_dir.count(1) < len(self.is_dir):
+            is_dir = self.is_dir
+            order = self.argsort(column, reverse)
+            if NUMPY_AVAILABLE:
+                entries = np.frombuffer(order, dtype=np.int64)
+                dirs = np.frombuffer(is_dir, dtype=np.bool_)[entries]
+                order = array('q', np.concatenate((entries[dirs], entries[~dirs])).tobytes())
+            else:
+                order = array('q', [index for index in order if is_dir[index]] +
+                              [index for index in order if not is_dir[index]])
+        elif column == COLUMN_NAME:
+            if reverse:
+                order = self.argsort(COLUMN_NAME)[::-1]
+            else:
+                order = self._live(array('q', sorted(range(len(self.names)), key=self.name_keys.__getitem__)))
+        else:
+            # Stable sort over the name order, so names are the secondary key
+            order = self._argsort_by_name(column, reverse, self.argsort(COLUMN_NAME))
+
+        self._orders[cache_key] = order
+        return order[:]
+
+    def _live(self, order):
+        """Drop tombstoned entries from an order"""
+        if len(self._entries_by_name) == len(self.names):
+            return order
+        alive = self.alive
+        return array('q', (index for index in order if alive[index]))
+
+    def _argsort_by_name(self, column, reverse, name_order):
+        """Stable-sort a name-ordered permutation by a column's raw values"""
+        if NUMPY_AVAILABLE and len(name_order):
+            if column == COLUMN_TYPE:
+                ranks = np.frombuffer(self.type_ranks(), dtype=np.uint32)
+                values = ranks[np.frombuffer(self.type_ids, dtype=np.uint32)]
+            else:
+                keys = self.sort_key_column(column)
+                values = np.frombuffer(keys, dtype=np.dtype(keys.typecode))
+            permutation = np.frombuffer(name_order, dtype=np.int64)
+            values = values[permutation]
+            if reverse:
+                # Invert instead of flipping so equal keys keep their name order
+                if values.dtype.kind == 'u':
+                    values = values.max(initial=0) - values
+                else:
+                    values = -values
+            order = permutation[_stable_argsort(values)]
+            return array('q', order.tobytes())
+
+        keys = self.sort_key_column(column)
+        return array('q', sorted(name_order, key=keys.__getitem__, reverse=reverse))
+
+    def sort_key(self, column, reverse=False):
+        """Get a function mapping an entry index to a key consistent with argsort order
+
+        Keys compare ascending in the order ``argsort(column, reverse)`` lists
+        entries, except for a reversed name sort, whose keys compare descending.
+        """
+        name_keys = self.name_keys
+        if column == COLUMN_NAME:
+            return name_keys.__getitem__
+        keys = self.sort_key_column(column)
+        if reverse:
+            return lambda index: (-keys[index], name_keys[index])
+        return lambda index: (keys[index], name_keys[index])
+
+    def position_finder(self, column, reverse=False, folders_first=False):
+        """Get a function finding where an entry belongs in an order from ``argsort``"""
+        key_of = self.sort_key(column, reverse)
+        descending = reverse and column == COLUMN_NAME
+        is_dir = self.is_dir
+
+        def find_position(order, index):
+            key = key_of(index)
+            group = folders_first and not is_dir[index]
+            lo, hi = 0, len(order)
+            while lo < hi:
+                mid = (lo + hi) // 2
+                mid_group = folders_first and not is_dir[order[mid]]
+                if mid_group != group:
+                    after = mid_group > group
+                else:
+                    mid_key = key_of(order[mid])
+                    after = (mid_key < key) if descending else (mid_key > key)
+                if after:
+                    hi = mid
+                else:
+                    lo = mid + 1
+            return lo
+
+        return find_position
@@ -0,0 +1,173 @@
+"""
+Idle-time prefetching of the folders the panes are likely to show next
+"""
+
+import threading
+import time
+from collections import deque
+
+from mac_file_manager_pro.dirscan import directory_signature, iter_scan_batches, sort_entries
+
+# Most folders queued per prefetch round
+PREFETCH_MAX_FOLDERS = 8
+
+# Folders with more entries than this are left for a real visit to list
+PREFETCH_MAX_ENTRIES = 20000
+
+# Longest time spent listing one folder before giving up on it
+PREFETCH_TIME_BUDGET = 0.5
+
+# Pause between two prefetched folders, so prefetching never keeps a disk busy
+PREFETCH_PAUSE = 0.05
+
+# Visit counts fade by this factor with every visit elsewhere
+VISIT_DECAY = 0.95
+
+# Most folders whose visits are counted; the least visited are forgotten past it
+VISIT_MAX_FOLDERS = 200
+
+
+class VisitCounter:
+    """Folder visit counts that fade with every visit, so recent habits outweigh old ones
+
+    Not thread-safe: use it from one thread.
+    """
+
+    def __init__(self, max_folders=VISIT_MAX_FOLDERS, decay=VISIT_DECAY):
+        self.max_folders = max_folders
+        self.decay = decay
+        self._scores = {}  # path -> faded visit count
+
+    def __len__(self):
+        return len(self._scores)
+
+    def record(self, path):
+        """Count a visit to a folder"""
+        scores = self._scores
+        for known in scores:
+            scores[known] *= self.decay
+        scores[path] = scores.get(path, 0.0) + 1.0
+        if len(scores) > self.max_folders:
+            del scores[min(scores, key=scores.get)]
+
+    def top(self, count, exclude=()):
+        """Get up to count of the most visited folders, most visited first"""
+        ranked = sorted(self._scores, key=self._scores.get, reverse=True)
+        return [path for path in ranked if path not in exclude][:count]
+
+
+class Prefetcher:
+    """Background thread listing likely next folders into a ListingCache
+
+    Folders are listed one at a time, in the order given, with a pause
+    between them. Foreground work always wins: ``hold()`` abandons the
+    folder being listed at its next entry and nothing more is listed until
+    ``release()``; an abandoned folder is retried first. Budgets are strict:
+    a folder that is too large or too slow to list is skipped, and a
+    listing is only cached if it fits in the cache's free room, so
+    prefetching never evicts a listing a pane has shown.
+
+    ``on_listed(listing)`` is called from the prefetch thread with each
+    CachedListing it adds.
+    """
+
+    def __init__(self, cache, on_listed=None, max_entries=PREFETCH_MAX_ENTRIES,
+                 time_budget=PREFETCH_TIME_BUDGET, pause=PREFETCH_PAUSE):
+        self.cache = cache
+        self.max_entries = max_entries
+        self.time_budget = time_budget
+        self.pause = pause
+        self.listed = 0
+        self.skipped = 0
+        self._on_listed = on_listed
+        self._cond = threading.Condition()
+        self._queue = deque()
+        self._held = False
+        self._stopping = False
+        self._cancel = threading.Event()
+        self._thread = threading.Thread(target=self._work, name="prefetch", daemon=True)
+        self._thread.start()
+
+    def prefetch(self, paths):
+        """Replace the queued folders with paths, most likely first; returns how many were queued"""
+        with self._cond:
+            self._queue.clear()
+            for path in paths:
+                if len(self._queue) >= PREFETCH_MAX_FOLDERS:
+                    break
+                if path not in self._queue:
+                    self._queue.append(path)
+            self._cond.notify()
+            return len(self._queue)
+
+    def pending(self):
+        """Get the number of queued folders"""
+        with self._cond:
+            return len(self._queue)
+
+    def hold(self):
+        """Stop prefetching while foreground work runs"""
+        with self._cond:
+            self._held = True
+            self._cancel.set()
+
+    def release(self):
+        """Resume prefetching after hold()"""
+        with self._cond:
+            self._held = False
+            self._cond.notify()
+
+    def shutdown(self, timeout=None):
+        """Drop queued folders and stop the thread"""
+        with self._cond:
+            self._stopping = True
+            self._queue.clear()
+            self._cancel.set()
+            self._cond.notify()
+        self._thread.join(timeout)
+
+    def _work(self):
+        while True:
+            with self._cond:
+                while (self._held or not self._queue) and not self._stopping:
+                    self._cond.wait()
+                if self._stopping:
+                    return
+                path = self._queue.popleft()
+                self._cancel.clear()
+            listing = self._list(path)
+            if self._cancel.is_set():
+                # Interrupted by hold(): list it first once the foreground is done
+                with self._cond:
+                    if not self._stopping and path not in self._queue:
+                        self._queue.appendleft(path)
+                continue
+            if listing is not None and self._on_listed is not None:
+                self._on_listed(listing)
+            # hold() and shutdown() cut the pause short
+            self._cancel.wait(self.pause)
+
+    def _list(self, path):
+        """List a folder into the cache; None if it is cached already, over budget or unreadable"""
+        if self.cache.is_current(path):
+            return None
+        deadline = time.monotonic() + self.time_budget
+        folders = []
+        files = []
+        try:
+            signature = directory_signature(path)
+            for batch_folders, batch_files in iter_scan_batches(path, cancel_event=self._cancel):
+                folders.extend(batch_folders)
+                files.extend(batch_files)
+                if len(folders) + len(files) > self.max_entries or time.monotonic() > deadline:
+                    self.skipped += 1
+                    return None
+        except OSError:
+            return None
+        if self._cancel.is_set():
+            return None
+        if self.cache.total_entries + len(folders) + len(files) > self.cache.max_entries:
+            self.skipped += 1
+            return None
+        self.listed += 1
+        return self.cache.put(path, sort_entries(folders), sort_entries(files), signature)
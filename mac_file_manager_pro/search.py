@@ -0,0 +1,240 @@
+"""
+Match engine for filtering directory listings by name
+"""
+
+import heapq
+import operator
+import re
+from itertools import compress, repeat
+
+# Match modes offered by the pane search boxes
+MATCH_SUBSTRING = "Contains"
+MATCH_GLOB = "Glob"
+MATCH_REGEX = "Regex"
+MATCH_FUZZY = "Fuzzy"
+MATCH_MODES = (MATCH_SUBSTRING, MATCH_GLOB, MATCH_REGEX, MATCH_FUZZY)
+
+# Fuzzy scoring weights
+SCORE_MATCH = 16
+SCORE_GAP = 3
+SCORE_GAP_START = 1
+SCORE_BOUNDARY = 8
+BOUNDARY_CHARS = frozenset(" _-.()[]/")
+
+# Fuzzy results larger than this have only their best RANK_LIMIT matches put
+# in score order, followed by the rest in listing order
+RANK_LIMIT = 10000
+
+
+class Matcher:
+    """A compiled query, tested against case-folded names
+
+    Subclasses compile the query into a regex whose ``search`` or ``match``
+    method is the per-name test, so a full pass over a listing runs as
+    ``map`` + ``compress`` without a Python frame per name. Queries that
+    reduce to a plain substring set ``_literal`` instead, and are tested
+    with ``str.__contains__``, about three times faster than the regex.
+    """
+
+    mode = None
+    ranked = False  # whether results are shown in score order
+
+    def __init__(self, query):
+        self.query = query
+        self._test = None
+        self._literal = None
+
+    def search(self, names, candidates=None):
+        """Get the indices of matching names, optionally only among candidates"""
+        literal = self._literal
+        if literal is not None:
+            if candidates is None:
+                return list(compress(range(len(names)), map(operator.contains, names, repeat(literal))))
+            return [index for index in candidates if literal in names[index]]
+        test = self._test
+        if candidates is None:
+            return list(compress(range(len(names)), map(test, names)))
+        return [index for index in candidates if test(names[index])]
+
+    def refines(self, previous):
+        """Check whether every match of this query also matched a previous matcher"""
+        return False
+
+    def scores(self, names, indices):
+        """Get a score per index, higher is better"""
+        return [-len(names[index]) for index in indices]
+
+    def rank(self, names, indices):
+        """Order indices by descending score, then by name"""
+        scores = dict(zip(indices, self.scores(names, indices)))
+        return sorted(indices, key=lambda index: (-scores[index], names[index]))
+
+
+class SubstringMatcher(Matcher):
+    """Case-insensitive substring match"""
+
+    mode = MATCH_SUBSTRING
+
+    def __init__(self, query):
+        super().__init__(query.casefold())
+        self._test = re.compile(re.escape(self.query)).search
+        self._literal = self.query
+
+    def refines(self, previous):
+        return isinstance(previous, SubstringMatcher) and previous.query in self.query
+
+    def scores(self, names, indices):
+        # Earlier occurrences first, then shorter names
+        query = self.query
+        return [-(names[index].find(query) * 256 + len(names[index])) for index in indices]
+
+
+def glob_to_regex(pattern):
+    """Translate a shell glob (``*``, ``?``, ``[...]``) into a regex matching whole names"""
+    parts = []
+    i = 0
+    while i < len(pattern):
+        char = pattern[i]
+        i += 1
+        if char == '*':
+            # Collapse runs of stars so the regex cannot backtrack quadratically
+            while i < len(pattern) and pattern[i] == '*':
+                i += 1
+            parts.append('.*')
+        elif char == '?':
+            parts.append('.')
+        elif char == '[':
+            end = pattern.find(']', i + 1 if pattern[i:i + 1] in ('!', ']') else i)
+            if end == -1:
+                parts.append(r'\[')
+                continue
+            body = pattern[i:end]
+            i = end + 1
+            if body.startswith('!'):
+                body = '^' + body[1:]
+            parts.append('[' + body.replace('\\', r'\\') + ']')
+        else:
+            parts.append(re.escape(char))
+    return ''.join(parts) + r'\Z'
+
+
+class GlobMatcher(Matcher):
+    """Shell-style glob over the whole name, such as ``*.mov``"""
+
+    mode = MATCH_GLOB
+
+    def __init__(self, query):
+        super().__init__(query.casefold())
+        self._test = re.compile(glob_to_regex(self.query), re.DOTALL).match
+
+
+class RegexMatcher(Matcher):
+    """Case-insensitive regular expression searched anywhere in the name"""
+
+    mode = MATCH_REGEX
+
+    def __init__(self, query):
+        super().__init__(query)
+        try:
+            self._test = re.compile(query, re.IGNORECASE).search
+        except re.error as e:
+            raise ValueError(f"Invalid regular expression: {e}") from e
+
+
+class FuzzyMatcher(Matcher):
+    """Subsequence match ranked by how tightly and where the characters match
+
+    The filter regex uses a negated class between characters (``a[^b]*b``)
+    so a failed attempt never backtracks. Scoring tightens the leftmost match
+    from its last character backwards, then rewards word-boundary starts and
+    penalizes gaps, in the spirit of fzf.
+    """
+
+    mode = MATCH_FUZZY
+    ranked = True
+
+    def __init__(self, query):
+        super().__init__(query.casefold())
+        chars = [re.escape(char) for char in self.query]
+        pattern = chars[0] + ''.join(f'[^{char}]*{char}' for char in chars[1:])
+        self._test = re.compile(pattern, re.DOTALL).search
+        if len(self.query) == 1:
+            # The first keystroke matches the most names; a subsequence of one is a substring
+            self._literal = self.query
+
+    def refines(self, previous):
+        if not isinstance(previous, FuzzyMatcher):
+            return False
+        # A superset subsequence can only match names the shorter one matched
+        it = iter(self.query)
+        return all(char in it for char in previous.query)
+
+    def scores(self, names, indices):
+        query = self.query
+        last = len(query) - 1
+        search = self._test
+        result = []
+        for index in indices:
+            name = names[index]
+            match = search(name)
+            if match is None:
+                result.append(-1 << 30)
+                continue
+            # Walk back from the last character to find the tightest window
+            end = match.end() - 1
+            start = end
+            for char in query[last - 1::-1] if last else ():
+                start = name.rfind(char, 0, start)
+            score = SCORE_MATCH * len(query) - SCORE_GAP * (end - start - last)
+            if start == 0 or name[start - 1] in BOUNDARY_CHARS:
+                score += SCORE_BOUNDARY
+            else:
+                score -= SCORE_GAP_START * min(start, 8)
+            result.append(score)
+        return result
+
+    def rank(self, names, indices):
+        """Order indices best match first; past RANK_LIMIT only the best are ranked
+
+        Large result sets keep the top RANK_LIMIT matches, picked with
+        ``heapq.nlargest`` over packed integer keys, in score order, and
+        list the remaining matches after them in their original order.
+        """
+        scores = self.scores(names, indices)
+        positions = range(len(indices))
+        rest = []
+        if len(indices) > RANK_LIMIT:
+            # Score first, then shorter names; lengths fit in the low 16 bits
+            keys = [score * 65536 - min(len(names[index]), 65535) for score, index in zip(scores, indices)]
+            positions = heapq.nlargest(RANK_LIMIT, positions, key=keys.__getitem__)
+            best = set(positions)
+            rest = [index for position, index in enumerate(indices) if position not in best]
+        # Higher score first; shorter names win ties
+        order = sorted(positions, key=lambda i: (-scores[i], len(names[indices[i]]), names[indices[i]]))
+        return [indices[i] for i in order] + rest
+
+
+MATCHERS = {
+    MATCH_SUBSTRING: SubstringMatcher,
+    MATCH_GLOB: GlobMatcher,
+    MATCH_REGEX: RegexMatcher,
+    MATCH_FUZZY: FuzzyMatcher,
+}
+
+
+def compile_matcher(query, mode=MATCH_SUBSTRING):
+    """Compile a search query for a match mode, or None for an empty query
+
+    Raises ValueError for a malformed regular expression.
+    """
+    if not query:
+        return None
+    return MATCHERS[mode](query)
+
+
+def search_names(names, query, mode=MATCH_SUBSTRING):
+    """Get the indices of case-folded names matching a query, ranked by score"""
+    matcher = compile_matcher(query, mode)
+    if matcher is None:
+        return list(range(len(names)))
+    return matcher.rank(names, matcher.search(names))
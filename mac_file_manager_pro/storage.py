@@ -0,0 +1,56 @@
+"""
+Locations of the file manager's persistent data and caches
+"""
+
+import json
+import os
+import sys
+
+APP_NAME = "MAC File Manager Pro"
+APP_SLUG = "mac-file-manager-pro"
+
+
+def app_data_dir():
+    """Get (and create) the directory for user data such as bookmarks"""
+    if sys.platform == 'darwin':
+        path = os.path.expanduser(os.path.join("~/Library/Application Support", APP_NAME))
+    else:
+        base = os.environ.get('XDG_DATA_HOME') or os.path.expanduser("~/.local/share")
+        path = os.path.join(base, APP_SLUG)
+    os.makedirs(path, exist_ok=True)
+    return path
+
+
+def app_cache_dir():
+    """Get (and create) the directory for rebuildable caches such as indexes"""
+    if sys.platform == 'darwin':
+        path = os.path.expanduser(os.path.join("~/Library/Caches", APP_NAME))
+    else:
+        base = os.environ.get('XDG_CACHE_HOME') or os.path.expanduser("~/.cache")
+        path = os.path.join(base, APP_SLUG)
+    os.makedirs(path, exist_ok=True)
+    return path
+
+
+def bookmarks_path():
+    """Get the path of the bookmarks file"""
+    return os.path.join(app_data_dir(), "bookmarks.json")
+
+
+def load_bookmarks(path=None):
+    """Load the list of bookmarked folders, or an empty list"""
+    try:
+        with open(path or bookmarks_path(), 'r', encoding='utf-8') as f:
+            bookmarks = json.load(f)
+    except (OSError, ValueError):
+        return []
+    return [bookmark for bookmark in bookmarks if isinstance(bookmark, str)]
+
+
+def save_bookmarks(bookmarks, path=None):
+    """Write the list of bookmarked folders atomically"""
+    path = path or bookmarks_path()
+    tmp_path = path + ".tmp"
+    with open(tmp_path, 'w', encoding='utf-8') as f:
+        json.dump(list(bookmarks), f, indent=2)
+    os.replace(tmp_path, path)
@@ -0,0 +1,403 @@
+"""
+Thumbnail job scheduling: long-lived worker threads fed by a priority queue
+"""
+
+import heapq
+import logging
+import os
+import plistlib
+import re
+import subprocess
+import sys
+import threading
+from collections import Counter, OrderedDict, defaultdict
+
+logger = logging.getLogger(__name__)
+
+# Storage kinds, used as lanes with their own concurrency limits
+STORAGE_SSD = "ssd"
+STORAGE_HDD = "hdd"
+STORAGE_NETWORK = "network"
+
+# Lane for thumbnails read back from the local thumbnail store
+LANE_STORED = "stored"
+
+# Filesystem types served over the network
+NETWORK_FILESYSTEMS = frozenset({
+    'nfs', 'nfs4', 'smbfs', 'cifs', 'smb3', 'afpfs', 'webdav', 'davfs', 'ftp',
+    'sshfs', 'fuse.sshfs', 'fuse.rclone', '9p',
+})
+
+# Edge lengths of the thumbnail pyramid kept per file; any icon size is drawn from the nearest
+THUMBNAIL_LEVELS = (32, 64, 128, 256)
+
+# Lines of `mount` output: "dev on /path type fs (...)" on Linux, "dev on /path (fs, ...)" on macOS
+MOUNT_LINE = re.compile(r'^(?P<device>.+?) on (?P<mount_point>.+?) (?:type (?P<type>\S+) )?\((?P<options>[^)]*)\)$')
+
+
+def default_thread_count():
+    """Get the thumbnail pool size: one thread per core, within reason
+
+    Decoding holds the GIL only briefly (Qt and OpenCV release it), so
+    threads scale with cores; past eight the disk is the bottleneck.
+    """
+    return max(2, min(8, os.cpu_count() or 4))
+
+
+def default_lane_limits(threads=None):
+    """Get the number of jobs allowed to run at once per storage kind
+
+    Solid-state disks serve parallel reads well; a spinning disk seeks
+    between concurrent readers, so it gets two; network shares are bound by
+    latency and get a few. Stored thumbnails are small local reads.
+    """
+    threads = threads or default_thread_count()
+    return {STORAGE_SSD: threads, STORAGE_HDD: 2, STORAGE_NETWORK: min(threads, 4), LANE_STORED: threads}
+
+
+def pyramid_level(size, levels=THUMBNAIL_LEVELS):
+    """Get the smallest pyramid level at least as large as an icon size, or the largest level"""
+    for level in levels:
+        if level >= size:
+            return level
+    return levels[-1]
+
+
+def pyramid_plan(image_size, requested, levels=THUMBNAIL_LEVELS):
+    """Get the pyramid levels a decoded thumbnail can fill
+
+    Returns {level: edge length to scale to, or None to keep the image}.
+    Levels up to the image's longer edge are scaled down from it. Larger
+    levels would need upscaling, so only the requested one is filled, with
+    the image as is: the source itself is that small.
+    """
+    plan = {}
+    for level in levels:
+        if level < image_size:
+            plan[level] = level
+        elif level == image_size or level == requested:
+            plan[level] = None
+    return plan
+
+
+def read_mount_table():
+    """List (mount point, device, filesystem type), longest mount point first"""
+    mounts = []
+    if os.path.exists('/proc/mounts'):
+        with open('/proc/mounts', encoding='utf-8', errors='replace') as f:
+            for line in f:
+                fields = line.split()
+                if len(fields) >= 3:
+                    # Spaces in paths are escaped as octal
+                    mount_point = fields[1].replace('\\040', ' ')
+                    mounts.append((mount_point, fields[0], fields[2]))
+    else:
+        try:
+            output = subprocess.run(['mount'], capture_output=True, text=True, timeout=5).stdout
+        except (OSError, subprocess.SubprocessError):
+            output = ''
+        for line in output.splitlines():
+            match = MOUNT_LINE.match(line.strip())
+            if match is None:
+                continue
+            fstype = match.group('type') or match.group('options').split(',')[0].strip()
+            mounts.append((match.group('mount_point'), match.group('device'), fstype))
+    mounts.sort(key=lambda mount: len(mount[0]), reverse=True)
+    return mounts
+
+
+def is_rotational(device):
+    """Check whether a block device is a spinning disk; unknown devices count as solid-state"""
+    if not device.startswith('/dev/'):
+        return False
+    if sys.platform == 'darwin':
+        try:
+            output = subprocess.run(['diskutil', 'info', '-plist', device],
+                                    capture_output=True, timeout=5).stdout
+            return plistlib.loads(output).get('SolidState', True) is False
+        except (OSError, subprocess.SubprocessError, plistlib.InvalidFileException, ValueError):
+            return False
+    # A partition's sysfs entry sits inside its disk's, which has the queue
+    sys_path = os.path.realpath(os.path.join('/sys/class/block', os.path.basename(os.path.realpath(device))))
+    for candidate in (sys_path, os.path.dirname(sys_path)):
+        try:
+            with open(os.path.join(candidate, 'queue', 'rotational')) as f:
+                return f.read().strip() == '1'
+        except OSError:
+            continue
+    return False
+
+
+def classify_mount(device, fstype):
+    """Get the storage kind of a mounted filesystem"""
+    if fstype.lower() in NETWORK_FILESYSTEMS or device.startswith('//'):
+        return STORAGE_NETWORK
+    return STORAGE_HDD if is_rotational(device) else STORAGE_SSD
+
+
+class StorageClassifier:
+    """Maps paths to storage kinds, probing each mounted filesystem once"""
+
+    def __init__(self, mounts=None):
+        self._mounts = mounts
+        self._kinds = {}
+        self._lock = threading.Lock()
+
+    def refresh(self):
+        """Forget the mount table, e.g. after a volume was mounted"""
+        with self._lock:
+            self._mounts = None
+            self._kinds = {}
+
+    def kind(self, path):
+        """Get the storage kind holding a path"""
+        with self._lock:
+            if self._mounts is None:
+                self._mounts = read_mount_table()
+            for mount_point, device, fstype in self._mounts:
+                if path == mount_point or path.startswith(mount_point.rstrip(os.sep) + os.sep):
+                    kind = self._kinds.get(mount_point)
+                    if kind is None:
+                        kind = self._kinds[mount_point] = classify_mount(device, fstype)
+                    return kind
+        return STORAGE_SSD
+
+
+class LRUCache:
+    """A least-recently-used cache bounded by the bytes its values take
+
+    ``cost(value)`` gives a value's size in bytes. Adding a value evicts the
+    least recently used ones until the total fits the budget again; a value
+    larger than the whole budget is not kept. Hits, misses and evictions
+    are counted. Not thread-safe: use it from one thread.
+    """
+
+    def __init__(self, max_bytes, cost):
+        self.max_bytes = max_bytes
+        self.cost = cost
+        self.bytes_used = 0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self._items = OrderedDict()  # key -> (value, cost)
+
+    def __len__(self):
+        return len(self._items)
+
+    def __contains__(self, key):
+        return key in self._items
+
+    def get(self, key, default=None):
+        """Get a value and mark it most recently used"""
+        item = self._items.get(key)
+        if item is None:
+            self.misses += 1
+            return default
+        self.hits += 1
+        self._items.move_to_end(key)
+        return item[0]
+
+    def put(self, key, value):
+        """Add or replace a value, evicting the least recently used ones past the budget"""
+        self.pop(key)
+        cost = self.cost(value)
+        if cost > self.max_bytes:
+            return
+        self._items[key] = (value, cost)
+        self.bytes_used += cost
+        self._evict()
+
+    def pop(self, key):
+        """Remove a value; returns it, or None if missing"""
+        item = self._items.pop(key, None)
+        if item is None:
+            return None
+        self.bytes_used -= item[1]
+        return item[0]
+
+    def set_max_bytes(self, max_bytes):
+        """Change the budget, evicting right away if it shrank"""
+        self.max_bytes = max_bytes
+        self._evict()
+
+    def clear(self):
+        """Remove every value; counters are kept"""
+        self._items.clear()
+        self.bytes_used = 0
+
+    def stats(self):
+        """Get the counters and the current size as a dict"""
+        return {
+            'entries': len(self._items), 'bytes': self.bytes_used, 'max_bytes': self.max_bytes,
+            'hits': self.hits, 'misses': self.misses, 'evictions': self.evictions,
+        }
+
+    def _evict(self):
+        while self.bytes_used > self.max_bytes:
+            _, (_, cost) = self._items.popitem(last=False)
+            self.bytes_used -= cost
+            self.evictions += 1
+
+
+class _Job:
+    __slots__ = ('key', 'fn', 'args', 'priority', 'group', 'lane', 'seq')
+
+    def __init__(self, key, fn, args, priority, group, lane, seq):
+        self.key = key
+        self.fn = fn
+        self.args = args
+        self.priority = priority
+        self.group = group
+        self.lane = lane
+        self.seq = seq
+
+
+class ThumbnailPool:
+    """A fixed set of worker threads running keyed jobs, lowest priority value first
+
+    Threads are started once and reused for the pool's lifetime. Jobs are
+    keyed (by file path) so a job already queued or running is not added
+    twice, and carry a group (the folder they were requested for) so
+    everything queued for a folder can be dropped when it is left. Each job
+    runs in a lane, its storage kind, and a lane never has more jobs running
+    than its limit; the free threads then serve other lanes.
+
+    ``handler(key, result, error)`` is called from the worker thread once a
+    job finishes, including jobs cancelled while already running.
+    """
+
+    def __init__(self, handler, threads=None, lane_limits=None):
+        threads = threads or default_thread_count()
+        self._handler = handler
+        self._lane_limits = lane_limits or default_lane_limits(threads)
+        self._cond = threading.Condition()
+        self._heaps = defaultdict(list)  # lane -> [(priority, seq, job)]; stale entries are skipped
+        self._queued = {}  # key -> job
+        self._running = set()  # keys
+        self._lane_running = Counter()
+        self._seq = 0
+        self._stopping = False
+        self._threads = [
+            threading.Thread(target=self._work, name=f"thumbnail-{number}", daemon=True)
+            for number in range(threads)
+        ]
+        for thread in self._threads:
+            thread.start()
+
+    def submit(self, key, fn, args=(), priority=0, group=None, lane=STORAGE_SSD):
+        """Queue fn(*args) under a key; returns False if the key is already running
+
+        Submitting a queued key again moves it to the new priority and group.
+        Jobs of equal priority run in submission order.
+        """
+        with self._cond:
+            if self._stopping or key in self._running:
+                return False
+            self._seq += 1
+            job = self._queued.get(key)
+            if job is None:
+                job = self._queued[key] = _Job(key, fn, args, priority, group, lane, self._seq)
+            else:
+                job.priority, job.group, job.lane, job.seq = priority, group, lane, self._seq
+            heapq.heappush(self._heaps[lane], (priority, self._seq, job))
+            self._compact_if_stale()
+            self._cond.notify()
+            return True
+
+    def cancel(self, key):
+        """Drop a queued job; returns whether it was queued"""
+        with self._cond:
+            if self._queued.pop(key, None) is None:
+                return False
+            self._compact_if_stale()
+            return True
+
+    def cancel_group(self, group):
+        """Drop every queued job of a group; returns how many were dropped"""
+        with self._cond:
+            dropped = [key for key, job in self._queued.items() if job.group == group]
+            for key in dropped:
+                del self._queued[key]
+            if dropped:
+                self._compact()
+            return len(dropped)
+
+    def pending(self):
+        """Get the number of queued and running jobs"""
+        with self._cond:
+            return len(self._queued) + len(self._running)
+
+    def shutdown(self, timeout=None):
+        """Drop queued jobs and stop the threads once their running jobs finish"""
+        with self._cond:
+            self._stopping = True
+            self._queued.clear()
+            self._heaps.clear()
+            self._cond.notify_all()
+        for thread in self._threads:
+            thread.join(timeout)
+
+    def _compact(self):
+        """Rebuild the heaps without entries of dropped or resubmitted jobs"""
+        for lane, heap in list(self._heaps.items()):
+            live = [entry for entry in heap if self._is_live(entry)]
+            heapq.heapify(live)
+            self._heaps[lane] = live
+
+    def _compact_if_stale(self):
+        """Compact once stale heap entries outnumber live ones
+
+        Re-prioritising while scrolling pushes a new entry per job and leaves
+        the old one behind; compacting at this ratio keeps the heaps within
+        about twice the queue size at amortized constant cost. Small heaps
+        are left alone.
+        """
+        if sum(map(len, self._heaps.values())) > 2 * len(self._queued) + 64:
+            self._compact()
+
+    def _is_live(self, entry):
+        job = entry[2]
+        return self._queued.get(job.key) is job and job.seq == entry[1]
+
+    def _take_job(self):
+        """Pop the best queued job among the lanes with room, or None"""
+        best = None
+        for lane, heap in self._heaps.items():
+            if self._lane_running[lane] >= self._lane_limits.get(lane, 1):
+                continue
+            while heap and not self._is_live(heap[0]):
+                heapq.heappop(heap)
+            if heap and (best is None or heap[0][:2] < self._heaps[best][0][:2]):
+                best = lane
+        job = None
+        if best is not None:
+            job = heapq.heappop(self._heaps[best])[2]
+            del self._queued[job.key]
+            self._running.add(job.key)
+            self._lane_running[job.lane] += 1
+        return job
+
+    def _work(self):
+        while True:
+            with self._cond:
+                job = self._take_job()
+                while job is None and not self._stopping:
+                    self._cond.wait()
+                    job = self._take_job()
+                if job is None:
+                    return
+            result = error = None
+            try:
+                result = job.fn(*job.args)
+            except Exception as e:
+                error = e
+            with self._cond:
+                self._running.discard(job.key)
+                self._lane_running[job.lane] -= 1
+                # A lane slot opened up; a thread may have skipped its jobs
+                self._cond.notify_all()
+            try:
+                self._handler(job.key, result, error)
+            except Exception:
+                # A failing handler must not take a worker thread down with it
+                logger.exception(f"Thumbnail handler failed for {job.key}")
@@ -0,0 +1,175 @@
+"""
+Persistent thumbnail store: encoded thumbnails packed into one SQLite file
+"""
+
+import queue
+import sqlite3
+import threading
+import time
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS thumbnails (
+    path TEXT NOT NULL,
+    thumb_size INTEGER NOT NULL,
+    file_size INTEGER NOT NULL,
+    mtime_ns INTEGER NOT NULL,
+    data BLOB NOT NULL,
+    stored_at REAL NOT NULL,
+    PRIMARY KEY (path, thumb_size)
+);
+CREATE INDEX IF NOT EXISTS thumbnails_stored_at ON thumbnails(stored_at);
+"""
+
+# Writes queued by put() are committed in batches of up to this many
+WRITE_BATCH = 256
+
+# Stored thumbnails are pruned, oldest first, to stay under this size
+STORE_MAX_BYTES = 512 * 1024 * 1024
+
+# An empty blob records a file that has no thumbnail, so it is not retried
+NO_THUMBNAIL = b''
+
+_STOP = object()
+
+
+class ThumbnailStore:
+    """Encoded thumbnails keyed by (path, thumbnail size), valid for one (file size, mtime)
+
+    Lookups may come from any thread and borrow a connection from a small
+    pool. Writes are queued and committed by a background thread in
+    batches, so the threads rendering thumbnails never wait on the disk.
+    The database runs in WAL mode so lookups proceed during writes.
+    """
+
+    def __init__(self, db_path):
+        self.db_path = db_path
+        self._idle = queue.SimpleQueue()
+        self._lock = threading.Lock()
+        self._connections = []
+        conn = self._acquire()
+        conn.execute("PRAGMA journal_mode=WAL")
+        conn.executescript(SCHEMA)
+        conn.commit()
+        self._release(conn)
+        self._writes = queue.SimpleQueue()
+        self._writer = threading.Thread(target=self._write_loop, name="thumbnail-store", daemon=True)
+        self._writer.start()
+
+    def _acquire(self):
+        """Borrow an idle connection, opening one if none is free"""
+        try:
+            return self._idle.get_nowait()
+        except queue.Empty:
+            pass
+        conn = sqlite3.connect(self.db_path, timeout=30, check_same_thread=False)
+        conn.execute("PRAGMA synchronous=NORMAL")
+        with self._lock:
+            self._connections.append(conn)
+        return conn
+
+    def _release(self, conn):
+        """Return a borrowed connection"""
+        self._idle.put(conn)
+
+    def close(self):
+        """Commit queued writes and close every connection; call once no lookups are running"""
+        self._writes.put(_STOP)
+        self._writer.join()
+        with self._lock:
+            for conn in self._connections:
+                conn.close()
+            self._connections = []
+        self._idle = queue.SimpleQueue()
+
+    def contains(self, path, thumb_size):
+        """Check whether any thumbnail is stored for a path, current or not"""
+        conn = self._acquire()
+        try:
+            row = conn.execute(
+                "SELECT 1 FROM thumbnails WHERE path = ? AND thumb_size = ?", (path, thumb_size)
+            ).fetchone()
+        finally:
+            self._release(conn)
+        return row is not None
+
+    def get(self, path, thumb_size, file_size, mtime_ns):
+        """Get the encoded thumbnail of a file version, NO_THUMBNAIL, or None if missing or stale"""
+        conn = self._acquire()
+        try:
+            row = conn.execute(
+                "SELECT data FROM thumbnails WHERE path = ? AND thumb_size = ? AND file_size = ? AND mtime_ns = ?",
+                (path, thumb_size, file_size, mtime_ns)
+            ).fetchone()
+        finally:
+            self._release(conn)
+        return bytes(row[0]) if row else None
+
+    def put(self, path, thumb_size, file_size, mtime_ns, data):
+        """Queue an encoded thumbnail (or NO_THUMBNAIL) for a file version to be written"""
+        self._writes.put((path, thumb_size, file_size, mtime_ns, data, time.time()))
+
+    def flush(self):
+        """Wait until every write queued so far is committed"""
+        done = threading.Event()
+        self._writes.put(done)
+        done.wait()
+
+    def total_bytes(self):
+        """Get the size of the stored thumbnails"""
+        conn = self._acquire()
+        try:
+            return conn.execute("SELECT COALESCE(SUM(LENGTH(data)), 0) FROM thumbnails").fetchone()[0]
+        finally:
+            self._release(conn)
+
+    def prune(self, max_bytes=STORE_MAX_BYTES):
+        """Delete the oldest thumbnails until the rest fit in max_bytes; returns how many went"""
+        conn = self._acquire()
+        try:
+            total = 0
+            cutoff = None
+            for stored_at, length in conn.execute(
+                    "SELECT stored_at, LENGTH(data) FROM thumbnails ORDER BY stored_at DESC"):
+                total += length
+                if total > max_bytes:
+                    cutoff = stored_at
+                    break
+            if cutoff is None:
+                return 0
+            deleted = conn.execute("DELETE FROM thumbnails WHERE stored_at <= ?", (cutoff,)).rowcount
+            conn.commit()
+            return deleted
+        finally:
+            self._release(conn)
+
+    def _write_loop(self):
+        conn = sqlite3.connect(self.db_path, timeout=30)
+        conn.execute("PRAGMA synchronous=NORMAL")
+        try:
+            stopping = False
+            while not stopping:
+                batch = [self._writes.get()]
+                while len(batch) < WRITE_BATCH:
+                    try:
+                        batch.append(self._writes.get_nowait())
+                    except queue.Empty:
+                        break
+                records = [item for item in batch if isinstance(item, tuple)]
+                if records:
+                    try:
+                        conn.executemany(
+                            "INSERT OR REPLACE INTO thumbnails"
+                            "(path, thumb_size, file_size, mtime_ns, data, stored_at) VALUES (?, ?, ?, ?, ?, ?)",
+                            records
+                        )
+                        conn.commit()
+                    except sqlite3.Error:
+                        # Thumbnails can always be rendered again
+                        conn.rollback()
+                for item in batch:
+                    if item is _STOP:
+                        stopping = True
+                    elif isinstance(item, threading.Event):
+                        item.set()
+        finally:
+            conn.close()
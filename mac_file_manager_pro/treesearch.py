@@ -0,0 +1,95 @@
+"""
+Recursive name search over a directory tree using a pool of scandir threads
+"""
+
+import os
+from collections import deque
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+
+from mac_file_manager_pro.dirscan import entry_from_dir_entry
+
+# Directories never descended into: VCS metadata, dependency and build
+# caches, and macOS volume bookkeeping
+DEFAULT_IGNORED_DIRS = frozenset({
+    '.git', '.hg', '.svn', 'node_modules', '__pycache__', '.venv', 'venv',
+    '.tox', '.mypy_cache', '.pytest_cache', '.cache', '.Trash', '.Trashes',
+    '.Spotlight-V100', '.fseventsd', '.DocumentRevisions-V100',
+})
+
+
+def default_worker_count():
+    """Get the scan pool size; directory reads block on I/O, so oversubscribe the cores"""
+    return min(32, (os.cpu_count() or 4) * 2)
+
+
+def scan_for_matches(path, matcher, ignored=DEFAULT_IGNORED_DIRS, include_hidden=False):
+    """List one directory, returning (subdirectory paths, matching FileEntry objects)
+
+    Only matching entries are stat'ed; subdirectories are found from the
+    directory entry type, and symlinked directories are not followed.
+    """
+    subdirs = []
+    candidates = []
+    with os.scandir(path) as it:
+        for dir_entry in it:
+            name = dir_entry.name
+            if not include_hidden and name.startswith('.'):
+                continue
+            candidates.append(dir_entry)
+            try:
+                if dir_entry.is_dir(follow_symlinks=False) and name not in ignored:
+                    subdirs.append(dir_entry.path)
+            except OSError:
+                pass
+
+    matches = []
+    folded = [dir_entry.name.casefold() for dir_entry in candidates]
+    for index in matcher.search(folded):
+        entry = entry_from_dir_entry(candidates[index], include_hidden)
+        if entry is not None:
+            matches.append(entry)
+    return subdirs, matches
+
+
+def search_tree(root, matcher, max_results=None, cancel_event=None, workers=None,
+                ignored=DEFAULT_IGNORED_DIRS, include_hidden=False):
+    """Search a directory tree by name, yielding lists of matching FileEntry objects
+
+    Directories are read breadth-first by a pool of threads (scandir and
+    stat release the GIL), with a bounded number of reads in flight.
+    Results are yielded per directory as soon as its read completes, so the
+    first matches arrive before the walk is anywhere near done. Unreadable
+    directories are skipped. The walk stops once ``max_results`` matches were
+    yielded or ``cancel_event`` is set.
+    """
+    workers = workers or default_worker_count()
+    pending = deque([root])
+    running = set()
+    found = 0
+
+    with ThreadPoolExecutor(max_workers=workers, thread_name_prefix="tree-search") as pool:
+        try:
+            while pending or running:
+                if cancel_event is not None and cancel_event.is_set():
+                    return
+                while pending and len(running) < workers * 2:
+                    running.add(pool.submit(scan_for_matches, pending.popleft(), matcher,
+                                            ignored, include_hidden))
+
+                done, running = wait(running, timeout=0.1, return_when=FIRST_COMPLETED)
+                for future in done:
+                    try:
+                        subdirs, matches = future.result()
+                    except OSError:
+                        continue
+                    pending.extend(subdirs)
+                    if not matches:
+                        continue
+                    if max_results is not None and found + len(matches) >= max_results:
+                        yield matches[:max_results - found]
+                        return
+                    found += len(matches)
+                    yield matches
+        finally:
+            for future in running:
+                future.cancel()
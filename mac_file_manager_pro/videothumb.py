@@ -0,0 +1,112 @@
+"""
+Video thumbnails: a few seeks to representative frames, scored on downsampled copies
+"""
+
+import threading
+import time
+
+from mac_file_manager_pro.imagemeta import fit_size
+
+# OpenCV is optional; without it videos keep their generic icon
+try:
+    import cv2
+except ImportError:
+    cv2 = None
+
+VIDEO_THUMBNAILS = cv2 is not None
+
+# Positions tried, as fractions of the duration; past any leader, before any credits
+SAMPLE_FRACTIONS = (0.1, 0.3, 0.5)
+
+# Seconds into the stream tried when its length is unknown
+SAMPLE_SECONDS = (1, 3, 5)
+
+# Longest time spent on one file; the best frame found so far is used after it
+TIME_BUDGET = 2.0
+
+# Frames are scored on a copy about this many pixels wide
+SCORE_WIDTH = 64
+
+# Frames darker, brighter or flatter than this count as blank (fades, leaders, title cards)
+BLANK_MEAN_MIN = 10
+BLANK_MEAN_MAX = 245
+BLANK_STD_MIN = 5
+
+# A frame with this much contrast is good enough to stop seeking
+GOOD_STD = 40
+
+_local = threading.local()
+
+
+def sample_frames(frame_count, fps, fractions=SAMPLE_FRACTIONS):
+    """Get the frame indices to try, in order"""
+    if frame_count > 0:
+        indices = []
+        for fraction in fractions:
+            index = int(frame_count * fraction)
+            if index not in indices:
+                indices.append(index)
+        return indices
+    fps = fps if fps > 0 else 25
+    return [int(fps * seconds) for seconds in SAMPLE_SECONDS]
+
+
+def frame_score(mean, std):
+    """Score a frame by its contrast from its brightness mean and deviation; None if it looks blank"""
+    if mean < BLANK_MEAN_MIN or mean > BLANK_MEAN_MAX or std < BLANK_STD_MIN:
+        return None
+    return std
+
+
+def video_capture():
+    """Get this thread's capture object, reused from file to file"""
+    capture = getattr(_local, 'capture', None)
+    if capture is None:
+        capture = _local.capture = cv2.VideoCapture()
+    return capture
+
+
+def extract_frame(path, size, budget=TIME_BUDGET):
+    """Get a representative frame of a video as an RGB array fitting size × size, or None
+
+    Each candidate position is reached by a seek, so only a few frames past
+    the nearest keyframes are decoded. Candidates are scored on a strided
+    view about SCORE_WIDTH pixels wide, so a 4K frame costs a few thousand
+    pixels to judge. The first good frame wins; otherwise the best one seen
+    before the time budget ran out, or failing that any decoded frame.
+    """
+    if cv2 is None:
+        return None
+    deadline = time.monotonic() + budget
+    capture = video_capture()
+    if not capture.open(path):
+        return None
+    try:
+        frame_count = int(capture.get(cv2.CAP_PROP_FRAME_COUNT))
+        fps = capture.get(cv2.CAP_PROP_FPS)
+        best = fallback = None
+        best_score = None
+        for index in sample_frames(frame_count, fps):
+            if time.monotonic() > deadline:
+                break
+            capture.set(cv2.CAP_PROP_POS_FRAMES, index)
+            ok, frame = capture.read()
+            if not ok:
+                continue
+            if fallback is None:
+                fallback = frame
+            step = max(1, frame.shape[1] // SCORE_WIDTH)
+            small = frame[::step, ::step]
+            score = frame_score(float(small.mean()), float(small.std()))
+            if score is not None and (best_score is None or score > best_score):
+                best, best_score = frame, score
+                if score >= GOOD_STD:
+                    break
+        frame = best if best is not None else fallback
+        if frame is None:
+            return None
+        height, width = frame.shape[:2]
+        small = cv2.resize(frame, fit_size(width, height, size), interpolation=cv2.INTER_AREA)
+        return cv2.cvtColor(small, cv2.COLOR_BGR2RGB)
+    finally:
+        capture.release()
@@ -7,6 +7,7 @@ setup(
     install_requires=[
         'PyQt5',
         'Pillow',
+        'numpy',
     ],
     include_package_data=True,
     author='Your Name',
@@ -0,0 +1,92 @@
+import os
+import threading
+
+from mac_file_manager_pro.compare import (
+    DIFFERENT, LEFT_NEWER, ONLY_LEFT, ONLY_RIGHT, RIGHT_NEWER,
+    SYNC_BOTH_WAYS, SYNC_LEFT_TO_RIGHT, compare_trees, execute_plan, plan_sync
+)
+
+
+def set_mtime(path, mtime):
+    os.utime(path, (mtime, mtime))
+
+
+def make_trees(root):
+    left = root / "left"
+    right = root / "right"
+    for side in (left, right):
+        (side / "shared" / "deep").mkdir(parents=True)
+        (side / "same.txt").write_text("same")
+        set_mtime(side / "same.txt", 1000)
+    (left / "shared" / "deep" / "new.txt").write_text("left only")
+    (left / "only_left_dir").mkdir()
+    (left / "only_left_dir" / "x.txt").write_text("x")
+    (right / "only_right.txt").write_text("right only")
+
+    (left / "shared" / "edited.txt").write_text("newer on the left")
+    (right / "shared" / "edited.txt").write_text("older")
+    set_mtime(left / "shared" / "edited.txt", 5000)
+    set_mtime(right / "shared" / "edited.txt", 1000)
+
+    (left / "stale.txt").write_text("old")
+    (right / "stale.txt").write_text("new")
+    set_mtime(left / "stale.txt", 1000)
+    set_mtime(right / "stale.txt", 9000)
+
+    # Same size and time, different bytes: only content verification notices
+    (left / "shared" / "twin.bin").write_bytes(b"aaaa")
+    (right / "shared" / "twin.bin").write_bytes(b"aaab")
+    set_mtime(left / "shared" / "twin.bin", 1000)
+    set_mtime(right / "shared" / "twin.bin", 1001)
+    return str(left), str(right)
+
+
+def collect(left, right, verify=False):
+    return {d.relpath: d.status for batch in compare_trees(left, right, verify, workers=2) for d in batch}
+
+
+def test_compare_trees_reports_each_kind_of_difference(tmp_path):
+    """Test that one-sided, newer and different entries are found at every depth"""
+    left, right = make_trees(tmp_path)
+
+    assert collect(left, right) == {
+        "only_left_dir": ONLY_LEFT,
+        "only_right.txt": ONLY_RIGHT,
+        "stale.txt": RIGHT_NEWER,
+        os.path.join("shared", "edited.txt"): LEFT_NEWER,
+        os.path.join("shared", "deep", "new.txt"): ONLY_LEFT,
+    }
+    assert collect(left, right, verify=True)[os.path.join("shared", "twin.bin")] == DIFFERENT
+
+    cancel_event = threading.Event()
+    cancel_event.set()
+    assert list(compare_trees(left, right, cancel_event=cancel_event)) == []
+
+
+def test_sync_plans_copy_without_deleting(tmp_path):
+    """Test that syncing copies missing and newer entries and the trees then compare equal"""
+    left, right = make_trees(tmp_path)
+    differences = [d for batch in compare_trees(left, right) for d in batch]
+
+    one_way = plan_sync(differences, left, right, SYNC_LEFT_TO_RIGHT)
+    assert {os.path.relpath(action.target, right) for action in one_way} == {
+        "only_left_dir", os.path.join("shared", "edited.txt"), os.path.join("shared", "deep", "new.txt"),
+    }
+
+    both_ways = plan_sync(differences, left, right, SYNC_BOTH_WAYS)
+    assert all(error is None for action, error in execute_plan(both_ways))
+    assert collect(left, right) == {}
+    assert (tmp_path / "left" / "stale.txt").read_text() == "new"
+    assert (tmp_path / "right" / "only_left_dir" / "x.txt").read_text() == "x"
+    assert not any(name.endswith(".sync-tmp") for name in os.listdir(right))
+
+
+def test_one_way_sync_keeps_newer_target_files(tmp_path):
+    """Test that a left to right sync never overwrites a right file newer than the left one"""
+    left, right = make_trees(tmp_path)
+    differences = [d for batch in compare_trees(left, right) for d in batch]
+
+    assert all(error is None for action, error in execute_plan(plan_sync(differences, left, right,
+                                                                         SYNC_LEFT_TO_RIGHT)))
+    assert (tmp_path / "right" / "stale.txt").read_text() == "new"
+    assert collect(left, right) == {"only_right.txt": ONLY_RIGHT, "stale.txt": RIGHT_NEWER}
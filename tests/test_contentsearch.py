@@ -0,0 +1,77 @@
+import threading
+
+from mac_file_manager_pro import contentsearch
+from mac_file_manager_pro.contentsearch import compile_content_pattern, grep_range, search_contents
+from mac_file_manager_pro.search import MATCH_REGEX
+
+
+def make_tree(root):
+    (root / "app.log").write_text("start\nfoo ERROR bar\nok\nerror again\n")
+    (root / "data.bin").write_bytes(b"ERROR\0\0\0")
+    (root / "clip.mov").write_text("ERROR")
+    (root / "sub").mkdir()
+    (root / "sub" / "README").write_text("nothing\nan Error here\n")
+    (root / "node_modules").mkdir()
+    (root / "node_modules" / "dep.js").write_text("ERROR")
+
+
+def test_search_contents_streams_matching_lines_and_skips_binary(tmp_path):
+    """Test that text files are grepped with line numbers and offsets, skipping binary and ignored files"""
+    make_tree(tmp_path)
+    pattern = compile_content_pattern("error")
+
+    matches = sorted(match for batch in search_contents(str(tmp_path), pattern, processes=2) for match in batch)
+    assert [(match.path, match.line_number, match.offset, match.line) for match in matches] == [
+        (str(tmp_path / "app.log"), 2, 6, "foo ERROR bar"),
+        (str(tmp_path / "app.log"), 4, 23, "error again"),
+        (str(tmp_path / "sub" / "README"), 2, 8, "an Error here"),
+    ]
+
+    top_level = [match for batch in search_contents(str(tmp_path), pattern, recursive=False, processes=2)
+                 for match in batch]
+    assert len(top_level) == 2
+
+
+def test_split_files_keep_absolute_line_numbers(tmp_path, monkeypatch):
+    """Test that ranges of a large file report the same lines as a whole-file search"""
+    monkeypatch.setattr(contentsearch, "SPLIT_BYTES", 1000)
+    lines = [f"line {i} {'hit' if i % 37 == 5 else ''}" for i in range(1000)]
+    path = tmp_path / "big.txt"
+    path.write_text("\n".join(lines) + "\n")
+    pattern = compile_content_pattern(r"hit$", MATCH_REGEX)
+
+    matches = [match for batch in search_contents(str(tmp_path), pattern, processes=3) for match in batch]
+    expected = [i + 1 for i, line in enumerate(lines) if line.endswith("hit")]
+    assert [match.line_number for match in matches] == expected
+    data = path.read_bytes()
+    assert all(data[match.offset:].startswith(match.line.encode()) for match in matches)
+
+    # A range starting mid-line leaves that line to the previous range
+    newlines, range_matches = grep_range(str(path), pattern, 3, 1000, 100)
+    assert range_matches[0][1] > 3
+
+
+def test_search_contents_honours_max_results_and_cancel(tmp_path):
+    """Test that the search stops at the results cap and when cancelled"""
+    for i in range(5):
+        (tmp_path / f"f{i}.txt").write_text("match\n" * 10)
+    pattern = compile_content_pattern("match")
+
+    batches = list(search_contents(str(tmp_path), pattern, max_results=7, processes=2))
+    assert sum(len(batch) for batch in batches) == 7
+
+    cancel_event = threading.Event()
+    cancel_event.set()
+    assert list(search_contents(str(tmp_path), pattern, cancel_event=cancel_event)) == []
+
+
+def test_large_binary_files_are_skipped(tmp_path, monkeypatch):
+    """Test that files split into ranges are sniffed and skipped when binary"""
+    monkeypatch.setattr(contentsearch, "SPLIT_BYTES", 1000)
+    (tmp_path / "blob").write_bytes(b"\x00\x01needle\n" * 500)
+    (tmp_path / "big.txt").write_text("needle\n" * 500)
+    pattern = compile_content_pattern("needle")
+
+    matches = [match for batch in search_contents(str(tmp_path), pattern, processes=2) for match in batch]
+    assert {match.path for match in matches} == {str(tmp_path / "big.txt")}
+    assert len(matches) == 500
@@ -0,0 +1,84 @@
+import os
+import threading
+
+from mac_file_manager_pro.dirscan import (
+    ListingCache, directory_signature, iter_scan_batches, scan_directory
+)
+
+
+def test_scan_directory_splits_folders_and_files(tmp_path):
+    """Test that one scan returns folders and files with stat data"""
+    (tmp_path / "b_folder").mkdir()
+    (tmp_path / "A_folder").mkdir()
+    (tmp_path / "file.txt").write_text("hello")
+    (tmp_path / "Another.bin").write_bytes(b"\0" * 10)
+
+    folders, files = scan_directory(str(tmp_path))
+
+    assert [entry.name for entry in folders] == ["A_folder", "b_folder"]
+    assert [entry.name for entry in files] == ["Another.bin", "file.txt"]
+    assert all(entry.is_dir for entry in folders)
+    assert files[0].size == 10
+    assert files[1].size == 5
+    assert files[1].path == os.path.join(str(tmp_path), "file.txt")
+    assert files[1].mtime == os.stat(files[1].path).st_mtime
+
+
+def test_scan_directory_skips_hidden_and_broken_links(tmp_path):
+    """Test that hidden entries and dangling symlinks are not listed"""
+    (tmp_path / ".hidden").write_text("x")
+    (tmp_path / "visible").write_text("x")
+    os.symlink(tmp_path / "missing", tmp_path / "dangling")
+
+    folders, files = scan_directory(str(tmp_path))
+    assert folders == []
+    assert [entry.name for entry in files] == ["visible"]
+
+    _, all_files = scan_directory(str(tmp_path), include_hidden=True)
+    assert [entry.name for entry in all_files] == [".hidden", "visible"]
+
+
+def test_iter_scan_batches_streams_and_cancels(tmp_path):
+    """Test that batches cover every entry once and cancellation stops the scan"""
+    for i in range(10):
+        (tmp_path / f"file{i}.txt").write_text("x")
+    (tmp_path / "sub").mkdir()
+
+    batches = list(iter_scan_batches(str(tmp_path), batch_size=4))
+    assert [len(f) + len(s) for f, s in batches] == [4, 4, 3]
+    names = sorted(e.name for f, s in batches for e in f + s)
+    assert names == sorted(["sub"] + [f"file{i}.txt" for i in range(10)])
+
+    cancel_event = threading.Event()
+    cancel_event.set()
+    assert list(iter_scan_batches(str(tmp_path), cancel_event=cancel_event)) == []
+
+
+def test_listing_cache_lru_eviction_and_revalidation(tmp_path):
+    """Test that the cache evicts by entry count and detects changed directories"""
+    dirs = []
+    for name in ("a", "b", "c"):
+        d = tmp_path / name
+        d.mkdir()
+        for i in range(2):
+            (d / f"f{i}").write_text("x")
+        dirs.append(str(d))
+
+    cache = ListingCache(max_entries=4)
+    for path in dirs[:2]:
+        folders, files = scan_directory(path)
+        cache.put(path, folders, files, directory_signature(path))
+    assert cache.total_entries == 4
+
+    # Touch "a" so "b" becomes the least recently used listing
+    assert cache.get(dirs[0]) is not None
+    folders, files = scan_directory(dirs[2])
+    cache.put(dirs[2], folders, files, directory_signature(dirs[2]))
+    assert dirs[1] not in cache
+    assert cache.evictions == 1
+    assert cache.get(dirs[1]) is None
+
+    assert cache.is_current(dirs[0])
+    (tmp_path / "a" / "new").write_text("x")
+    os.utime(dirs[0], ns=(0, 0))
+    assert not cache.is_current(dirs[0])
@@ -0,0 +1,63 @@
+import os
+import threading
+
+from mac_file_manager_pro import duplicates
+from mac_file_manager_pro.duplicates import (
+    STAGE_FULL, STAGE_PARTIAL, HashCache, find_duplicates
+)
+
+
+def make_tree(root, edge):
+    (root / "left").mkdir()
+    (root / "right" / "deep").mkdir(parents=True)
+    small = b"same small file"
+    (root / "left" / "a.txt").write_bytes(small)
+    (root / "right" / "deep" / "a copy.txt").write_bytes(small)
+    (root / "right" / "other.txt").write_bytes(b"same small fil!")  # same size, different bytes
+
+    # Large files: same edges, one differs in the middle
+    big = b"x" * (edge * 3)
+    (root / "left" / "big.bin").write_bytes(big)
+    (root / "right" / "big copy.bin").write_bytes(big)
+    (root / "right" / "big near.bin").write_bytes(big[:edge + 5] + b"y" + big[edge + 6:])
+    os.link(root / "left" / "big.bin", root / "left" / "big hardlink.bin")
+
+
+def test_find_duplicates_confirms_through_stages(tmp_path):
+    """Test that only identical contents are grouped, across roots, ignoring hard links"""
+    make_tree(tmp_path, duplicates.EDGE_BYTES)
+    stages = []
+
+    groups = find_duplicates([str(tmp_path / "left"), str(tmp_path / "right")], processes=2,
+                             progress=lambda stage, done, total: stages.append((stage, total)))
+    assert [group.size for group in groups] == [3 * duplicates.EDGE_BYTES, 15]
+    big, small = [sorted(os.path.basename(path) for path in group.paths) for group in groups]
+    assert small == ["a copy.txt", "a.txt"]
+    # The hard link is the same file as big.bin, whichever of the two was seen first
+    assert len(big) == 2 and big[0] == "big copy.bin" and big[1] in ("big hardlink.bin", "big.bin")
+    # Three small and three large candidates get edge hashes; only the large ones are read in full
+    assert (STAGE_PARTIAL, 6) in stages
+    assert (STAGE_FULL, 3) in stages
+
+
+def test_hash_cache_makes_reruns_skip_hashing(tmp_path, monkeypatch):
+    """Test that cached hashes are reused while size and mtime match"""
+    make_tree(tmp_path, duplicates.EDGE_BYTES)
+    cache = HashCache(str(tmp_path / "hashes.sqlite3"))
+    roots = [str(tmp_path / "left"), str(tmp_path / "right")]
+    first = find_duplicates(roots, cache, processes=2)
+
+    def no_hashing(*args):
+        raise AssertionError("files were hashed again")
+
+    monkeypatch.setattr(duplicates, "hash_files", no_hashing)
+    assert find_duplicates(roots, cache, processes=2) == first
+    cache.close()
+
+
+def test_find_duplicates_cancels(tmp_path):
+    """Test that a cancelled search returns None"""
+    make_tree(tmp_path, duplicates.EDGE_BYTES)
+    cancel_event = threading.Event()
+    cancel_event.set()
+    assert find_duplicates([str(tmp_path)], cancel_event=cancel_event) is None
@@ -50,4 +50,270 @@ def test_file_operations(tmp_path):
     assert move_path.exists()
     # Delete file
     move_path.unlink()
-    assert not move_path.exists() 
\ No newline at end of file
+    assert not move_path.exists() 
+
+@pytest.fixture(scope="module")
+def file_manager():
+    """Import the GUI module under an offscreen QApplication"""
+    os.environ.setdefault("QT_QPA_PLATFORM", "offscreen")
+    QtWidgets = pytest.importorskip("PyQt5.QtWidgets")
+    # Also skipped where QtMultimedia cannot load its system libraries
+    module = pytest.importorskip("mac_file_manager_pro.file_manager", exc_type=ImportError)
+    app = QtWidgets.QApplication.instance() or QtWidgets.QApplication([])
+    yield module
+    del app
+
+
+def make_entries(names, directory="/data"):
+    """Build scan entries for files, or folders when the name ends in a slash"""
+    from mac_file_manager_pro.dirscan import FileEntry
+    entries = []
+    for i, name in enumerate(names):
+        is_dir = name.endswith("/")
+        name = name.rstrip("/")
+        entries.append(FileEntry(name, f"{directory}/{name}", is_dir, 0 if is_dir else 10 * i, 100.0 + i,
+                                 0o040755 if is_dir else 0o100644))
+    return entries
+
+
+def shown_names(model):
+    return [model.index(row, 0).data() for row in range(model.rowCount())]
+
+
+def check_model(file_manager, model):
+    """Attach a QAbstractItemModelTester to a model; returns the list of its complaints"""
+    from PyQt5.QtCore import QtMsgType, qInstallMessageHandler
+    from PyQt5.QtTest import QAbstractItemModelTester
+    failures = []
+
+    def handler(msg_type, context, message):
+        if msg_type != QtMsgType.QtDebugMsg:
+            failures.append(message)
+
+    qInstallMessageHandler(handler)
+    tester = QAbstractItemModelTester(model, QAbstractItemModelTester.FailureReportingMode.Warning)
+    return tester, failures
+
+
+def test_table_model_exposes_rows_in_batches(file_manager, monkeypatch):
+    """Test that rows are handed to views a batch at a time through fetchMore"""
+    monkeypatch.setattr(file_manager, "FETCH_BATCH_SIZE", 4)
+    model = file_manager.FileTableModel()
+    model.setEntries(make_entries([f"file{i}.txt" for i in range(10)]))
+
+    assert model.rowCount() == 4
+    assert model.canFetchMore()
+    model.fetchMore()
+    assert model.rowCount() == 8
+    model.fetchMore()
+    assert model.rowCount() == 10
+    assert not model.canFetchMore()
+    assert shown_names(model)[:3] == ["file0.txt", "file1.txt", "file2.txt"]
+
+
+def test_table_model_applies_rescan_diffs(file_manager):
+    """Test that a rescan removes, updates and inserts rows in sort order"""
+    model = file_manager.FileTableModel()
+    model.setEntries(make_entries(["b.txt", "d.txt", "sub/", "f.txt"]))
+    assert shown_names(model) == ["sub", "b.txt", "d.txt", "f.txt"]
+
+    changed = model.updateEntries(make_entries(["a.txt", "b.txt", "sub/", "e.txt", "f.txt", "new/"]))
+    assert shown_names(model) == ["new", "sub", "a.txt", "b.txt", "e.txt", "f.txt"]
+    assert changed == ["/data/new"]
+    assert model.updateEntries(make_entries(["a.txt", "b.txt", "sub/", "e.txt", "f.txt", "new/"])) == []
+
+
+def test_filter_proxy_maps_rows_and_refines_queries(file_manager):
+    """Test that the proxy filters in memory, maps both ways and narrows from previous matches"""
+    from mac_file_manager_pro.search import MATCH_FUZZY
+    model = file_manager.FileTableModel()
+    model.setEntries(make_entries(["report.txt", "notes.txt", "final_report.pdf", "frpt.txt", "readme.md"]))
+    proxy = file_manager.FileFilterProxyModel()
+    proxy.setSourceModel(model)
+    assert proxy.rowCount() == 5
+
+    proxy.setSearchText("rep")
+    assert shown_names(proxy) == ["final_report.pdf", "report.txt"]
+    for row in range(proxy.rowCount()):
+        source_index = proxy.mapToSource(proxy.index(row, 0))
+        assert proxy.mapFromSource(source_index).row() == row
+    hidden = model.index(shown_names(model).index("notes.txt"), 0)
+    assert not proxy.mapFromSource(hidden).isValid()
+
+    proxy.setSearchText("repo")
+    assert shown_names(proxy) == ["final_report.pdf", "report.txt"]
+    proxy.setSearchText("_report")
+    assert shown_names(proxy) == ["final_report.pdf"]
+
+    proxy.setSearchText("frpt", MATCH_FUZZY)
+    assert shown_names(proxy) == ["frpt.txt", "final_report.pdf"]
+    proxy.setSearchText("")
+    assert proxy.rowCount() == 5
+
+
+def test_filter_proxy_passes_model_tester_through_rescans(file_manager, monkeypatch):
+    """Test the proxy with QAbstractItemModelTester while rows stream in and rescans add and remove"""
+    from mac_file_manager_pro.search import MATCH_FUZZY
+    monkeypatch.setattr(file_manager, "FETCH_BATCH_SIZE", 3)
+    model = file_manager.FileTableModel()
+    model.setEntries(make_entries(["alpha.txt", "beta.txt", "gamma/", "delta.txt"]))
+    proxy = file_manager.FileFilterProxyModel()
+    proxy.setSourceModel(model)
+    tester, failures = check_model(file_manager, proxy)
+
+    proxy.setSearchText("e")
+    model.appendEntries(make_entries(["alps.txt", "zeta.txt"]))
+    while proxy.canFetchMore():
+        proxy.fetchMore()
+    model.resort()
+    assert shown_names(proxy) == ["beta.txt", "delta.txt", "zeta.txt"]
+    model.updateEntries(make_entries(["alpha.txt", "gamma/", "delta.txt", "alps.txt", "kappa.txt", "omega/",
+                                      "eta.txt"]))
+    assert shown_names(proxy) == ["omega", "delta.txt", "eta.txt"]
+
+    proxy.setSearchText("aa", MATCH_FUZZY)
+    model.updateEntries(make_entries(["alpha.txt", "gamma/", "banana.txt"]))
+    assert set(shown_names(proxy)) == {"gamma", "alpha.txt", "banana.txt"}
+    model.sortBy(file_manager.COLUMN_SIZE, True)
+    proxy.setSearchText("")
+    assert failures == []
+    del tester
+
+
+def test_rescan_inserts_adjacent_entries_as_one_range(file_manager, monkeypatch):
+    """Test that new entries landing together are inserted with one signal, and scattered ones reset"""
+    model = file_manager.FileTableModel()
+    model.setEntries(make_entries(["a.txt", "z.txt"]))
+    inserts = []
+    resets = []
+    model.rowsInserted.connect(lambda parent, first, last: inserts.append((first, last)))
+    model.modelReset.connect(lambda: resets.append(True))
+
+    model.updateEntries(make_entries(["a.txt", "m1.txt", "m2.txt", "m3.txt", "n.txt", "z.txt"]))
+    assert inserts == [(1, 4)]
+    assert shown_names(model) == ["a.txt", "m1.txt", "m2.txt", "m3.txt", "n.txt", "z.txt"]
+
+    monkeypatch.setattr(file_manager, "UPDATE_MAX_INSERT_RUNS", 1)
+    model.updateEntries(make_entries(["0.txt", "a.txt", "m1.txt", "m2.txt", "m3.txt", "n.txt", "y.txt",
+                                      "z.txt"]))
+    assert inserts == [(1, 4)]
+    assert resets == [True]
+    assert shown_names(model) == ["0.txt", "a.txt", "m1.txt", "m2.txt", "m3.txt", "n.txt", "y.txt", "z.txt"]
+
+
+def test_thumbnail_decode_stores_every_level_but_returns_the_shown_one(file_manager, tmp_path):
+    """Test that one decode fills the store's pyramid, and failures are recorded at every level"""
+    from PyQt5.QtGui import QColor, QImage
+    from mac_file_manager_pro.thumbnails import THUMBNAIL_LEVELS
+    from mac_file_manager_pro.thumbstore import NO_THUMBNAIL, ThumbnailStore
+    store = ThumbnailStore(str(tmp_path / "thumbs.sqlite3"))
+    try:
+        photo = QImage(600, 400, QImage.Format_RGB32)
+        photo.fill(QColor("red"))
+        photo_path = str(tmp_path / "photo.png")
+        assert photo.save(photo_path)
+        broken_path = tmp_path / "broken.png"
+        broken_path.write_bytes(b"not a png")
+
+        images = file_manager.load_thumbnail_images(photo_path, 64, store)
+        assert list(images) == [64]
+        assert images[64].width() == 64
+        assert file_manager.load_thumbnail_images(str(broken_path), 64, store) is None
+        store.flush()
+
+        st = os.stat(photo_path)
+        for level in THUMBNAIL_LEVELS:
+            assert store.get(photo_path, level, st.st_size, st.st_mtime_ns)
+        st = broken_path.stat()
+        for level in THUMBNAIL_LEVELS:
+            assert store.get(str(broken_path), level, st.st_size, st.st_mtime_ns) == NO_THUMBNAIL
+    finally:
+        store.close()
+
+
+def test_rescan_moves_changed_rows_when_sorted_by_size(file_manager, monkeypatch):
+    """Test that files growing during a rescan move to their new place in a size sort"""
+    from mac_file_manager_pro.dirscan import FileEntry
+    model = file_manager.FileTableModel()
+    proxy = file_manager.FileFilterProxyModel()
+    proxy.setSourceModel(model)
+    tester, failures = check_model(file_manager, proxy)
+
+    def files(sizes):
+        return [FileEntry(name, f"/data/{name}", False, size, 100.0, 0o100644) for name, size in sizes.items()]
+
+    sizes = {"a.exr": 10, "b.exr": 20, "c.exr": 30, "d.exr": 40}
+    model.setEntries(files(sizes))
+    model.sortBy(file_manager.COLUMN_SIZE, True)
+    assert shown_names(model) == ["d.exr", "c.exr", "b.exr", "a.exr"]
+
+    sizes.update({"a.exr": 35, "b.exr": 50, "e.exr": 32})
+    model.updateEntries(files(sizes))
+    assert shown_names(model) == ["b.exr", "d.exr", "a.exr", "e.exr", "c.exr"]
+    assert shown_names(proxy) == shown_names(model)
+
+    monkeypatch.setattr(file_manager, "UPDATE_MAX_INSERT_RUNS", 1)
+    sizes.update({"c.exr": 90, "e.exr": 1})
+    model.updateEntries(files(sizes))
+    assert shown_names(model) == ["c.exr", "b.exr", "d.exr", "a.exr", "e.exr"]
+    assert failures == []
+    del tester
+
+
+def test_model_shows_a_cached_listing_without_rebuilding_it(file_manager):
+    """Test that a listing snapshot is shown as is and stays unaffected by the model's edits"""
+    built = file_manager.FileTableModel()
+    built.setEntries(make_entries(["b.txt", "sub/", "a.txt", "c.txt"]))
+    snapshot = built.listing().copy()
+
+    model = file_manager.FileTableModel()
+    model.sortBy(file_manager.COLUMN_SIZE, True)
+    tester, failures = check_model(file_manager, model)
+    model.setListing(snapshot)
+    assert shown_names(model) == ["sub", "c.txt", "a.txt", "b.txt"]
+
+    model.updateEntries(make_entries(["b.txt", "sub/", "c.txt"]))
+    assert shown_names(model) == ["sub", "c.txt", "b.txt"]
+    assert snapshot.entry_index("a.txt") is not None
+    assert failures == []
+    del tester
+
+
+def test_small_embedded_thumbnail_is_never_scaled_up(file_manager, tmp_path):
+    """Test that an EXIF thumbnail smaller than the top level only fills the levels it can serve"""
+    from PyQt5.QtCore import QBuffer, QByteArray, QIODevice
+    from PyQt5.QtGui import QColor, QImage
+    from mac_file_manager_pro.thumbstore import ThumbnailStore
+    from tests.test_imagemeta import exif_jpeg
+
+    def jpeg_bytes(width, height, color):
+        image = QImage(width, height, QImage.Format_RGB32)
+        image.fill(QColor(color))
+        data = QByteArray()
+        buffer = QBuffer(data)
+        buffer.open(QIODevice.WriteOnly)
+        image.save(buffer, "JPG")
+        return bytes(data)
+
+    # Splice the EXIF segments, without their placeholder scan data, into a real photo
+    segments = exif_jpeg(orientation=1, thumbnail=jpeg_bytes(150, 100, "blue"))[2:-70]
+    photo = jpeg_bytes(1200, 800, "red")
+    photo_path = str(tmp_path / "photo.jpg")
+    with open(photo_path, "wb") as f:
+        f.write(photo[:2] + segments + photo[2:])
+
+    image = file_manager.render_image_thumbnail(photo_path, 256, 128)
+    assert (image.width(), image.height()) == (150, 100)
+    assert QColor(image.pixel(75, 50)).blue() > 200
+
+    store = ThumbnailStore(str(tmp_path / "thumbs.sqlite3"))
+    try:
+        images = file_manager.load_thumbnail_images(photo_path, 128, store)
+        assert images[128].width() == 128
+        store.flush()
+        st = os.stat(photo_path)
+        for level in (32, 64, 128):
+            assert store.get(photo_path, level, st.st_size, st.st_mtime_ns)
+        assert store.get(photo_path, 256, st.st_size, st.st_mtime_ns) is None
+    finally:
+        store.close()
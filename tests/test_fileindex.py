@@ -0,0 +1,78 @@
+import os
+
+from mac_file_manager_pro.fileindex import FileIndex, pattern_to_like
+
+
+def make_tree(root):
+    for a in range(2):
+        folder = root / f"shoot{a}" / "raw"
+        folder.mkdir(parents=True)
+        for c in range(3):
+            (folder / f"shot_04{a}{c}.mov").write_text("x")
+    (root / "node_modules" / "pkg").mkdir(parents=True)
+    (root / "node_modules" / "pkg" / "shot_dep.mov").write_text("x")
+    (root / ".cache").mkdir()
+    (root / ".cache" / "shot_hidden.mov").write_text("x")
+
+
+def touch_dir(path, mtime_ns):
+    os.utime(path, ns=(mtime_ns, mtime_ns))
+
+
+def test_pattern_to_like_escapes_and_translates_wildcards():
+    """Test that globs become LIKE patterns and plain queries match substrings"""
+    assert pattern_to_like("shot_0420") == "%shot\\_0420%"
+    assert pattern_to_like("*.mov") == "%.mov"
+    assert pattern_to_like("clip?.mov") == "clip_.mov"
+    assert pattern_to_like("100%") == "%100\\%%"
+
+
+def test_crawl_indexes_names_and_search_needs_no_disk(tmp_path):
+    """Test that a crawled root is searchable by substring and glob, skipping ignored dirs"""
+    root = tmp_path / "root"
+    root.mkdir()
+    make_tree(root)
+    index = FileIndex(str(tmp_path / "index.sqlite3"))
+    index.add_root(str(root))
+    assert index.crawl(str(root)) == 5
+
+    assert [path for path, is_dir in index.search("SHOT_0412")] == [
+        str(root / "shoot1" / "raw" / "shot_0412.mov")
+    ]
+    assert len(index.search("shot_04*.mov")) == 6
+    assert index.search("shot_dep") == []
+    assert index.search("shot_hidden") == []
+    assert sorted(index.search("raw")) == [
+        (str(root / "shoot0" / "raw"), True), (str(root / "shoot1" / "raw"), True)
+    ]
+    index.close()
+
+
+def test_crawl_relists_only_changed_dirs_and_drops_removed_subtrees(tmp_path):
+    """Test that revalidation skips unchanged dirs by mtime and forgets deleted folders"""
+    root = tmp_path / "root"
+    root.mkdir()
+    make_tree(root)
+    index = FileIndex(str(tmp_path / "index.sqlite3"))
+    index.add_root(str(root))
+    index.crawl(str(root))
+    assert index.crawl(str(root)) == 0
+
+    raw = root / "shoot0" / "raw"
+    (raw / "shot_9999.mov").write_text("x")
+    touch_dir(raw, os.stat(raw).st_mtime_ns + 1_000_000_000)
+    assert index.crawl(str(raw), recursive=False) == 1
+    assert len(index.search("shot_9999")) == 1
+
+    for name in os.listdir(raw):
+        os.remove(raw / name)
+    raw.rmdir()
+    touch_dir(root / "shoot0", os.stat(root / "shoot0").st_mtime_ns + 1_000_000_000)
+    index.crawl(str(root))
+    assert index.search("shot_040") == []
+    assert len(index.search("shot_041")) == 3
+
+    index.remove_root(str(root))
+    assert index.roots() == []
+    assert index.entry_count() == 0
+    index.close()
@@ -0,0 +1,52 @@
+import os
+import threading
+
+from mac_file_manager_pro.foldersize import FolderSizeCache, folder_sizes, measure_folder
+
+
+def make_tree(root):
+    (root / "a" / "b").mkdir(parents=True)
+    (root / "a" / "one.bin").write_bytes(b"x" * 100)
+    (root / "a" / "b" / "two.bin").write_bytes(b"x" * 50)
+    (root / "a" / ".hidden").write_bytes(b"x" * 7)
+    (root / "c").mkdir()
+    (root / "c" / "three.bin").write_bytes(b"x" * 10)
+
+
+def test_measure_folder_sums_subtree_and_reuses_cached_dirs(tmp_path):
+    """Test that totals include every nested file and unchanged directories come from the cache"""
+    make_tree(tmp_path)
+    cache = FolderSizeCache(str(tmp_path / "sizes.sqlite3"))
+    folder = str(tmp_path / "a")
+
+    total, records = measure_folder(folder, cache)
+    assert total == 157
+    assert sorted(record[0] for record in records) == [folder, os.path.join(folder, "b")]
+    cache.store(records)
+
+    total, records = measure_folder(folder, cache)
+    assert (total, records) == (157, [])
+
+    # Only the changed directory is listed again
+    (tmp_path / "a" / "b" / "four.bin").write_bytes(b"x" * 3)
+    b_dir = tmp_path / "a" / "b"
+    st = os.stat(b_dir)
+    os.utime(b_dir, ns=(st.st_atime_ns, st.st_mtime_ns + 1_000_000_000))
+    total, records = measure_folder(folder, cache)
+    assert total == 160
+    assert [record[0] for record in records] == [str(b_dir)]
+    cache.close()
+
+
+def test_folder_sizes_streams_each_folder_and_cancels(tmp_path):
+    """Test that every requested folder is measured on the pool and cancellation stops it"""
+    make_tree(tmp_path)
+    cache = FolderSizeCache(str(tmp_path / "sizes.sqlite3"))
+    paths = [str(tmp_path / "a"), str(tmp_path / "c"), str(tmp_path / "missing")]
+
+    assert dict(folder_sizes(paths, cache, workers=2)) == {paths[0]: 157, paths[1]: 10}
+
+    cancel_event = threading.Event()
+    cancel_event.set()
+    assert list(folder_sizes(paths, cache, cancel_event=cancel_event)) == []
+    cache.close()
@@ -0,0 +1,59 @@
+import struct
+
+from mac_file_manager_pro.imagemeta import fit_size, read_exif_thumbnail
+
+THUMBNAIL = b'\xff\xd8embedded-thumbnail\xff\xd9'
+
+
+def exif_jpeg(endian='<', orientation=6, thumbnail=THUMBNAIL):
+    """Build a minimal JPEG whose EXIF block has an orientation and an embedded thumbnail"""
+    order = b'II' if endian == '<' else b'MM'
+    ifd0_offset = 8
+    ifd1_offset = ifd0_offset + 2 + 12 + 4
+    data_offset = ifd1_offset + 2 + 2 * 12 + 4
+    tiff = order + struct.pack(endian + 'HI', 42, ifd0_offset)
+    tiff += struct.pack(endian + 'H', 1)
+    tiff += struct.pack(endian + 'HHIHH', 0x0112, 3, 1, orientation, 0)
+    tiff += struct.pack(endian + 'I', ifd1_offset)
+    tiff += struct.pack(endian + 'H', 2)
+    tiff += struct.pack(endian + 'HHII', 0x0201, 4, 1, data_offset)
+    tiff += struct.pack(endian + 'HHII', 0x0202, 4, 1, len(thumbnail))
+    tiff += struct.pack(endian + 'I', 0)
+    tiff += thumbnail
+    app1 = b'Exif\0\0' + tiff
+    # An APP0 segment first, as most cameras write
+    app0 = b'JFIF\0' + b'\0' * 9
+    return (b'\xff\xd8' + b'\xff\xe0' + struct.pack('>H', len(app0) + 2) + app0
+            + b'\xff\xe1' + struct.pack('>H', len(app1) + 2) + app1
+            + b'\xff\xda\0\x02' + b'\0' * 64 + b'\xff\xd9')
+
+
+def test_read_exif_thumbnail_finds_embedded_jpeg_and_orientation(tmp_path):
+    """Test that the embedded thumbnail and orientation are read in both byte orders"""
+    for endian in ('<', '>'):
+        path = tmp_path / f"photo{endian == '<'}.jpg"
+        path.write_bytes(exif_jpeg(endian))
+        assert read_exif_thumbnail(str(path)) == (THUMBNAIL, 6)
+
+
+def test_read_exif_thumbnail_rejects_missing_or_malformed_data(tmp_path):
+    """Test that files without a usable embedded thumbnail give (None, orientation)"""
+    png = tmp_path / "image.png"
+    png.write_bytes(b'\x89PNG\r\n\x1a\n' + b'\0' * 32)
+    assert read_exif_thumbnail(str(png)) == (None, 1)
+
+    not_jpeg = tmp_path / "fake.jpg"
+    not_jpeg.write_bytes(exif_jpeg(thumbnail=b'not a jpeg'))
+    assert read_exif_thumbnail(str(not_jpeg)) == (None, 6)
+
+    truncated = tmp_path / "truncated.jpg"
+    truncated.write_bytes(exif_jpeg()[:40])
+    assert read_exif_thumbnail(str(truncated)) == (None, 1)
+    assert read_exif_thumbnail(str(tmp_path / "missing.jpg")) == (None, 1)
+
+
+def test_fit_size_scales_down_keeping_aspect():
+    """Test that sizes shrink to fit the box and small images are never enlarged"""
+    assert fit_size(8000, 6000, 128) == (128, 96)
+    assert fit_size(600, 4000, 128) == (19, 128)
+    assert fit_size(100, 50, 128) == (100, 50)
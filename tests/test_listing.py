@@ -0,0 +1,163 @@
+from mac_file_manager_pro.dirscan import FileEntry
+from mac_file_manager_pro.listing import (
+    DirectoryListing, format_file_size, icon_theme_names,
+    COLUMN_NAME, COLUMN_SIZE, COLUMN_TYPE, COLUMN_DATE
+)
+
+
+def make_listing():
+    listing = DirectoryListing()
+    listing.append([
+        FileEntry("b.txt", "/data/b.txt", False, 2048, 300.0, 0o100644),
+        FileEntry("A.mov", "/data/A.mov", False, 10, 100.0, 0o100644),
+        FileEntry("sub", "/data/sub", True, 0, 200.0, 0o040755),
+        FileEntry("c.txt", "/data/c.txt", False, 1024 ** 3, 50.0, 0o100644),
+    ])
+    return listing
+
+
+def test_listing_stores_raw_columns():
+    """Test that entries are stored as raw values with shared type names"""
+    listing = make_listing()
+    assert len(listing) == 4
+    assert list(listing.sizes) == [2048, 10, -1, 1024 ** 3]
+    assert listing.type_name(0) == "TXT File"
+    assert listing.type_name(2) == "Folder"
+    assert listing.type_ids[0] == listing.type_ids[3]
+    assert listing.path(1) == "/data/A.mov"
+    assert format_file_size(listing.sizes[3]) == "1.0 GB"
+
+
+def test_listing_argsort_uses_raw_values():
+    """Test that sorting compares numbers and times, not display strings"""
+    listing = make_listing()
+    names = lambda order: [listing.names[i] for i in order]
+
+    assert names(listing.argsort(COLUMN_NAME)) == ["A.mov", "b.txt", "c.txt", "sub"]
+    assert names(listing.argsort(COLUMN_SIZE)) == ["sub", "A.mov", "b.txt", "c.txt"]
+    assert names(listing.argsort(COLUMN_SIZE, reverse=True)) == ["c.txt", "b.txt", "A.mov", "sub"]
+    assert names(listing.argsort(COLUMN_DATE)) == ["c.txt", "A.mov", "sub", "b.txt"]
+    assert names(listing.argsort(COLUMN_TYPE)) == ["sub", "A.mov", "b.txt", "c.txt"]
+
+
+def test_listing_diff_and_tombstones():
+    """Test that a rescan diff finds added, removed and changed entries"""
+    listing = make_listing()
+    added, removed, changed = listing.diff([
+        FileEntry("b.txt", "/data/b.txt", False, 4096, 400.0, 0o100644),
+        FileEntry("A.mov", "/data/A.mov", False, 10, 100.0, 0o100644),
+        FileEntry("new.txt", "/data/new.txt", False, 1, 500.0, 0o100644),
+        FileEntry("sub", "/data/sub", True, 0, 200.0, 0o040755),
+    ])
+    assert [entry.name for entry in added] == ["new.txt"]
+    assert removed == [3]
+    assert [(index, entry.size) for index, entry in changed] == [(0, 4096)]
+
+    listing.remove(3)
+    listing.update(0, changed[0][1])
+    listing.append(added)
+    assert len(listing) == 4
+    assert listing.entry_index("c.txt") is None
+    assert listing.sizes[0] == 4096
+    order = listing.argsort(COLUMN_NAME)
+    assert [listing.names[i] for i in order] == ["A.mov", "b.txt", "new.txt", "sub"]
+
+
+def test_listing_copy_is_independent_and_keeps_sorts():
+    """Test that a copied listing reuses cached sorts and is unaffected by later edits"""
+    listing = make_listing()
+    order = listing.argsort(COLUMN_SIZE, folders_first=True)
+    copy = listing.copy()
+    assert copy._orders == listing._orders
+    assert copy.argsort(COLUMN_SIZE, folders_first=True) == order
+
+    listing.remove(1)
+    listing.set_folder_size(2, 5)
+    listing.append([FileEntry("d.txt", "/data/d.txt", False, 1, 60.0, 0o100644)])
+    assert len(copy) == 4
+    assert copy.entry_index("A.mov") == 1
+    assert copy.entry_index("d.txt") is None
+    assert list(copy.sizes) == [2048, 10, -1, 1024 ** 3]
+    assert copy.argsort(COLUMN_SIZE, folders_first=True) == order
+
+
+def test_listing_natural_order_secondary_keys_and_folders_first():
+    """Test natural name order, name tie-breaking, folders-first and cached permutations"""
+    listing = DirectoryListing()
+    listing.append([
+        FileEntry("file10.txt", "/data/file10.txt", False, 5, 100.0, 0o100644),
+        FileEntry("File2.txt", "/data/File2.txt", False, 5, 300.0, 0o100644),
+        FileEntry("dir1", "/data/dir1", True, 0, 200.0, 0o040755),
+        FileEntry("file1.txt", "/data/file1.txt", False, 7, 100.0, 0o100644),
+    ])
+    names = lambda order: [listing.names[i] for i in order]
+
+    assert names(listing.argsort(COLUMN_NAME)) == ["dir1", "file1.txt", "File2.txt", "file10.txt"]
+    # Equal sizes fall back to name order in both directions
+    assert names(listing.argsort(COLUMN_SIZE, reverse=True)) == ["file1.txt", "File2.txt", "file10.txt", "dir1"]
+    assert names(listing.argsort(COLUMN_SIZE, reverse=True, folders_first=True)) == [
+        "dir1", "file1.txt", "File2.txt", "file10.txt"
+    ]
+
+    # Repeated sorts reuse the cached permutation but hand out copies
+    order = listing.argsort(COLUMN_DATE)
+    order.append(99)
+    assert len(listing.argsort(COLUMN_DATE)) == 4
+
+    first = listing.append([FileEntry("file3.txt", "/data/file3.txt", False, 5, 50.0, 0o100644)])
+    order = listing.argsort(COLUMN_NAME, reverse=True)
+    del order[order.index(first)]
+    position = listing.position_finder(COLUMN_NAME, reverse=True)(order, first)
+    order.insert(position, first)
+    assert names(order) == ["file10.txt", "file3.txt", "File2.txt", "file1.txt", "dir1"]
+
+
+def test_folder_sizes_sort_and_survive_rescans():
+    """Test that computed folder sizes sort with file sizes and are kept by an unchanged rescan"""
+    listing = make_listing()
+    names = lambda order: [listing.names[i] for i in order]
+
+    assert listing.set_folder_size(2, 5000)
+    assert not listing.set_folder_size(2, 5000)
+    assert not listing.set_folder_size(0, 5000)
+    assert names(listing.argsort(COLUMN_SIZE)) == ["A.mov", "b.txt", "sub", "c.txt"]
+
+    rescan = [
+        FileEntry("b.txt", "/data/b.txt", False, 2048, 300.0, 0o100644),
+        FileEntry("A.mov", "/data/A.mov", False, 10, 100.0, 0o100644),
+        FileEntry("sub", "/data/sub", True, 0, 250.0, 0o040755),
+        FileEntry("c.txt", "/data/c.txt", False, 1024 ** 3, 50.0, 0o100644),
+    ]
+    added, removed, changed = listing.diff(rescan)
+    assert [index for index, entry in changed] == [2]
+    listing.update(2, rescan[2])
+    assert listing.sizes[2] == 5000
+
+    # A folder replaced by another with the same mtime is caught by its inode
+    rescan[2] = FileEntry("sub", "/data/sub", True, 0, 250.0, 0o040755, ino=99)
+    added, removed, changed = listing.diff(rescan)
+    assert [index for index, entry in changed] == [2]
+
+
+def test_icon_theme_names_follow_mime_types():
+    """Test that icon names go from the exact MIME type to its generic family"""
+    assert icon_theme_names("shot.JPG") == ["image-jpeg", "image-x-generic"]
+    assert icon_theme_names("notes.txt") == ["text-plain", "text-x-generic"]
+    assert icon_theme_names("plates.zip") == ["application-zip", "package-x-generic"]
+    assert icon_theme_names("Makefile") == []
+
+
+def test_numpy_and_fallback_sorts_agree_on_ties(monkeypatch):
+    """Test that the NumPy argsort keeps name order among equal keys, like the sorted() fallback"""
+    from mac_file_manager_pro import listing as listing_module
+    entries = [FileEntry(f"f{i}.{'txt' if i % 3 else 'md'}", f"/data/f{i}", i % 7 == 0, i % 5 * 100,
+                         float(i % 4), 0o100644) for i in range(200)]
+    orders = {}
+    for use_numpy in (False, listing_module.NUMPY_AVAILABLE):
+        monkeypatch.setattr(listing_module, "NUMPY_AVAILABLE", use_numpy)
+        listing = DirectoryListing()
+        listing.append(entries)
+        orders[use_numpy] = [list(listing.argsort(column, reverse, folders_first))
+                             for column in (COLUMN_SIZE, COLUMN_TYPE, COLUMN_DATE)
+                             for reverse in (False, True) for folders_first in (False, True)]
+    assert orders[listing_module.NUMPY_AVAILABLE] == orders[False]
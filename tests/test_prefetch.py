@@ -0,0 +1,77 @@
+import threading
+
+from mac_file_manager_pro.dirscan import ListingCache
+from mac_file_manager_pro.prefetch import Prefetcher, VisitCounter
+
+
+def make_folder(path, count):
+    path.mkdir()
+    for number in range(count):
+        (path / f"file{number}.jpg").write_bytes(b"x")
+    return str(path)
+
+
+def test_prefetcher_lists_folders_within_budget(tmp_path):
+    """Test that likely folders are cached while large ones and a full cache are skipped"""
+    small = make_folder(tmp_path / "small", 3)
+    large = make_folder(tmp_path / "large", 12)
+    other = make_folder(tmp_path / "other", 3)
+    listed = []
+    done = threading.Event()
+
+    def on_listed(listing):
+        listed.append(listing.path)
+        if listing.path == other:
+            done.set()
+
+    cache = ListingCache(max_entries=8)
+    prefetcher = Prefetcher(cache, on_listed, max_entries=10, pause=0)
+    try:
+        assert prefetcher.prefetch([small, large, str(tmp_path / "missing"), small, other]) == 4
+        assert done.wait(5)
+    finally:
+        prefetcher.shutdown(timeout=5)
+
+    # "other" fitted in the room left beside "small"; nothing was evicted
+    assert listed == [small, other]
+    assert [entry.name for entry in cache.get(small).files] == ["file0.jpg", "file1.jpg", "file2.jpg"]
+    assert large not in cache
+    assert prefetcher.listed == 2 and prefetcher.skipped == 1
+
+
+def test_prefetcher_waits_while_held(tmp_path):
+    """Test that nothing is listed while foreground work holds the prefetcher"""
+    folder = make_folder(tmp_path / "next", 2)
+    done = threading.Event()
+    cache = ListingCache()
+    prefetcher = Prefetcher(cache, lambda listing: done.set(), pause=0)
+    try:
+        prefetcher.hold()
+        prefetcher.prefetch([folder])
+        assert not done.wait(0.2)
+        assert folder not in cache
+        prefetcher.release()
+        assert done.wait(5)
+    finally:
+        prefetcher.shutdown(timeout=5)
+    assert folder in cache
+
+    # Folders already cached and unchanged are not listed again
+    prefetcher = Prefetcher(cache, pause=0)
+    try:
+        assert prefetcher._list(folder) is None
+    finally:
+        prefetcher.shutdown(timeout=5)
+
+
+def test_visit_counter_prefers_frequent_and_recent_folders():
+    """Test that often visited folders rank first, recent visits outweigh old ones and the count is bounded"""
+    visits = VisitCounter(max_folders=3, decay=0.5)
+    for path in ("/a", "/b", "/a", "/c", "/a"):
+        visits.record(path)
+    assert visits.top(2) == ["/a", "/c"]
+    assert visits.top(5, exclude={"/a"}) == ["/c", "/b"]
+
+    visits.record("/d")
+    assert len(visits) == 3
+    assert "/b" not in visits.top(5)
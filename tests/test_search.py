@@ -0,0 +1,59 @@
+import pytest
+
+from mac_file_manager_pro.search import (
+    MATCH_FUZZY, MATCH_GLOB, MATCH_REGEX, MATCH_SUBSTRING, compile_matcher, search_names
+)
+
+NAMES = [name.casefold() for name in [
+    "Holiday.MOV", "notes.txt", "final_report.pdf", "report_final_v2.pdf",
+    "clip.mov.bak", "README.md", "frpt.txt",
+]]
+
+
+def matched(query, mode):
+    return [NAMES[index] for index in search_names(NAMES, query, mode)]
+
+
+def test_substring_glob_and_regex_modes():
+    """Test that each mode matches case-insensitively with its own syntax"""
+    assert sorted(matched("REPORT", MATCH_SUBSTRING)) == ["final_report.pdf", "report_final_v2.pdf"]
+    assert matched("*.mov", MATCH_GLOB) == ["holiday.mov"]
+    assert sorted(matched("[!n]*.txt", MATCH_GLOB)) == ["frpt.txt"]
+    assert matched(r"^read\w+\.md$", MATCH_REGEX) == ["readme.md"]
+
+    with pytest.raises(ValueError):
+        compile_matcher("([", MATCH_REGEX)
+    assert compile_matcher("", MATCH_FUZZY) is None
+
+
+def test_fuzzy_matches_subsequences_ranked_by_score():
+    """Test that tight, word-boundary fuzzy matches rank first"""
+    results = matched("frpt", MATCH_FUZZY)
+    assert results[0] == "frpt.txt"
+    assert set(results) == {"frpt.txt", "final_report.pdf"}
+    # "fin" starts a word in both, but is contiguous at the very start of one
+    assert matched("fin", MATCH_FUZZY)[0] == "final_report.pdf"
+
+
+def test_refines_allows_narrowing_from_previous_matches():
+    """Test that extended queries are recognised as refinements"""
+    assert compile_matcher("rep", MATCH_SUBSTRING).refines(compile_matcher("re", MATCH_SUBSTRING))
+    assert not compile_matcher("rep", MATCH_SUBSTRING).refines(compile_matcher("ep", MATCH_FUZZY))
+    assert compile_matcher("frpt", MATCH_FUZZY).refines(compile_matcher("fpt", MATCH_FUZZY))
+    assert not compile_matcher("fpt", MATCH_FUZZY).refines(compile_matcher("frpt", MATCH_FUZZY))
+
+    matcher = compile_matcher("final", MATCH_SUBSTRING)
+    candidates = search_names(NAMES, "fin", MATCH_SUBSTRING)
+    assert sorted(matcher.search(NAMES, candidates)) == sorted(matcher.search(NAMES))
+
+
+def test_fuzzy_ranks_the_best_matches_of_large_result_sets(monkeypatch):
+    """Test that past RANK_LIMIT the best matches still come first, followed by the rest in order"""
+    from mac_file_manager_pro import search
+    fully_ranked = matched("r", MATCH_FUZZY)
+    monkeypatch.setattr(search, "RANK_LIMIT", 2)
+    results = matched("r", MATCH_FUZZY)
+    assert len(fully_ranked) > 3
+    assert results[:2] == fully_ranked[:2]
+    rest = [name for name in NAMES if "r" in name and name not in fully_ranked[:2]]
+    assert results[2:] == rest
@@ -0,0 +1,13 @@
+from mac_file_manager_pro.storage import load_bookmarks, save_bookmarks
+
+
+def test_bookmarks_round_trip_and_tolerate_bad_files(tmp_path):
+    """Test that bookmarks survive a save/load and unreadable files load as empty"""
+    path = str(tmp_path / "bookmarks.json")
+    assert load_bookmarks(path) == []
+
+    save_bookmarks(["/Users/me/Movies", "/Volumes/Media"], path)
+    assert load_bookmarks(path) == ["/Users/me/Movies", "/Volumes/Media"]
+
+    (tmp_path / "bookmarks.json").write_text("{not json")
+    assert load_bookmarks(path) == []
@@ -0,0 +1,178 @@
+import threading
+
+from mac_file_manager_pro.thumbnails import (
+    STORAGE_HDD, STORAGE_NETWORK, STORAGE_SSD, MOUNT_LINE, LRUCache, StorageClassifier, ThumbnailPool,
+    classify_mount, pyramid_level, pyramid_plan,
+)
+
+
+class Recorder:
+    def __init__(self):
+        self.results = []
+        self.done = threading.Event()
+        self.expected = 0
+
+    def __call__(self, key, result, error):
+        self.results.append((key, result, error))
+        if len(self.results) >= self.expected:
+            self.done.set()
+
+
+def test_pool_runs_by_priority_and_drops_cancelled_groups():
+    """Test that queued jobs run lowest priority first and a cancelled folder's jobs never run"""
+    recorder = Recorder()
+    pool = ThumbnailPool(recorder, threads=1)
+    gate = threading.Event()
+    recorder.expected = 4
+    try:
+        # Hold the only thread so the rest of the jobs queue up
+        assert pool.submit("gate", gate.wait)
+        assert pool.submit("late", str.upper, ("late",), priority=5, group="/a")
+        assert pool.submit("early", str.upper, ("early",), priority=1, group="/a")
+        assert pool.submit("gone", str.upper, ("gone",), priority=0, group="/b")
+        assert pool.submit("fails", int, ("x",), priority=3, group="/a")
+        # Resubmitting a queued key moves it instead of adding it twice
+        assert pool.submit("late", str.upper, ("late",), priority=2, group="/a")
+        assert pool.cancel_group("/b") == 1
+        assert pool.pending() == 4
+        gate.set()
+        assert recorder.done.wait(5)
+    finally:
+        pool.shutdown(timeout=5)
+
+    assert [key for key, _, _ in recorder.results] == ["gate", "early", "late", "fails"]
+    assert recorder.results[1][1] == "EARLY"
+    assert isinstance(recorder.results[3][2], ValueError)
+    assert pool.pending() == 0
+    assert not pool.submit("after", str.upper, ("after",))
+
+
+def test_pool_limits_jobs_per_lane():
+    """Test that a spinning disk lane never runs more jobs at once than its limit"""
+    lock = threading.Lock()
+    running = {STORAGE_HDD: 0, STORAGE_SSD: 0}
+    peak = {STORAGE_HDD: 0, STORAGE_SSD: 0}
+    release = threading.Event()
+
+    def job(lane):
+        with lock:
+            running[lane] += 1
+            peak[lane] = max(peak[lane], running[lane])
+        release.wait(5)
+        with lock:
+            running[lane] -= 1
+
+    recorder = Recorder()
+    recorder.expected = 12
+    pool = ThumbnailPool(recorder, threads=6, lane_limits={STORAGE_SSD: 6, STORAGE_HDD: 1})
+    try:
+        for number in range(6):
+            pool.submit(f"hdd{number}", job, (STORAGE_HDD,), lane=STORAGE_HDD)
+            pool.submit(f"ssd{number}", job, (STORAGE_SSD,), lane=STORAGE_SSD)
+        threading.Timer(0.2, release.set).start()
+        assert recorder.done.wait(10)
+    finally:
+        pool.shutdown(timeout=5)
+    assert peak[STORAGE_HDD] == 1
+    assert peak[STORAGE_SSD] > 1
+
+
+def test_storage_classifier_uses_longest_mount_point():
+    """Test that paths map to the storage kind of the mount holding them"""
+    classifier = StorageClassifier([
+        ("/Volumes/share", "//user@nas/share", "smbfs"),
+        ("/srv/nfs", "nas:/export", "nfs4"),
+        ("/", "tmpfs", "tmpfs"),
+    ])
+    assert classifier.kind("/Volumes/share/photos/a.jpg") == STORAGE_NETWORK
+    assert classifier.kind("/srv/nfs") == STORAGE_NETWORK
+    assert classifier.kind("/Volumes/shared/a.jpg") == STORAGE_SSD
+    assert classify_mount("/dev/not-a-disk", "apfs") == STORAGE_SSD
+
+
+def test_mount_line_parses_linux_and_macos_formats():
+    """Test that both flavours of `mount` output give the mount point and filesystem type"""
+    mac = MOUNT_LINE.match("//guest@nas._smb._tcp.local/Media on /Volumes/My Media (smbfs, nodev, nosuid, mounted by me)")
+    assert mac.group('mount_point') == "/Volumes/My Media"
+    assert mac.group('options').split(',')[0] == "smbfs"
+    linux = MOUNT_LINE.match("/dev/sda1 on /mnt/data type ext4 (rw,relatime)")
+    assert (linux.group('mount_point'), linux.group('type')) == ("/mnt/data", "ext4")
+
+
+def test_lru_cache_evicts_least_recently_used_past_budget():
+    """Test that the cache stays within its byte budget, evicting the oldest unused values"""
+    cache = LRUCache(100, len)
+    cache.put("a", "x" * 40)
+    cache.put("b", "x" * 40)
+    assert cache.get("a") == "x" * 40
+    cache.put("c", "x" * 40)
+    assert "b" not in cache and "a" in cache and "c" in cache
+    assert cache.bytes_used == 80
+    assert cache.get("b") is None
+
+    # Too large to ever fit, and replacing a value frees its old size
+    cache.put("huge", "x" * 101)
+    assert "huge" not in cache
+    cache.put("a", "x" * 10)
+    assert cache.bytes_used == 50
+
+    cache.set_max_bytes(20)
+    assert list(cache._items) == ["a"]
+    assert cache.stats() == {
+        'entries': 1, 'bytes': 10, 'max_bytes': 20, 'hits': 1, 'misses': 1, 'evictions': 2,
+    }
+
+
+def test_pyramid_level_and_plan():
+    """Test that icon sizes map to the next level up and a decode fills every level it can"""
+    assert [pyramid_level(size) for size in (24, 32, 33, 96, 128, 200, 400)] == [32, 32, 64, 128, 128, 256, 256]
+    # A full 256px decode fills the whole pyramid
+    assert pyramid_plan(256, 128) == {32: 32, 64: 64, 128: 128, 256: None}
+    # A 160px embedded thumbnail fills the levels below it but never passes for 256px
+    assert pyramid_plan(160, 128) == {32: 32, 64: 64, 128: 128}
+    # A source smaller than the requested level stands in for it
+    assert pyramid_plan(100, 128) == {32: 32, 64: 64, 128: None}
+
+
+def test_pool_compacts_stale_entries_from_reprioritising():
+    """Test that resubmitting queued jobs over and over does not grow the heaps without bound"""
+    recorder = Recorder()
+    pool = ThumbnailPool(recorder, threads=1)
+    gate = threading.Event()
+    try:
+        assert pool.submit("gate", gate.wait)
+        for _ in range(50):
+            for number in range(20):
+                pool.submit(f"job{number}", str, (number,), priority=number % 3)
+        assert pool.pending() == 21
+        assert sum(len(heap) for heap in pool._heaps.values()) <= 2 * 20 + 64 + 1
+        recorder.expected = 21
+        gate.set()
+        assert recorder.done.wait(5)
+    finally:
+        pool.shutdown(timeout=5)
+    assert sorted(key for key, _, _ in recorder.results[1:]) == sorted(f"job{number}" for number in range(20))
+
+
+def test_pool_logs_handler_failures(caplog):
+    """Test that an exception in the result handler is logged and the thread keeps working"""
+    handled = []
+    done = threading.Event()
+
+    def handler(key, result, error):
+        handled.append(key)
+        if key == "bad":
+            raise RuntimeError("decoder broke")
+        done.set()
+
+    pool = ThumbnailPool(handler, threads=1)
+    try:
+        with caplog.at_level("ERROR", logger="mac_file_manager_pro.thumbnails"):
+            assert pool.submit("bad", str, ("x",))
+            assert pool.submit("good", str, ("y",), priority=1)
+            assert done.wait(5)
+    finally:
+        pool.shutdown(timeout=5)
+    assert handled == ["bad", "good"]
+    assert "Thumbnail handler failed for bad" in caplog.text
+    assert "decoder broke" in caplog.text
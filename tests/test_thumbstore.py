@@ -0,0 +1,53 @@
+import threading
+
+from mac_file_manager_pro.thumbstore import NO_THUMBNAIL, ThumbnailStore
+
+
+def test_store_keys_thumbnails_by_file_version(tmp_path):
+    """Test that stored thumbnails survive reopening and go stale when the file changes"""
+    db_path = str(tmp_path / "thumbs.sqlite3")
+    store = ThumbnailStore(db_path)
+    store.put("/photos/a.jpg", 128, 1000, 5, b"jpeg-a")
+    store.put("/photos/b.txt", 128, 10, 6, NO_THUMBNAIL)
+    store.flush()
+    assert store.get("/photos/a.jpg", 128, 1000, 5) == b"jpeg-a"
+    store.close()
+
+    store = ThumbnailStore(db_path)
+    assert store.contains("/photos/a.jpg", 128)
+    assert not store.contains("/photos/a.jpg", 256)
+    assert store.get("/photos/a.jpg", 128, 1000, 5) == b"jpeg-a"
+    assert store.get("/photos/a.jpg", 128, 1000, 7) is None
+    assert store.get("/photos/a.jpg", 128, 999, 5) is None
+    assert store.get("/photos/b.txt", 128, 10, 6) == NO_THUMBNAIL
+
+    # Re-rendering replaces the stale version
+    store.put("/photos/a.jpg", 128, 1000, 7, b"jpeg-a2")
+    store.close()
+    store = ThumbnailStore(db_path)
+    assert store.get("/photos/a.jpg", 128, 1000, 7) == b"jpeg-a2"
+    store.close()
+
+
+def test_store_accepts_writes_from_many_threads_and_prunes_oldest(tmp_path):
+    """Test that concurrent writers are all committed and pruning keeps the newest thumbnails"""
+    store = ThumbnailStore(str(tmp_path / "thumbs.sqlite3"))
+
+    def write(start):
+        for number in range(start, start + 50):
+            store.put(f"/p/{number}.png", 128, number, number, b"x" * 100)
+
+    threads = [threading.Thread(target=write, args=(start,)) for start in range(0, 200, 50)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    store.flush()
+    assert store.total_bytes() == 200 * 100
+
+    store.put("/p/newest.png", 128, 1, 1, b"y" * 100)
+    store.flush()
+    assert store.prune(max_bytes=1000) > 0
+    assert store.total_bytes() <= 1000
+    assert store.get("/p/newest.png", 128, 1, 1) == b"y" * 100
+    store.close()
@@ -0,0 +1,46 @@
+import threading
+
+from mac_file_manager_pro.search import MATCH_GLOB, MATCH_SUBSTRING, compile_matcher
+from mac_file_manager_pro.treesearch import search_tree
+
+
+def make_tree(root):
+    for a in range(3):
+        for b in range(3):
+            folder = root / f"d{a}" / f"s{b}"
+            folder.mkdir(parents=True)
+            for c in range(4):
+                (folder / f"clip_{a}{b}{c}.mov").write_text("x")
+            (folder / "notes.txt").write_text("x")
+    (root / "node_modules" / "pkg").mkdir(parents=True)
+    (root / "node_modules" / "pkg" / "clip_dep.mov").write_text("x")
+    (root / ".hidden").mkdir()
+    (root / ".hidden" / "clip_hidden.mov").write_text("x")
+
+
+def test_search_tree_finds_matches_and_prunes_ignored_dirs(tmp_path):
+    """Test that every matching file below the root is found, skipping ignored and hidden dirs"""
+    make_tree(tmp_path)
+    matcher = compile_matcher("*.mov", MATCH_GLOB)
+
+    names = [entry.name for batch in search_tree(str(tmp_path), matcher, workers=4) for entry in batch]
+    assert len(names) == 36
+    assert "clip_dep.mov" not in names
+    assert "clip_hidden.mov" not in names
+
+    folders = [entry.name for batch in search_tree(str(tmp_path), compile_matcher("s1", MATCH_SUBSTRING))
+               for entry in batch]
+    assert folders == ["s1"] * 3
+
+
+def test_search_tree_honours_max_results_and_cancel(tmp_path):
+    """Test that the walk stops at the results cap and when cancelled"""
+    make_tree(tmp_path)
+    matcher = compile_matcher("clip", MATCH_SUBSTRING)
+
+    batches = list(search_tree(str(tmp_path), matcher, max_results=10, workers=2))
+    assert sum(len(batch) for batch in batches) == 10
+
+    cancel_event = threading.Event()
+    cancel_event.set()
+    assert list(search_tree(str(tmp_path), matcher, cancel_event=cancel_event)) == []
@@ -0,0 +1,18 @@
+from mac_file_manager_pro.videothumb import GOOD_STD, frame_score, sample_frames
+
+
+def test_sample_frames_spreads_over_the_duration():
+    """Test that candidates sit at fixed fractions of the length, or the first seconds if it is unknown"""
+    assert sample_frames(1000, 25) == [100, 300, 500]
+    # Very short clips do not try the same frame twice
+    assert sample_frames(2, 25) == [0, 1]
+    assert sample_frames(0, 30) == [30, 90, 150]
+    assert sample_frames(-1, 0) == [25, 75, 125]
+
+
+def test_frame_score_rejects_blank_frames():
+    """Test that black, white and flat frames score None and contrast scores higher"""
+    assert frame_score(3.0, 20.0) is None
+    assert frame_score(250.0, 20.0) is None
+    assert frame_score(120.0, 2.0) is None
+    assert frame_score(120.0, GOOD_STD) > frame_score(120.0, 10.0)